@@ -18,6 +18,43 @@ def fasta_file_iter(path: str):
         yield from _fasta_structure_iter(file)
 
 
+def fasta_file_chunk_iter(path: str, chunk_size: int = 1 << 16):
+    """ Return an iterator over parts of sequences in fasta file, so the whole record (e.g. chromosome)
+        is never loaded into memory.
+    Usage:
+        for id, chunk, is_first in fasta_file_chunk_iter("data/genome.fasta"):
+            print(id, len(chunk))
+    :param path: path to file in fasta format
+    :param chunk_size: approximate number of letters in one chunk, chunks are joined from the whole lines
+    :return: an iterator of (id, chunk, is_first), is_first is True for the first chunk of every record,
+        so records with equal ids are never joined
+    """
+    with open(path, "r") as file:
+        id = None
+        chunk = []
+        length = 0
+        is_first = True
+        for line in file:
+            line = line.strip()
+            if line.startswith(">"):
+                if chunk:
+                    yield id, "".join(chunk), is_first
+                id = line[1:]
+                chunk = []
+                length = 0
+                is_first = True
+            else:
+                chunk.append(line)
+                length += len(line)
+                if length >= chunk_size:
+                    yield id, "".join(chunk), is_first
+                    chunk = []
+                    length = 0
+                    is_first = False
+        if chunk:
+            yield id, "".join(chunk), is_first
+
+
 def parse_fasta_string(string):
     """ parse one fasta record
     :param string: fasta record in string format (id should start with > and end with \n)
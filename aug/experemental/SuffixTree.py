@@ -1,217 +1,284 @@
-import enum
 import bisect
-import itertools
-from collections import deque
+import enum
+from array import array
 from typing import Union, List
 
+_ROOT = 0
+_NO_NODE = -1
+_LEAF_END = -1  # end of leaf edges is the current end of the text
+
 
 class SuffixTreeBuildingMethod(enum.Enum):
     naive = enum.auto()
     ukkonen = enum.auto()
 
 
-class _TreeElem:
-    def __init__(self, data=None, index=None, children_type=list):
-        self.node = data
-        if children_type == list:
-            self.children = [_TreeElem(index)] if index else []
-        elif children_type == dict:
-            self.children = {index: _TreeElem(index)} if index else {}
-
-    def add(self, suffix):
-        current = self
-        while True:
-            pos = bisect.bisect(current.children, suffix)
-            if not self._is_prefix_presented(current, pos, suffix):
-                pos = pos - 1
-            if self._is_prefix_presented(current, pos, suffix):
-                general = current.children[pos].extract_general_prefix(suffix)
-                if general < len(current.children[pos].node):  # added suffix and current vertex has common prefix
-                    self._split_and_insert_common_prefix(current, general, pos)
-                if general < len(suffix.node):  # vertex is a prefix case
-                    suffix.node = suffix.node[general:]
-                else:
-                    # vertex is already presented, we have to add just index
-                    bisect.insort(current.children[pos].children, suffix.children[0])
-                    break
-                current = current.children[pos]
-            else:
-                bisect.insort(current.children, suffix)
-                break
-
-    def _is_prefix_presented(self, current, pos, suffix):
-        return pos > -1 and pos < len(current.children) \
-            and type(current.children[pos].node) == str and suffix.node.startswith(current.children[pos].node[0])
-
-    def _split_and_insert_common_prefix(self, current, general, pos):
-        rest = _TreeElem(current.children[pos].node[general:])
-        rest.children = current.children[pos].children
-        current.children[pos].node = current.children[pos].node[:general]
-        current.children[pos].children = [rest]
-
-    def __str__(self):
-        children = ", ".join(str(child) if type(child) == list else str(self.children[child])
-                             for child in self.children)
-        return f"Elem(node={self.node}, children={children})"
-
-    def __eq__(self, other):
-        return self.node == other.node
-
-    def __lt__(self, other):
-        return (type(self.node) == int, self.node) < (type(other.node) == int, other.node)
-
-    def __gt__(self, other):
-        return (type(self.node) == int, self.node) > (type(other.node) == int, other.node)
-
-    def extract_general_prefix(self, other):
-        for general, (a, b) in enumerate(zip(self.node, other.node)):
-            if a != b:
-                break
-        else:
-            general += 1
-        return general
-
-
 class SuffixTree:
+    """ Generalized suffix tree for one or many strings.
+    Strings are concatenated into one text, every string is ended with its own unique terminator
+        (negative number -i for i-th string), so suffixes of different strings never share a terminator.
+    Nodes are stored in parallel arrays instead of Python objects:
+        _starts[node], _ends[node] - label of the edge to the node is _text[start:end], leaves have end _LEAF_END,
+        _links[node] - suffix link,
+        _children[node] - the first child, _siblings[node] - the next child of the same parent.
+    Node 0 is a root.
+    >>> tree = SuffixTree(["banana", "ananas"])
+    >>> tree.make_common_tree()
+    ['anana']
+    >>> "nan" in tree, "nab" in tree
+    (True, False)
+    """
+
     def __init__(self, collection: Union[str, List[str]], method=SuffixTreeBuildingMethod.ukkonen):
-        self._n_string = 0
-        self.method = method
-        if method == SuffixTreeBuildingMethod.naive:
-            self._naive(collection)
-        elif method == SuffixTreeBuildingMethod.ukkonen:
-            self._ukkonen(collection)
-        else:
+        if method not in (SuffixTreeBuildingMethod.naive, SuffixTreeBuildingMethod.ukkonen):
             raise ValueError("Wrong method, please choose one from SuffixTreeBuildingMethod")
+        self.method = method
+        self._text = array("i")
+        self._string_starts = array("q")
+        self._starts = array("i")
+        self._ends = array("i")
+        self._links = array("i")
+        self._children = array("i")
+        self._siblings = array("i")
+        self._new_node(0, 0)  # root
+        # active point of Ukkonen's algorithm
+        self._active_node = _ROOT
+        self._active_edge = 0
+        self._active_length = 0
+        self._remainder = 0
 
-    def _naive(self, collection):
         collection = [collection] if isinstance(collection, str) else collection
-        self._tree = _TreeElem()
-
         for elem in collection:
             self.add(elem)
 
-    def _ukkonen(self, collection):
-        self._n_string += 1
-        collection = [collection] if isinstance(collection, str) else collection
-        self._tree = _TreeElem(children_type=dict)
-        self._first_elem = collection[0]
-
-        for elem in collection:
-            self._add_ukkonen(elem)
-
-    def _add_ukkonen(self, elem):
-        active_edge = self._tree
-        active_length = 0
-        for index, symbol in enumerate(itertools.chain(elem, (self._n_string,))):
-            if not active_length:
-                if symbol not in active_edge.children:
-                    child = _TreeElem((index, None), children_type=dict, index=self._n_string)
-                    active_edge.children[symbol] = child
-                else:
-                    active_node = active_edge.children[symbol].node[0]
-                    active_edge = active_edge.children[symbol]
-                    active_length += 1
-            else:
-                # todo: check if current suffix is longer then current node
-                print(active_node, active_length)
-                if active_node + active_length < len(self._first_elem)\
-                        and self._first_elem[active_node + active_length] != symbol:
-                    while active_length:
-                        self._split_node_ukkonen(active_edge, active_length, active_node, elem, index, symbol)
-
-                        active_length -= 1
-                        active_node += 1
-                        active_edge = self._tree.children[elem[active_node]]
-                else:
-                    active_length += 1
-
-    def _split_node_ukkonen(self, active_edge, active_length, active_node, elem, index, symbol):
-        start, end = active_edge.node
-        active_edge.node = start, start + active_length
-
-        #assert not end or end >= active_node + active_length
-        child = self._first_elem[active_node + active_length]
-        child_tree = _TreeElem((start + active_length, end), children_type=dict)
-        child_tree.children = active_edge.children
-        active_edge.children = {child: child_tree}
-
-        child = (index, None) if type(symbol) != int else symbol
-        active_edge.children[symbol] = _TreeElem(child, children_type=dict)
-
-    def add(self, string):
-        self._n_string += 1
-        cur = ""
-
-        if self.method == SuffixTreeBuildingMethod.naive:
-            for symbol in reversed(string):
-                cur = symbol + cur
-                self._tree.add(_TreeElem(cur, self._n_string))
+    @property
+    def _n_string(self):
+        return len(self._string_starts)
+
+    def add(self, string: str):
+        """ Add one more string to the tree. """
+        self._string_starts.append(len(self._text))
+        symbols = [ord(symbol) for symbol in string]
+        symbols.append(-self._n_string)  # unique terminator
+        if self.method == SuffixTreeBuildingMethod.ukkonen:
+            for symbol in symbols:
+                self._add_ukkonen(symbol)
         else:
-            self._add_ukkonen(string)
+            start = len(self._text)
+            self._text.extend(symbols)
+            for position in range(start, len(self._text)):
+                self._add_naive(position)
+
+    def _new_node(self, start: int, end: int) -> int:
+        self._starts.append(start)
+        self._ends.append(end)
+        self._links.append(_ROOT)
+        self._children.append(_NO_NODE)
+        self._siblings.append(_NO_NODE)
+        return len(self._starts) - 1
+
+    def _edge_end(self, node: int) -> int:
+        end = self._ends[node]
+        return len(self._text) if end == _LEAF_END else end
+
+    def _find_child(self, node: int, symbol: int) -> int:
+        child = self._children[node]
+        while child != _NO_NODE and self._text[self._starts[child]] != symbol:
+            child = self._siblings[child]
+        return child
+
+    def _add_child(self, node: int, child: int):
+        self._siblings[child] = self._children[node]
+        self._children[node] = child
+
+    def _replace_child(self, node: int, old: int, new: int):
+        self._siblings[new] = self._siblings[old]
+        if self._children[node] == old:
+            self._children[node] = new
+            return
+        child = self._children[node]
+        while self._siblings[child] != old:
+            child = self._siblings[child]
+        self._siblings[child] = new
+
+    def _split(self, node: int, child: int, length: int) -> int:
+        """ Split edge to child after length symbols, returns the new internal node. """
+        start = self._starts[child]
+        middle = self._new_node(start, start + length)
+        self._replace_child(node, child, middle)
+        self._starts[child] = start + length
+        self._add_child(middle, child)
+        return middle
+
+    def _add_naive(self, position: int):
+        """ Insert the suffix starting at position walking from the root, O(n) for every suffix. """
+        text = self._text
+        node = _ROOT
+        while True:
+            child = self._find_child(node, text[position])
+            if child == _NO_NODE:
+                self._add_child(node, self._new_node(position, _LEAF_END))
+                return
+            start, end = self._starts[child], self._edge_end(child)
+            length = 0
+            while start + length < end and text[start + length] == text[position + length]:
+                length += 1
+            if start + length < end:
+                middle = self._split(node, child, length)
+                self._add_child(middle, self._new_node(position + length, _LEAF_END))
+                return
+            node = child
+            position += length
+
+    def _add_ukkonen(self, symbol: int):
+        """ Extend the tree with one symbol by Ukkonen's algorithm, amortized O(1) for every symbol.
+            https://en.wikipedia.org/wiki/Ukkonen%27s_algorithm
+        """
+        text = self._text
+        text.append(symbol)
+        position = len(text) - 1
+        self._remainder += 1
+        last_new_node = _NO_NODE
+        while self._remainder:
+            if not self._active_length:
+                self._active_edge = position
+            child = self._find_child(self._active_node, text[self._active_edge])
+            if child == _NO_NODE:
+                # rule 2: new leaf from the node
+                self._add_child(self._active_node, self._new_node(position, _LEAF_END))
+                if last_new_node != _NO_NODE:
+                    self._links[last_new_node] = self._active_node
+                    last_new_node = _NO_NODE
+            else:
+                length = self._edge_end(child) - self._starts[child]
+                if self._active_length >= length:
+                    # walk down to the child
+                    self._active_edge += length
+                    self._active_length -= length
+                    self._active_node = child
+                    continue
+                if text[self._starts[child] + self._active_length] == symbol:
+                    # rule 3: the suffix is already in the tree, the current phase is over
+                    if last_new_node != _NO_NODE and self._active_node != _ROOT:
+                        self._links[last_new_node] = self._active_node
+                    self._active_length += 1
+                    break
+                # rule 2: split the edge and add new leaf
+                middle = self._split(self._active_node, child, self._active_length)
+                self._add_child(middle, self._new_node(position, _LEAF_END))
+                if last_new_node != _NO_NODE:
+                    self._links[last_new_node] = middle
+                last_new_node = middle
+            self._remainder -= 1
+            if self._active_node == _ROOT and self._active_length:
+                self._active_length -= 1
+                self._active_edge = position - self._remainder + 1
+            elif self._active_node != _ROOT:
+                self._active_node = self._links[self._active_node]
+
+    def _iter_children(self, node: int):
+        child = self._children[node]
+        while child != _NO_NODE:
+            yield child
+            child = self._siblings[child]
+
+    def _label(self, node: int) -> List[int]:
+        """ Symbols of the edge to the node, cut after the terminator. """
+        result = []
+        for position in range(self._starts[node], self._edge_end(node)):
+            result.append(self._text[position])
+            if result[-1] < 0:
+                break
+        return result
 
+    def _owner(self, position: int) -> int:
+        """ Index of the string, containing position of the text. """
+        return bisect.bisect_right(self._string_starts, position) - 1
 
     def make_common_tree(self):
-        self._n_string = 1
-        self._tree.children = [child for child in self._tree.children
-                               if not (len(child.children) == 1 and type(child.children[0].node) == int)]
-        stack = [(self._tree, child, child.node, False) for child in self._tree.children]
-        longests = []
+        """ Find all longest substrings which are common for all strings in one post-order traversal.
+            For every node the set of strings (as a bit mask) having a suffix in its subtree is computed,
+            the answer is the deepest nodes which subtree contains suffixes of all strings.
+            Leaves are candidates too with the path label cut before the terminator, it matters only for one string,
+            which is the longest common substring of itself.
+        :return: list of longest common substrings in lexicographical order
+        """
+        full_mask = (1 << self._n_string) - 1
+        masks = {}
+        depths = array("q", [0]) * len(self._starts)
+        best_depth = 0
+        best_starts = []
+        stack = [(_ROOT, False)]
         while stack:
-            parent, current, string, visited = stack[-1]
-            stack[-1] = parent, current, string, True
-            if len(current.children) == 1 and type(current.children[0].node) == int:
-                self._remove_uncommon_vertex(current, parent)
-            else:
-                longests = self._current_longests(longests, string, visited)
-            if visited or len(current.children) == 1:
-                stack.pop()
-                self._remove_endings(current)
+            node, visited = stack.pop()
+            if not visited:
+                stack.append((node, True))
+                for child in self._iter_children(node):
+                    depths[child] = depths[node] + self._edge_end(child) - self._starts[child]
+                    stack.append((child, False))
+                continue
+            if self._children[node] == _NO_NODE:
+                # the leaf's path label is a suffix of the text, it starts in its owner string
+                start = len(self._text) - depths[node]
+                owner = self._owner(start)
+                mask = 1 << owner
+                end = self._string_starts[owner + 1] - 1 if owner + 1 < self._n_string else len(self._text) - 1
             else:
-                stack.extend((current, child, string + child.node, False)
-                             for child in current.children if type(child.node) != int)
-        return longests
-
-    def _remove_uncommon_vertex(self, current, parent):
-        parent.children.pop(parent.children.index(current))
-        child = current.children[0]
-        pos = bisect.bisect_left(parent.children, child)
-        if not (0 <= pos < len(parent.children) and parent.children[pos] == child):
-            bisect.insort(parent.children, child)
-
-    def _current_longests(self, longests, string, visited):
-        if visited:
-            longest_len = len(longests[0]) if longests else 0
-            if len(string) > longest_len:
-                longests = [string]
-            elif len(string) == longest_len:
-                longests.append(string)
-        return longests
-
-    def _remove_endings(self, current):
-        for index in range(-1, -len(current.children), -1):
-            node = current.children[index].node
-            if type(node) == int and node != 1:
-                current.children.pop()
+                mask = 0
+                for child in self._iter_children(node):
+                    mask |= masks.pop(child)
+                start, end = self._ends[node] - depths[node], self._ends[node]
+            if mask == full_mask and end > start and end - start >= best_depth:
+                if end - start > best_depth:
+                    best_depth = end - start
+                    best_starts = []
+                best_starts.append(start)
+            masks[node] = mask
+        return sorted({"".join(map(chr, self._text[start:start + best_depth])) for start in best_starts})
+
+    def __contains__(self, substring: str) -> bool:
+        node = _ROOT
+        position, end = 0, 0  # position of the next symbol to compare on the current edge
+        for symbol in map(ord, substring):
+            if position == end:
+                node = self._find_child(node, symbol)
+                if node == _NO_NODE:
+                    return False
+                position, end = self._starts[node], self._edge_end(node)
+            if self._text[position] != symbol:
+                return False
+            position += 1
+        return True
 
     def to_graphviz(self):
-        number = 1
-        deq = deque([(self._tree, number)])
         nodes = ""
         edges = ""
-        while deq:
-            current, parent_number = deq.popleft()
-            node_label = current.node if type(current.node) != tuple else (current.node, self._first_elem[current.node[0]:current.node[1]])
-            nodes += str(parent_number) + f' [label="{node_label}"]\n'
-            iterable = current.children.values() if type(current.children) == dict else current.children
-            for current_index, child in enumerate(iterable, 1):
-                number += 1
-                deq.append((child, number))
-                edges += str(parent_number) + "--" + str(number) + "\n"
+        for node in range(len(self._starts)):
+            label = "".join(chr(symbol) if symbol >= 0 else "$" + str(-symbol) for symbol in self._label(node))
+            nodes += f'{node + 1} [label="{label}"]\n'
+            edges += "".join(f"{node + 1}--{child + 1}\n" for child in self._iter_children(node))
         return "strict graph G {\n" + nodes + edges + "}"
 
+    def _to_str(self, node: int) -> str:
+        label = self._label(node)
+        if label and label[-1] < 0:  # leaf, terminator is shown as a separate node with the string number
+            terminator = f"Elem(node={-label[-1]}, children=)"
+            if len(label) == 1:
+                return terminator
+            return f"Elem(node={''.join(map(chr, label[:-1]))}, children={terminator})"
+        children = sorted(self._iter_children(node), key=self._child_order)
+        if node == _ROOT:  # empty suffixes are not shown
+            children = [child for child in children if self._text[self._starts[child]] >= 0]
+        children = ", ".join(self._to_str(child) for child in children)
+        label = "".join(map(chr, label)) if node != _ROOT else None
+        return f"Elem(node={label}, children={children})"
+
+    def _child_order(self, node: int):
+        symbol = self._text[self._starts[node]]
+        return (1, -symbol, "") if symbol < 0 else (0, 0, "".join(chr(s) for s in self._label(node) if s >= 0))
 
     def __str__(self):
-        return str(self._tree)
+        return self._to_str(_ROOT)
 
     def __repr__(self):
-        return repr(self._tree)
+        return str(self)
@@ -1,7 +1,7 @@
 import pytest
 import random
 
-from aug.experemental.SuffixTree import SuffixTree, _TreeElem, SuffixTreeBuildingMethod
+from aug.experemental.SuffixTree import SuffixTree, SuffixTreeBuildingMethod
 
 
 @pytest.fixture(scope='module')
@@ -11,19 +11,12 @@ def seed():
     return random.seed(seed)
 
 
-def test_extract_general_prefix():
-    tree = _TreeElem("a")
-    assert 1 == tree.extract_general_prefix(_TreeElem("anna"))
-    tree = _TreeElem("na")
-    assert 1 == tree.extract_general_prefix(_TreeElem("nna"))
-
-
 def test_one_string1():
     expected = "Elem(node=None, children=" \
                "Elem(node=a, children=Elem(node=na, children=Elem(node=na, children=Elem(node=1, children=)), Elem(node=1, children=)), Elem(node=1, children=)), " \
                "Elem(node=banana, children=Elem(node=1, children=)), " \
                "Elem(node=na, children=Elem(node=na, children=Elem(node=1, children=)), Elem(node=1, children=)))"
-    assert expected == SuffixTree("banana", method=SuffixTreeBuildingMethod.naive).to_graphviz()
+    assert expected == str(SuffixTree("banana", method=SuffixTreeBuildingMethod.naive))
 
 
 def test_one_string2():
@@ -77,3 +70,64 @@ def test_three_string():
                "Elem(node=b, children=Elem(node=a, children=Elem(node=b, children=Elem(node=a, children=Elem(node=2, children=)), " \
                     "Elem(node=3, children=)), Elem(node=1, children=), Elem(node=2, children=)), Elem(node=ba, children=Elem(node=1, children=)), Elem(node=3, children=)))"
     assert expected == str(SuffixTree(["abba", "baba", "abab"], method=SuffixTreeBuildingMethod.naive))
+
+
+@pytest.mark.parametrize("strings", [["banana"], ["anna"], ["aaaa"], ["banana", "ananas"], ["abba", "baba", "abab"],
+                                     ["mississippi", "missouri"]])
+def test_ukkonen_as_naive(strings):
+    assert str(SuffixTree(strings, method=SuffixTreeBuildingMethod.naive)) == str(SuffixTree(strings))
+
+
+def test_ukkonen_as_naive_random(seed):
+    strings = ["".join(random.choices("ACG", k=random.randint(1, 60))) for _ in range(random.randint(1, 4))]
+    assert str(SuffixTree(strings, method=SuffixTreeBuildingMethod.naive)) == str(SuffixTree(strings))
+
+
+def test_add():
+    tree = SuffixTree("banana")
+    tree.add("ananas")
+    assert str(SuffixTree(["banana", "ananas"])) == str(tree)
+
+
+@pytest.mark.parametrize("strings, expected", [
+    [["abba", "baba"], ["ab", "ba"]],
+    [["banana", "ban"], ["ban"]],
+    [["baobab", "bamboo", "banana"], ["ba"]],
+    [["ananas", "ban", "banana"], ["an"]],
+    [["abc", "xyz"], []],
+    [["banana"], ["banana"]],
+    [["banana", "banana"], ["banana"]],
+    [["a"], ["a"]],
+    [[""], []],
+])
+def test_make_common_tree(strings, expected):
+    assert expected == SuffixTree(strings).make_common_tree()
+    assert expected == SuffixTree(strings, method=SuffixTreeBuildingMethod.naive).make_common_tree()
+
+
+def _naive_common_substrings(strings):
+    substrings = {strings[0][i:j] for i in range(len(strings[0])) for j in range(i + 1, len(strings[0]) + 1)}
+    common = [substring for substring in substrings if all(substring in string for string in strings[1:])]
+    length = max(map(len, common), default=0)
+    return sorted(substring for substring in common if len(substring) == length)
+
+
+def test_make_common_tree_random(seed):
+    for _ in range(20):
+        strings = ["".join(random.choices("AC", k=random.randint(1, 20))) for _ in range(random.randint(1, 3))]
+        expected = _naive_common_substrings(strings)
+        assert expected == SuffixTree(strings).make_common_tree()
+        assert expected == SuffixTree(strings, method=SuffixTreeBuildingMethod.naive).make_common_tree()
+
+
+def test_contains(seed):
+    string = "".join(random.choices("ACG", k=100))
+    tree = SuffixTree(string)
+    for _ in range(20):
+        substring = "".join(random.choices("ACG", k=random.randint(1, 6)))
+        assert (substring in string) == (substring in tree)
+
+
+def test_wrong_method():
+    with pytest.raises(ValueError):
+        SuffixTree("banana", method="suffix array")
@@ -0,0 +1,51 @@
+import collections
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Union
+
+
+def _map_items(function: Callable, items: List) -> List:
+    return [function(item) for item in items]
+
+
+def parallel_map(function: Callable, iterable: Iterable, n_jobs: Union[int, None] = None,
+                 chunksize: int = 1) -> Iterator:
+    """ The same as map(function, iterable), but the function is called in n_jobs worker processes.
+    Results are returned in the order of iterable. Function and items should be picklable,
+        so use module level functions (or functools.partial of them).
+    Unlike ProcessPoolExecutor.map the iterable is consumed lazily: at most 2 * n_jobs tasks are in flight,
+        the next ones are submitted as results are returned, so e.g. records of a big file are never all in memory.
+    :param function: function to call for every item
+    :param iterable: items to process
+    :param n_jobs: number of processes, None for the number of processors, 1 to work in the current process
+    :param chunksize: number of items sent to a worker at once, bigger values decrease overhead for small tasks
+    :return: iterator over results
+    >>> list(parallel_map(abs, [-1, 2, -3], n_jobs=1))
+    [1, 2, 3]
+    """
+    if n_jobs == 1:
+        yield from map(function, iterable)
+        return
+    max_in_flight = 2 * (n_jobs or os.cpu_count() or 1)
+    pending = collections.deque()
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        for items in chunks(iterable, chunksize):
+            if len(pending) == max_in_flight:
+                yield from pending.popleft().result()
+            pending.append(executor.submit(_map_items, function, items))
+        while pending:
+            yield from pending.popleft().result()
+
+
+def chunks(iterable: Iterable, size: int) -> Iterator[List]:
+    """ Split iterable into lists of size items (the last one can be shorter), e.g. to send work to processes by parts.
+    >>> list(chunks(range(5), 2))
+    [[0, 1], [2, 3], [4]]
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
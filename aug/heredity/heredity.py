@@ -1,13 +1,16 @@
 import copy
 import heapq
 import itertools
-from typing import Dict, Tuple
+from typing import Dict, Iterable, List, Tuple, Union
 
 import numpy as np
 from scipy.stats import chi2, binom
 
 from aug.heredity.Phenotype import PhenotypeHeredityTable
-from aug.seq.seq import codon_iter, dna_codon_table, protein_dna_codon_table, hamming_distance
+from aug.helpers.parallel import chunks, parallel_map
+from aug.seq.codon_usage import CODON_FAMILIES, CODONS
+from aug.seq.kmers import INVALID_KMER, kmer_codes
+from aug.seq.seq import dna_codon_table, protein_dna_codon_table, hamming_distance
 
 
 def n_expected_dominant_phenotype(n_parents, n_children=1):
@@ -94,34 +97,11 @@ def test_wright_fisher(n, initial_part, final_part) -> float:
 class SelectionBalanceMethods:
     @staticmethod
     def dn_ds(seq1, seq2):
-        missense_expected = 0
-        sym_expected = 0
-        missense_actual = 0
-        sym_actual = 0
-        for codon1, codon2 in zip(codon_iter(seq1), codon_iter(seq2)):
-            protein1 = dna_codon_table[codon1]
-            protein2 = dna_codon_table[codon2]
-            n = SelectionBalanceMethods._n_adj_of_symmetric_mutations(codon1, protein1)
-            missense_expected += n
-            sym_expected += 3 - n
-            missense_actual, sym_actual = \
-                SelectionBalanceMethods._change_actual_rate(missense_actual, sym_actual, codon1, codon2,
-                                                            protein1, protein2)
-        pn = missense_actual / missense_expected
-        ps = sym_actual / sym_expected
-        d = np.array((pn, ps))
-        d = - 3 / 4 * np.log(1 - 4 / 3 * d)
-        return d[0]/d[1]
-
-
-    @staticmethod
-    def _change_actual_rate(missense_actual, sym_actual, codon1, codon2, protein1, protein2):
-        if codon1 != codon2:
-            if protein1 != protein2:
-                missense_actual += 1
-            else:
-                sym_actual += 1
-        return missense_actual, sym_actual
+        """ dN/dS ratio of two codon aligned coding sequences with the Jukes-Cantor correction.
+            Expected sites are taken from NONSYNONYMOUS_SITES and SYNONYMOUS_SITES by integer codes of codons,
+            see dn_ds_pairs for many pairs.
+        """
+        return _dn_ds_chunk([(seq1, seq2)])[0]
 
     @staticmethod
     def _n_adj_of_symmetric_mutations(codon, protein):
@@ -132,6 +112,54 @@ class SelectionBalanceMethods:
         return n
 
 
+# expected numbers of nonsynonymous and synonymous sites of every codon code (see aug.seq.codon_usage.CODONS)
+NONSYNONYMOUS_SITES = np.array([SelectionBalanceMethods._n_adj_of_symmetric_mutations(codon, dna_codon_table[codon])
+                                for codon in CODONS])
+SYNONYMOUS_SITES = 3 - NONSYNONYMOUS_SITES
+
+
+def _codon_pair_codes(seq1: str, seq2: str) -> Tuple[np.ndarray, np.ndarray]:
+    """ Integer codes of aligned codons of two coding sequences, the longer sequence is truncated like by zip """
+    if len(seq1) % 3 or len(seq2) % 3:
+        raise ValueError("the sequence length are not devided by 3")
+    n = min(len(seq1), len(seq2)) // 3
+    codes1, codes2 = kmer_codes(seq1, 3)[:3 * n:3], kmer_codes(seq2, 3)[:3 * n:3]
+    if (codes1 == INVALID_KMER).any() or (codes2 == INVALID_KMER).any():
+        raise ValueError("Sequences should contain only A, C, G and T.")
+    return codes1.astype(np.int64), codes2.astype(np.int64)
+
+
+def _dn_ds_chunk(pairs: List[Tuple[str, str]]) -> np.ndarray:
+    """ dN/dS of every pair: codons of all pairs are concatenated and sums over pairs are made by np.bincount """
+    codes1, codes2 = zip(*(_codon_pair_codes(seq1, seq2) for seq1, seq2 in pairs))
+    pair_of_codon = np.repeat(np.arange(len(pairs)), [len(codes) for codes in codes1])
+    codes1, codes2 = np.concatenate(codes1), np.concatenate(codes2)
+    changed = codes1 != codes2
+    missense = changed & (CODON_FAMILIES[codes1] != CODON_FAMILIES[codes2])
+    missense_expected, sym_expected, missense_actual, sym_actual = \
+        (np.bincount(pair_of_codon, weights=weights, minlength=len(pairs))
+         for weights in (NONSYNONYMOUS_SITES[codes1], SYNONYMOUS_SITES[codes1], missense, changed & ~missense))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d = np.array((missense_actual / missense_expected, sym_actual / sym_expected))
+        d = - 3 / 4 * np.log(1 - 4 / 3 * d)
+        return d[0] / d[1]
+
+
+def dn_ds_pairs(pairs: Iterable[Tuple[str, str]], chunk_size: int = 1024,
+                n_jobs: Union[int, None] = 1) -> np.ndarray:
+    """ dN/dS of many pairs of codon aligned sequences (e.g. orthologous genes) like SelectionBalanceMethods.dn_ds.
+        Pairs are processed by chunks of chunk_size pairs in n_jobs processes.
+    :param pairs: pairs of coding sequences
+    :param chunk_size: number of pairs processed at once
+    :param n_jobs: number of processes, None for the number of processors
+    :return: float array of dN/dS of every pair, NaN if it's undefined (e.g. there are no substitutions)
+    >>> pairs = [("ATTAGTCGTTCATCC", "ATTAGACGTTCCTCC"), ("GCTGGTCTGAAATTTGAA", "GCCGGTCTGAGATTTGAA")]
+    >>> dn_ds_pairs(pairs).round(3).tolist()
+    [0.319, 0.279]
+    """
+    return np.concatenate([np.zeros(0)] + list(parallel_map(_dn_ds_chunk, chunks(pairs, chunk_size), n_jobs=n_jobs)))
+
+
 def selection_balance(seq1, seq2, method=SelectionBalanceMethods.dn_ds):
     """ Check the neutrality of evolution
 
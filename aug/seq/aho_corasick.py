@@ -0,0 +1,98 @@
+from collections import deque
+from typing import Iterator, List, Tuple
+
+from aug.data.fasta import fasta_file_iter
+from aug.seq.encoding import FORWARD_STRAND, REVERSE_STRAND
+from aug.seq.seq import reverse_complement
+
+
+class AhoCorasick:
+    """ Automaton for searching a set of motifs in one pass over the sequence.
+        https://en.wikipedia.org/wiki/Aho%E2%80%93Corasick_algorithm
+    The automaton is built once from the motifs and can be reused for any number of sequences.
+        Only plain lists, dicts and tuples are stored, so it can be pickled and sent to worker processes.
+    Every hit is a tuple (position, motif_id, strand), where motif_id is an index of the motif in motifs and
+        strand is "+" for the motif itself or "-" for its reverse complement. Overlapping hits are reported.
+    >>> automaton = AhoCorasick(["GAATTC", "ATT", "TT"])
+    >>> list(automaton.search("AGAATTCTT"))
+    [(3, 1, '+'), (4, 2, '+'), (1, 0, '+'), (7, 2, '+')]
+    >>> automaton = AhoCorasick(["AAG"], both_strands=True)
+    >>> list(automaton.search("AAGCTT", zero_based=False))
+    [(1, 0, '+'), (4, 0, '-')]
+    """
+
+    def __init__(self, motifs: List[str], both_strands: bool = False):
+        """
+        :param motifs: motifs to search, should be non empty strings
+        :param both_strands: if True reverse complement of every motif will be searched too
+        """
+        self.motifs = list(motifs)
+        self.both_strands = both_strands
+        self._goto = [{}]
+        self._outputs = [[]]
+        for motif_id, motif in enumerate(self.motifs):
+            if not motif:
+                raise ValueError("Motifs should be non empty strings.")
+            self._add(motif, (motif_id, FORWARD_STRAND, len(motif)))
+            if both_strands:
+                complement = reverse_complement(motif)
+                if complement != motif:  # reverse palindromes would be reported twice
+                    self._add(complement, (motif_id, REVERSE_STRAND, len(motif)))
+        self._build()
+
+    def _add(self, motif: str, output: Tuple[int, str, int]):
+        state = 0
+        for letter in motif:
+            next_state = self._goto[state].get(letter)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][letter] = next_state
+                self._goto.append({})
+                self._outputs.append([])
+            state = next_state
+        self._outputs[state].append(output)
+
+    def _build(self):
+        """ Compute failure links with BFS and turn the trie into a full DFA,
+            so the search makes exactly one transition per letter.
+        """
+        alphabet = {letter for transitions in self._goto for letter in transitions}
+        failure = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            self._outputs[state].extend(self._outputs[failure[state]])
+            for letter in alphabet:
+                next_state = self._goto[state].get(letter)
+                if next_state is not None:
+                    failure[next_state] = self._goto[failure[state]].get(letter, 0)
+                    queue.append(next_state)
+                else:
+                    fallback = self._goto[failure[state]].get(letter, 0)
+                    if fallback:
+                        self._goto[state][letter] = fallback
+
+    def search(self, sequence: str, zero_based: bool = True) -> Iterator[Tuple[int, int, str]]:
+        """ Search all motifs in the sequence.
+        :param sequence: the string to search in
+        :param zero_based: if False will return indexes starting with 1 instead of 0.
+        :return: generator of (position, motif_id, strand) in the order of hits ends
+        """
+        shift = 1 if zero_based else 2
+        goto = self._goto
+        outputs = self._outputs
+        state = 0
+        for index, letter in enumerate(sequence):
+            state = goto[state].get(letter, 0)
+            for motif_id, strand, length in outputs[state]:
+                yield index - length + shift, motif_id, strand
+
+    def search_fasta(self, fasta_file_path: str, zero_based: bool = True) -> Iterator[Tuple[str, int, int, str]]:
+        """ Search all motifs in every record of fasta file.
+        :param fasta_file_path: path to file with sequences in fasta format
+        :param zero_based: if False will return indexes starting with 1 instead of 0.
+        :return: generator of (record_id, position, motif_id, strand)
+        """
+        for id, sequence in fasta_file_iter(fasta_file_path):
+            for hit in self.search(sequence, zero_based):
+                yield (id, ) + hit
@@ -0,0 +1,74 @@
+from typing import List, Tuple, Union
+
+import numpy as np
+
+from aug.seq.encoding import FORWARD_STRAND, REVERSE_STRAND
+from aug.seq.seq import reverse_complement, _helper_for_non_zero_based
+
+
+def _to_bytes(sequence: Union[str, bytes]) -> np.ndarray:
+    return np.frombuffer(sequence.encode("ascii") if isinstance(sequence, str) else sequence, dtype=np.uint8)
+
+
+def sliding_hamming_distances(dna: Union[str, bytes], motif: Union[str, bytes], start: int = 0,
+                              end: Union[int, None] = None) -> np.ndarray:
+    """ Hamming distance between the motif and every window of the dna of the same length.
+        Windows are never copied: mismatches are added for every letter of the motif over a strided view of the dna,
+        so it takes len(motif) vectorized passes.
+    :param dna: the string to search in
+    :param motif: the pattern
+    :param start: the first window
+    :param end: the window after the last one, all windows by default
+    :return: array of distances for windows from start to end
+    >>> sliding_hamming_distances("GATTACA", "TA").tolist()
+    [1, 2, 1, 0, 2, 1]
+    """
+    text, pattern = _to_bytes(dna), _to_bytes(motif)
+    n_windows = max(len(text) - len(pattern) + 1, 0)
+    end = n_windows if end is None else min(end, n_windows)
+    result = np.zeros(max(end - start, 0), dtype=np.uint8 if len(pattern) < 256 else np.int64)
+    for j, letter in enumerate(pattern):
+        result += text[start + j:end + j] != letter
+    return result
+
+
+def _approximate_positions(dna: bytes, motif: str, max_mismatches: int, block_size: int) -> List[int]:
+    """ Positions of windows with at most max_mismatches, the dna is scanned in blocks of windows,
+        so the temporary arrays don't depend on the length of the dna.
+    """
+    result = []
+    for start in range(0, max(len(dna) - len(motif) + 1, 0), block_size):
+        distances = sliding_hamming_distances(dna, motif, start, start + block_size)
+        result.extend((np.flatnonzero(distances <= max_mismatches) + start).tolist())
+    return result
+
+
+def find_approximate_motif(dna: str, motif: str, max_mismatches: int, zero_based: bool = True,
+                           both_strands: bool = False,
+                           block_size: int = 1 << 20) -> Union[List[int], List[Tuple[int, str]]]:
+    """ Find all occurrences of the motif in the dna with at most max_mismatches mismatches (Hamming distance).
+        The dna is scanned once by sliding_hamming_distances in blocks of block_size windows.
+    :param dna: the string to search in
+    :param motif: the substring to search
+    :param max_mismatches: maximal number of mismatches
+    :param zero_based: if False will return indexes starting with 1 instead of 0.
+    :param both_strands: if True the reverse complement of the motif is searched too
+    :param block_size: number of windows processed at once
+    :return: sorted indexes of all approximate occurrences like find_motif,
+        or sorted (index, strand) pairs if both_strands, strand is "+" for the motif or "-" for its reverse complement
+    >>> find_approximate_motif("CGCCCGAATCCAGAACGCATTCCCATATTTCGGGACCACTGGCCTCCACGGTACGGACGTCAATCAAAT", "ATTCTGGA", 3)
+    [6, 7, 26, 27]
+    >>> find_approximate_motif("AAGCTTA", "AAG", 1, zero_based=False, both_strands=True)
+    [(1, '+'), (4, '-')]
+    """
+    if not motif:
+        raise ValueError("Motif should be non empty string.")
+    dna = dna.encode("ascii")
+    forward = _helper_for_non_zero_based(_approximate_positions(dna, motif, max_mismatches, block_size), zero_based)
+    if not both_strands:
+        return forward
+    complement = reverse_complement(motif)
+    reverse = [] if complement == motif else \
+        _helper_for_non_zero_based(_approximate_positions(dna, complement, max_mismatches, block_size), zero_based)
+    return sorted([(position, FORWARD_STRAND) for position in forward]
+                  + [(position, REVERSE_STRAND) for position in reverse])
@@ -0,0 +1,114 @@
+from typing import List, Tuple, Union
+
+import numpy as np
+
+from aug.data.fasta import fasta_file_iter
+from aug.helpers.parallel import chunks, parallel_map
+from aug.seq.kmers import INVALID_KMER, decode_kmer, kmer_codes
+from aug.seq.seq import STOP_CODON, protein_dna_codon_table
+
+N_CODONS = 64
+CODONS = [decode_kmer(code, 3) for code in range(N_CODONS)]  # codon of every code, in lexicographical order
+
+
+def _synonymous_families() -> Tuple[list, np.ndarray]:
+    """ Amino acids (and STOP_CODON) and the family index of every codon code """
+    amino_acids = list(protein_dna_codon_table)
+    families = np.zeros(N_CODONS, dtype=np.int64)
+    for family, amino_acid in enumerate(amino_acids):
+        for codon in protein_dna_codon_table[amino_acid]:
+            families[CODONS.index(codon)] = family
+    return amino_acids, families
+
+
+AMINO_ACIDS, CODON_FAMILIES = _synonymous_families()
+_FAMILY_SIZES = np.bincount(CODON_FAMILIES)
+# codons of stop and single codon families (M, W) don't say anything about codon bias
+_INFORMATIVE = (_FAMILY_SIZES[CODON_FAMILIES] > 1) & \
+               np.array([AMINO_ACIDS[family] is not STOP_CODON for family in CODON_FAMILIES.tolist()])
+
+
+def codon_codes(dna: str) -> np.ndarray:
+    """ Integer codes (0..63, see CODONS) of codons of the coding sequence in the first frame,
+        codons with ambiguous letters and the incomplete last codon are skipped.
+    >>> codon_codes("ATGGCNTAA").tolist()
+    [14, 48]
+    """
+    codes = kmer_codes(dna, 3)[::3]
+    return codes[codes != INVALID_KMER].astype(np.int64)
+
+
+def codon_counts(dna: str) -> np.ndarray:
+    """ Codon usage of one coding sequence as 64 counts ordered by codon codes. """
+    return np.bincount(codon_codes(dna), minlength=N_CODONS)
+
+
+def _chunk_codon_counts(records: List[Tuple[str, str]]) -> Tuple[List[str], np.ndarray]:
+    counts = np.array([codon_counts(dna) for _, dna in records], dtype=np.int64).reshape(len(records), N_CODONS)
+    return [id for id, _ in records], counts
+
+
+def codon_usage_fasta(fasta_file_path: str, chunk_size: int = 256,
+                      n_jobs: Union[int, None] = 1) -> Tuple[List[str], np.ndarray]:
+    """ Codon usage of every coding sequence (e.g. all CDS of a genome) of fasta file.
+        Records are read by chunks of chunk_size records and counted in n_jobs processes.
+    :param fasta_file_path: path to file with coding sequences in fasta format
+    :param chunk_size: number of records processed at once
+    :param n_jobs: number of processes, None for the number of processors
+    :return: (ids of records, (number of records x 64) int64 array of codon counts)
+    """
+    ids = []
+    counts = [np.zeros((0, N_CODONS), dtype=np.int64)]
+    for chunk_ids, chunk_counts in parallel_map(_chunk_codon_counts, chunks(fasta_file_iter(fasta_file_path),
+                                                                            chunk_size), n_jobs=n_jobs):
+        ids.extend(chunk_ids)
+        counts.append(chunk_counts)
+    return ids, np.concatenate(counts)
+
+
+def rscu(counts: np.ndarray) -> np.ndarray:
+    """ Relative synonymous codon usage: the count of the codon divided by the mean count of the codons
+        of its amino acid, 1 means no bias. Codons of amino acids which are absent have RSCU 0.
+    :param counts: 64 codon counts or (n x 64) array of them
+    :return: float array of the same shape
+    >>> values = rscu(codon_counts("GCTGCTGCCTGG"))
+    >>> [(CODONS[code], value) for code, value in enumerate(values.tolist()) if value]
+    [('GCC', 1.3333333333333333), ('GCT', 2.6666666666666665), ('TGG', 1.0)]
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    family_sums = np.zeros(counts.shape[:-1] + (len(_FAMILY_SIZES),))
+    np.add.at(family_sums, (..., CODON_FAMILIES), counts)
+    expected = family_sums[..., CODON_FAMILIES] / _FAMILY_SIZES[CODON_FAMILIES]
+    return np.divide(counts, expected, out=np.zeros_like(counts), where=expected > 0)
+
+
+def relative_adaptiveness(reference_counts: np.ndarray, pseudocount: float = 0.5) -> np.ndarray:
+    """ Weights of codons for CAI: RSCU of the codon divided by the largest RSCU of its amino acid
+        in the reference set (e.g. highly expressed genes). https://doi.org/10.1093/nar/15.3.1281
+    :param reference_counts: 64 codon counts (or (n x 64) array, it's summed over genes)
+    :param pseudocount: replaces zero counts, so codons absent in the reference set have a small weight
+    :return: 64 weights
+    """
+    counts = np.asarray(reference_counts, dtype=np.float64).reshape(-1, N_CODONS).sum(axis=0)
+    counts = np.where(counts > 0, counts, pseudocount)
+    values = rscu(counts)
+    family_max = np.zeros(len(_FAMILY_SIZES))
+    np.maximum.at(family_max, CODON_FAMILIES, values)
+    return values / family_max[CODON_FAMILIES]
+
+
+def codon_adaptation_index(counts: np.ndarray, weights: np.ndarray) -> Union[float, np.ndarray]:
+    """ Codon adaptation index: the geometric mean of weights of all codons of the gene,
+        codons of stop and single codon amino acids (M, W) are skipped.
+    :param counts: 64 codon counts of the gene or (n x 64) array of counts of many genes
+    :param weights: weights made by relative_adaptiveness
+    :return: CAI of every gene, NaN for genes without informative codons
+    >>> weights = relative_adaptiveness(codon_counts("GCTGCTGCCAAA"))
+    >>> round(codon_adaptation_index(codon_counts("GCTGCCAAG"), weights), 4)
+    0.63
+    """
+    counts = np.asarray(counts, dtype=np.float64) * _INFORMATIVE
+    total = counts.sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = np.exp((counts * np.log(weights)).sum(axis=-1) / total)
+    return float(result) if np.ndim(result) == 0 else result
@@ -0,0 +1,170 @@
+from typing import Iterable, Iterator, Tuple, Union
+
+import numpy as np
+
+from aug.data.fasta import fasta, fasta_file_iter
+from aug.seq.encoding import decode_dna
+from aug.seq.kmers import count_kmer_codes, decode_kmer, reverse_complement_code, _check_k
+
+_NO_NODE = -1
+
+
+class DeBruijnGraph:
+    """ Node-centric de Bruijn graph: nodes are distinct k-mers, there is an edge from x to y
+        if the suffix of x of length k - 1 is the prefix of y.
+    K-mers are stored as uint64 codes (see aug.seq.kmers) in a sorted array, so neighbours are found by binary search
+        and edges are never stored explicitly. Non-branching paths are compacted into unitigs by pointer jumping
+        over numpy arrays, which takes O(n log(unitig length)) vectorized steps.
+    For reads from both strands use both_strands=True: reverse complements of all k-mers are added,
+        so the graph is symmetric and only one unitig of every pair of reverse complement unitigs is reported.
+    >>> graph = DeBruijnGraph.from_sequences(["ACGTTGCA", "TTGCATGGA"], k=4)
+    >>> len(graph)
+    9
+    >>> list(graph.unitigs())
+    ['ACGTTGCATGGA']
+    """
+
+    def __init__(self, codes: np.ndarray, k: int, counts: Union[np.ndarray, None] = None, both_strands: bool = False):
+        """
+        :param codes: sorted array of distinct k-mer codes
+        :param k: length of k-mers
+        :param counts: number of occurrences of every k-mer, 1 by default
+        :param both_strands: if True the k-mers are supposed to be closed under reverse complement
+        """
+        _check_k(k)
+        self.k = k
+        self.codes = np.asarray(codes, dtype=np.uint64)
+        self.counts = np.ones(len(self.codes), dtype=np.uint32) if counts is None else np.asarray(counts)
+        self.both_strands = both_strands
+
+    @classmethod
+    def from_sequences(cls, sequences: Iterable[str], k: int, min_count: int = 1,
+                       both_strands: bool = False) -> "DeBruijnGraph":
+        """ Build the graph from k-mers of the sequences.
+        :param sequences: dna strings, e.g. reads
+        :param k: length of k-mers
+        :param min_count: k-mers which occur less times (e.g. with sequencing errors) are skipped
+        :param both_strands: if True the reverse complement of every k-mer is added
+        """
+        codes, counts = count_kmer_codes(sequences, k, canonical=both_strands)
+        solid = counts >= min_count
+        codes, counts = codes[solid], counts[solid]
+        if both_strands:
+            reverse = reverse_complement_code(codes, k)
+            different = reverse != codes
+            codes = np.concatenate((codes, reverse[different]))
+            counts = np.concatenate((counts, counts[different]))
+            order = np.argsort(codes)
+            codes, counts = codes[order], counts[order]
+        return cls(codes, k, counts, both_strands)
+
+    @classmethod
+    def from_fasta(cls, fasta_file_path: str, k: int, **kwargs) -> "DeBruijnGraph":
+        """ Build the graph from all records of fasta file, see from_sequences for the parameters. """
+        return cls.from_sequences((dna for _, dna in fasta_file_iter(fasta_file_path)), k, **kwargs)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def _find(self, codes: np.ndarray) -> np.ndarray:
+        """ Indexes of the codes in the graph, _NO_NODE for absent ones """
+        indexes = np.searchsorted(self.codes, codes)
+        indexes[indexes == len(self.codes)] = 0
+        found = self.codes[indexes] == codes if len(self.codes) else np.zeros(len(codes), dtype=bool)
+        return np.where(found, indexes, _NO_NODE)
+
+    def _compactable_edges(self) -> Tuple[np.ndarray, np.ndarray]:
+        """ next[i] and previous[i] are the neighbours of the node i in the same unitig or _NO_NODE.
+            The edge x -> y is in a unitig if it's the only edge from x and the only edge to y.
+        """
+        n = len(self.codes)
+        mask = np.uint64((1 << (2 * self.k)) - 1)
+        out_degree = np.zeros(n, dtype=np.int8)
+        in_degree = np.zeros(n, dtype=np.int8)
+        successor = np.full(n, _NO_NODE, dtype=np.int64)
+        for base in range(4):
+            found = self._find(((self.codes << np.uint64(2)) | np.uint64(base)) & mask)
+            has_edge = found != _NO_NODE
+            out_degree += has_edge
+            successor[has_edge] = found[has_edge]
+            np.add.at(in_degree, found[has_edge], 1)
+        nodes = np.flatnonzero((out_degree == 1) & (successor != np.arange(n)))
+        nodes = nodes[in_degree[successor[nodes]] == 1]
+        next = np.full(n, _NO_NODE, dtype=np.int64)
+        previous = np.full(n, _NO_NODE, dtype=np.int64)
+        next[nodes] = successor[nodes]
+        previous[successor[nodes]] = nodes
+        return next, previous
+
+    @staticmethod
+    def _rank(next: np.ndarray, previous: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """ Find the first node of the unitig and the position in the unitig for every node.
+            Pointers to the previous node are doubled until they reach the first node, the distance is summed
+            on the way. Cycles never reach a first node, they are cut at their smallest node and walked one by one.
+        """
+        n = len(next)
+        indexes = np.arange(n)
+        jump = np.where(previous != _NO_NODE, previous, indexes)
+        rank = (previous != _NO_NODE).astype(np.int64)
+        lowest = indexes.copy()
+        steps = 1
+        n_active = n + 1
+        while True:
+            active = np.flatnonzero(jump[jump] != jump)
+            # a path node is active while it's further than steps from the first node, so if no node became
+            # inactive only cycles are left, they are done when the pointers passed the whole cycle
+            if not len(active) or len(active) == n_active and steps >= n_active:
+                break
+            n_active = len(active)
+            jumped = jump[active]
+            rank[active] += rank[jumped]
+            lowest[active] = np.minimum(lowest[active], lowest[jumped])
+            jump[active] = jump[jumped]
+            steps *= 2
+        in_cycle = previous[jump] != _NO_NODE
+        for start in np.flatnonzero(in_cycle & (lowest == indexes)).tolist():
+            node, position = start, 0
+            while True:
+                jump[node] = start
+                rank[node] = position
+                position += 1
+                node = next[node]
+                if node == start:
+                    break
+        return jump, rank
+
+    def _unitig_nodes(self) -> Tuple[np.ndarray, np.ndarray]:
+        """ returns (nodes ordered by unitigs, start indexes of unitigs in the order) """
+        next, previous = self._compactable_edges()
+        first, rank = self._rank(next, previous)
+        order = np.lexsort((rank, first))
+        first = first[order]
+        starts = np.flatnonzero(np.concatenate(([True], first[1:] != first[:-1]))) if len(first) else first
+        return order, starts
+
+    def unitigs(self, with_counts: bool = False) -> Iterator[Union[str, Tuple[str, float]]]:
+        """ Compact all maximal non-branching paths of the graph into unitigs.
+        :param with_counts: if True the mean count of the k-mers is returned with every unitig
+        :return: generator of unitigs or (unitig, mean count) pairs
+        """
+        order, starts = self._unitig_nodes()
+        if not len(order):
+            return
+        codes = self.codes[order]
+        ends = np.append(starts[1:], len(order))
+        keep = np.ones(len(starts), dtype=bool)
+        if self.both_strands:
+            # the reverse complement unitig has reverse complement k-mers, keep the one with the smallest k-mer
+            keep = np.minimum.reduceat(codes, starts) <= np.minimum.reduceat(reverse_complement_code(codes, self.k),
+                                                                             starts)
+        mean_counts = np.add.reduceat(self.counts[order].astype(np.float64), starts) / (ends - starts)
+        last_letters = (codes & np.uint64(3)).astype(np.uint8)
+        for start, end, mean_count in zip(starts[keep].tolist(), ends[keep].tolist(), mean_counts[keep].tolist()):
+            unitig = decode_kmer(int(codes[start]), self.k) + decode_dna(last_letters[start + 1:end])
+            yield (unitig, mean_count) if with_counts else unitig
+
+    def to_fasta(self, path: str):
+        """ Write all unitigs to the fasta file, ids contain the length and the mean count of k-mers. """
+        with open(path, "w") as file:
+            for i, (unitig, mean_count) in enumerate(self.unitigs(with_counts=True)):
+                file.write(fasta(f"unitig_{i} length={len(unitig)} mean_count={mean_count:.1f}", unitig))
@@ -0,0 +1,105 @@
+from typing import Iterator, Tuple, Union
+
+import numpy as np
+
+from aug.seq.encoding import encode_dna, TRANSITIONS
+
+
+def _to_codes(dna: Union[str, np.ndarray]) -> np.ndarray:
+    return encode_dna(dna) if isinstance(dna, str) else np.asarray(dna, dtype=np.uint8)
+
+
+def _blocks(n_rows: int, row_size: int, block_size: int) -> Iterator[slice]:
+    """ Slices of rows so every block has about block_size cells """
+    step = max(block_size // max(row_size, 1), 1)
+    for start in range(0, n_rows, step):
+        yield slice(start, start + step)
+
+
+def _check_lengths(query: np.ndarray, matrix: np.ndarray):
+    if query.shape[-1] != matrix.shape[-1]:
+        raise ValueError("All sequences should have the same length.")
+
+
+def hamming_distances(query: Union[str, np.ndarray], matrix: np.ndarray, block_size: int = 1 << 24) -> np.ndarray:
+    """ Hamming distances from one sequence to every row of the matrix (one vs many).
+        Letters are compared by codes of aug.seq.encoding.encode_dna, so all ambiguous letters are equal.
+    :param query: dna string or its codes
+    :param matrix: (n x k) matrix of encoded sequences, e.g. made by aug.seq.seq.dna_matrix
+    :param block_size: number of cells compared at once
+    :return: int64 array of n distances
+    >>> from aug.seq.seq import dna_matrix
+    >>> hamming_distances("ACGT", dna_matrix(["ACGT", "AGGA", "TTTT"])).tolist()
+    [0, 2, 3]
+    """
+    query = _to_codes(query)
+    _check_lengths(query, matrix)
+    result = np.zeros(len(matrix), dtype=np.int64)
+    for rows in _blocks(len(matrix), matrix.shape[1], block_size):
+        result[rows] = np.count_nonzero(matrix[rows] != query, axis=1)
+    return result
+
+
+def pairwise_hamming_distances(matrix: np.ndarray, other: Union[np.ndarray, None] = None,
+                               block_size: int = 1 << 24) -> np.ndarray:
+    """ Hamming distances between all rows of the matrix and all rows of the other matrix (many vs many).
+        Rows are compared by broadcasting blocks of rows with about block_size cells.
+    :param matrix: (n x k) matrix of encoded sequences
+    :param other: (m x k) matrix of encoded sequences, the matrix itself by default
+    :param block_size: number of cells compared at once
+    :return: (n x m) int64 matrix of distances
+    >>> from aug.seq.seq import dna_matrix
+    >>> pairwise_hamming_distances(dna_matrix(["ACGT", "AGGA", "TTTT"])).tolist()
+    [[0, 2, 3], [2, 0, 4], [3, 4, 0]]
+    """
+    other = matrix if other is None else other
+    _check_lengths(matrix, other)
+    result = np.zeros((len(matrix), len(other)), dtype=np.int64)
+    for rows in _blocks(len(matrix), other.size, block_size):
+        result[rows] = np.count_nonzero(matrix[rows, np.newaxis, :] != other[np.newaxis, :, :], axis=2)
+    return result
+
+
+def transitions_transversions(query: Union[str, np.ndarray], matrix: np.ndarray,
+                              block_size: int = 1 << 24) -> Tuple[np.ndarray, np.ndarray]:
+    """ Numbers of transitions and transversions from one sequence to every row of the matrix (one vs many),
+        like aug.seq.seq.transition_transversion. Transitions are found by TRANSITIONS lookup of code pairs
+        (purine to purine or pyrimidine to pyrimidine), all other mismatches are transversions.
+    :param query: dna string or its codes
+    :param matrix: (n x k) matrix of encoded sequences
+    :param block_size: number of cells compared at once
+    :return: (transitions, transversions) int64 arrays of length n
+    >>> from aug.seq.seq import dna_matrix
+    >>> transitions, transversions = transitions_transversions("ACGT", dna_matrix(["AAGC", "GTGA"]))
+    >>> transitions.tolist(), transversions.tolist()
+    ([1, 2], [1, 1])
+    """
+    query = _to_codes(query)
+    _check_lengths(query, matrix)
+    transitions = np.zeros(len(matrix), dtype=np.int64)
+    mismatches = np.zeros(len(matrix), dtype=np.int64)
+    for rows in _blocks(len(matrix), matrix.shape[1], block_size):
+        block = matrix[rows]
+        transitions[rows] = np.count_nonzero(TRANSITIONS[block, query], axis=1)
+        mismatches[rows] = np.count_nonzero(block != query, axis=1)
+    return transitions, mismatches - transitions
+
+
+def pairwise_transitions_transversions(matrix: np.ndarray, other: Union[np.ndarray, None] = None,
+                                       block_size: int = 1 << 24) -> Tuple[np.ndarray, np.ndarray]:
+    """ Numbers of transitions and transversions between all rows of the matrix and all rows of the other matrix
+        (many vs many), see transitions_transversions.
+    :param matrix: (n x k) matrix of encoded sequences
+    :param other: (m x k) matrix of encoded sequences, the matrix itself by default
+    :param block_size: number of cells compared at once
+    :return: (transitions, transversions) (n x m) int64 matrices
+    """
+    other = matrix if other is None else other
+    _check_lengths(matrix, other)
+    transitions = np.zeros((len(matrix), len(other)), dtype=np.int64)
+    mismatches = np.zeros((len(matrix), len(other)), dtype=np.int64)
+    for rows in _blocks(len(matrix), other.size, block_size):
+        block = matrix[rows, np.newaxis, :]
+        transitions[rows] = np.count_nonzero(TRANSITIONS[block, other[np.newaxis, :, :]], axis=2)
+        mismatches[rows] = np.count_nonzero(block != other[np.newaxis, :, :], axis=2)
+    return transitions, mismatches - transitions
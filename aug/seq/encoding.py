@@ -0,0 +1,46 @@
+import numpy as np
+
+DNA_ALPHABET = "ACGT"
+AMBIGUOUS_CODE = 4  # code of any letter except A, C, G, T (U)
+FORWARD_STRAND = "+"  # strand of hits of a motif or a k-mer itself
+REVERSE_STRAND = "-"  # strand of hits of the reverse complement
+
+_dna_codes = np.full(256, AMBIGUOUS_CODE, dtype=np.uint8)
+for _code, _letters in enumerate(("Aa", "Cc", "Gg", "TtUu")):
+    for _letter in _letters:
+        _dna_codes[ord(_letter)] = _code
+_dna_letters = np.frombuffer(b"ACGTN", dtype=np.uint8)
+
+
+def encode_dna(dna: str) -> np.ndarray:
+    """ Encode dna string as an uint8 array, codes of A, C, G, T (or U) are 0, 1, 2, 3, so they keep lexicographical
+        order and complement of code x is 3 - x. All other letters are encoded as AMBIGUOUS_CODE.
+    :param dna: dna or rna string
+    :return: uint8 array with the same length as dna
+    >>> encode_dna("ACGTNu").tolist()
+    [0, 1, 2, 3, 4, 3]
+    """
+    return _dna_codes[np.frombuffer(dna.encode("ascii", errors="replace"), dtype=np.uint8)]
+
+
+def decode_dna(codes: np.ndarray) -> str:
+    """ Decode the array made by encode_dna, ambiguous letters are decoded as N.
+    >>> decode_dna(encode_dna("ACGTX"))
+    'ACGTN'
+    """
+    return _dna_letters[np.asarray(codes)].tobytes().decode("ascii")
+
+
+def _pair_table(pairs: str) -> np.ndarray:
+    result = np.zeros((AMBIGUOUS_CODE + 1, AMBIGUOUS_CODE + 1), dtype=bool)
+    for pair in pairs.split():
+        a, b = encode_dna(pair).tolist()
+        result[a, b] = result[b, a] = True
+    return result
+
+
+# rna base pairing lookups by codes of encode_dna: WATSON_CRICK_PAIRS[a, b] is True if a and b are complementary
+WATSON_CRICK_PAIRS = _pair_table("AU CG")
+WOBBLE_PAIRS = _pair_table("AU CG GU")  # Watson-Crick pairs and G-U wobble pair
+# point mutations: TRANSITIONS[a, b] is True if a and b are both purines (A, G) or both pyrimidines (C, T)
+TRANSITIONS = _pair_table("AG CT")
@@ -0,0 +1,187 @@
+import json
+import os
+from typing import Iterable, List, Tuple, Union
+
+import numpy as np
+
+from aug.data.fasta import fasta_file_iter
+from aug.seq.encoding import encode_dna, AMBIGUOUS_CODE
+from aug.seq.suffix_array import suffix_array
+
+_SENTINEL = 0  # the end of the text, the smallest symbol
+_SEPARATOR = AMBIGUOUS_CODE + 1  # separates records and replaces ambiguous letters, never matches
+_ALPHABET_SIZE = _SEPARATOR + 1
+_BASES = range(1, _SEPARATOR)  # A, C, G, T
+_ARRAYS = ("bwt", "occ", "counts", "sampled_rows", "sampled_positions", "starts")
+
+
+class FMIndex:
+    """ FM-index of dna records for searching many short patterns (reads) against one large reference.
+        https://en.wikipedia.org/wiki/FM-index
+    Burrows–Wheeler transform of the records is stored with occurrence checkpoints for every occ_sample rows
+        and suffix array sampled for every sa_sample positions of the text, so count takes O(|pattern|)
+        and every occurrence is located in O(sa_sample) steps of LF-mapping.
+    The index can be saved to the folder and loaded with memory mapping, so it's built only once.
+    >>> index = FMIndex([("chr1", "GATTACA"), ("chr2", "TTACGATTA")])
+    >>> index.count("TTA")
+    3
+    >>> index.locate("GATTA", zero_based=False)
+    [('chr1', 1), ('chr2', 5)]
+    >>> index.search("TTAG", mismatches=1)
+    [('chr1', 2, 1), ('chr2', 0, 1)]
+    """
+
+    def __init__(self, records: Union[str, Iterable[Tuple[str, str]]], sa_sample: int = 32, occ_sample: int = 128):
+        """
+        :param records: pairs of (id, dna) e.g. from fasta_file_iter, or one dna string (its id will be None)
+        :param sa_sample: the suffix array is stored for positions divisible by sa_sample
+        :param occ_sample: occurrences of every symbol are stored for every occ_sample rows
+        """
+        records = [(None, records)] if isinstance(records, str) else records
+        self.ids = []
+        starts = []
+        parts = []
+        position = 0
+        for id, dna in records:
+            self.ids.append(id)
+            starts.append(position)
+            parts.append(self._encode(dna))
+            parts.append(np.array([_SEPARATOR], dtype=np.uint8))
+            position += len(dna) + 1
+        parts.append(np.array([_SENTINEL], dtype=np.uint8))
+        text = np.concatenate(parts)
+        self.sa_sample = sa_sample
+        self.occ_sample = occ_sample
+        self.starts = np.array(starts, dtype=np.int64)
+
+        sa = suffix_array(text)
+        self.bwt = text[sa - 1]
+        frequencies = np.bincount(text, minlength=_ALPHABET_SIZE)
+        self.counts = np.concatenate(([0], np.cumsum(frequencies)[:-1])).astype(np.int64)
+        self.occ = self._checkpoints(self.bwt, occ_sample)
+        self.sampled_rows = np.flatnonzero(sa % sa_sample == 0)
+        self.sampled_positions = sa[self.sampled_rows]
+
+    @staticmethod
+    def _checkpoints(bwt: np.ndarray, step: int) -> np.ndarray:
+        """ result[k, c] is the number of symbol c in bwt[:k * step] """
+        n_blocks = len(bwt) // step + 1
+        padded = np.full(n_blocks * step, _ALPHABET_SIZE, dtype=np.uint8)
+        padded[:len(bwt)] = bwt
+        blocks = padded.reshape(n_blocks, step)
+        result = np.zeros((n_blocks + 1, _ALPHABET_SIZE), dtype=np.int64)
+        for symbol in range(_ALPHABET_SIZE):
+            result[1:, symbol] = np.cumsum(np.count_nonzero(blocks == symbol, axis=1))
+        return result[:-1]
+
+    @classmethod
+    def from_fasta(cls, fasta_file_path: str, **kwargs) -> "FMIndex":
+        """ Build index for all records of fasta file, see FMIndex.__init__ for the parameters. """
+        return cls(fasta_file_iter(fasta_file_path), **kwargs)
+
+    def _occ(self, symbol: int, row: int) -> int:
+        """ Number of symbol in bwt[:row] """
+        block = row // self.occ_sample
+        start = block * self.occ_sample
+        return int(self.occ[block, symbol]) + int(np.count_nonzero(self.bwt[start:row] == symbol))
+
+    def _extend(self, symbol: int, lo: int, hi: int) -> Tuple[int, int]:
+        """ Rows of suffixes starting with symbol + (suffix from rows [lo, hi)) """
+        offset = int(self.counts[symbol])
+        return offset + self._occ(symbol, lo), offset + self._occ(symbol, hi)
+
+    def _rows(self, pattern: str) -> Tuple[int, int]:
+        lo, hi = 0, len(self.bwt)
+        for symbol in reversed(self._encode(pattern).tolist()):
+            if symbol == _SEPARATOR:
+                return 0, 0
+            lo, hi = self._extend(symbol, lo, hi)
+            if lo >= hi:
+                return 0, 0
+        return lo, hi
+
+    @staticmethod
+    def _encode(pattern: str) -> np.ndarray:
+        return encode_dna(pattern) + 1  # ambiguous letters become separators
+
+    def _position(self, row: int) -> int:
+        """ Text position of the suffix in row, found by LF-mapping to the nearest sampled row """
+        steps = 0
+        while True:
+            i = np.searchsorted(self.sampled_rows, row)
+            if i < len(self.sampled_rows) and self.sampled_rows[i] == row:
+                return int(self.sampled_positions[i]) + steps
+            symbol = int(self.bwt[row])
+            row = int(self.counts[symbol]) + self._occ(symbol, row)
+            steps += 1
+
+    def _to_records(self, positions: List[int], zero_based: bool) -> List[Tuple[str, int]]:
+        shift = 0 if zero_based else 1
+        owners = np.searchsorted(self.starts, positions, side="right") - 1
+        return [(self.ids[owner], position - int(self.starts[owner]) + shift)
+                for owner, position in zip(owners.tolist(), positions)]
+
+    def count(self, pattern: str) -> int:
+        """ returns number of occurrences of the pattern. """
+        lo, hi = self._rows(pattern)
+        return hi - lo
+
+    def locate(self, pattern: str, zero_based: bool = True) -> List[Tuple[str, int]]:
+        """ returns all occurrences of the pattern.
+        :param pattern: dna string to search, patterns with ambiguous letters are never found
+        :param zero_based: if False will return indexes starting with 1 instead of 0.
+        :return: sorted list of (record id, position in the record)
+        """
+        lo, hi = self._rows(pattern)
+        return self._to_records(sorted(self._position(row) for row in range(lo, hi)), zero_based)
+
+    def search(self, pattern: str, mismatches: int = 1, zero_based: bool = True) -> List[Tuple[str, int, int]]:
+        """ Find all occurrences of the pattern with at most mismatches substitutions
+            by backtracking over the backward search.
+        :param pattern: dna string to search, ambiguous letters of the pattern are always mismatches
+        :param mismatches: maximal number of mismatches
+        :param zero_based: if False will return indexes starting with 1 instead of 0.
+        :return: list of (record id, position in the record, number of mismatches) sorted by position
+        """
+        pattern = self._encode(pattern).tolist()
+        found = []
+        stack = [(len(pattern) - 1, 0, len(self.bwt), 0)]
+        while stack:
+            i, lo, hi, n_mismatches = stack.pop()
+            if i < 0:
+                found.extend((self._position(row), n_mismatches) for row in range(lo, hi))
+                continue
+            for symbol in _BASES:
+                mismatch = symbol != pattern[i]
+                if n_mismatches + mismatch > mismatches:
+                    continue
+                new_lo, new_hi = self._extend(symbol, lo, hi)
+                if new_lo < new_hi:
+                    stack.append((i - 1, new_lo, new_hi, n_mismatches + mismatch))
+        found.sort()
+        records = self._to_records([position for position, _ in found], zero_based)
+        return [(id, position, n_mismatches) for (id, position), (_, n_mismatches) in zip(records, found)]
+
+    def save(self, folder: str):
+        """ Save the index to the folder, arrays are saved in .npy format to be loaded with memory mapping. """
+        os.makedirs(folder, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(os.path.join(folder, name + ".npy"), getattr(self, name))
+        with open(os.path.join(folder, "index.json"), "w") as file:
+            json.dump({"ids": self.ids, "sa_sample": self.sa_sample, "occ_sample": self.occ_sample}, file)
+
+    @classmethod
+    def load(cls, folder: str, mmap_mode: Union[str, None] = "r") -> "FMIndex":
+        """ Load the index saved by save method.
+        :param folder: the folder with saved index
+        :param mmap_mode: see numpy.load, by default arrays are memory mapped and not read into memory
+        """
+        result = cls.__new__(cls)
+        for name in _ARRAYS:
+            setattr(result, name, np.load(os.path.join(folder, name + ".npy"), mmap_mode=mmap_mode))
+        with open(os.path.join(folder, "index.json")) as file:
+            meta = json.load(file)
+        result.ids = meta["ids"]
+        result.sa_sample = meta["sa_sample"]
+        result.occ_sample = meta["occ_sample"]
+        return result
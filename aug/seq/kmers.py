@@ -0,0 +1,230 @@
+import itertools
+from typing import Iterable, List, Tuple, Union
+
+import numpy as np
+
+from aug.seq.encoding import encode_dna, AMBIGUOUS_CODE
+
+MAX_K = 31  # 2 bits for every letter, so the k-mer fits into uint64 and INVALID_KMER is never a code
+INVALID_KMER = np.uint64(np.iinfo(np.uint64).max)  # code of windows with ambiguous letters
+
+
+def _to_codes(dna: Union[str, np.ndarray]) -> np.ndarray:
+    return encode_dna(dna) if isinstance(dna, str) else np.asarray(dna, dtype=np.uint8)
+
+
+def _check_k(k: int):
+    if not 0 < k <= MAX_K:
+        raise ValueError(f"k should be in range [1, {MAX_K}].")
+
+
+def _concatenate_windows(prefixes: np.ndarray, prefix_length: int, suffixes: np.ndarray,
+                         suffix_length: int) -> np.ndarray:
+    """ Codes of windows of length prefix_length + suffix_length from codes of all windows of the lengths """
+    n = len(prefixes) - suffix_length
+    return (prefixes[:n] << np.uint64(2 * suffix_length)) | suffixes[prefix_length:prefix_length + n]
+
+
+def kmer_codes(dna: Union[str, np.ndarray], k: int) -> np.ndarray:
+    """ Encode every k-mer (window of length k) of the dna as an integer with 2 bits for every letter.
+        Codes keep the lexicographical order of k-mers.
+        Instead of rolling the code letter by letter, codes of all windows are computed at once by doubling:
+        the code of a window of length a + b is (code of its prefix of length a) << 2b | (code of its suffix
+        of length b), so there are O(log k) vectorized steps.
+    :param dna: dna string or its codes made by encode_dna
+    :param k: length of k-mers, up to MAX_K
+    :return: uint64 array of len(dna) - k + 1 codes, windows with ambiguous letters have INVALID_KMER code
+    >>> kmer_codes("ACGTNAC", 2).tolist()[:5]
+    [1, 6, 11, 18446744073709551615, 18446744073709551615]
+    """
+    _check_k(k)
+    codes = _to_codes(dna)
+    n = len(codes) - k + 1
+    if n <= 0:
+        return np.zeros(0, dtype=np.uint64)
+    power, power_length = (codes & 3).astype(np.uint64), 1  # codes of all windows of length power_length
+    result, result_length = None, 0
+    while True:
+        if k & power_length:
+            result = power if result is None else _concatenate_windows(result, result_length, power, power_length)
+            result_length += power_length
+        if 2 * power_length > k:
+            break
+        power = _concatenate_windows(power, power_length, power, power_length)
+        power_length *= 2
+    ambiguous = np.concatenate(([0], np.cumsum(codes == AMBIGUOUS_CODE)))
+    result[ambiguous[k:] != ambiguous[:n]] = INVALID_KMER
+    return result
+
+
+def reverse_complement_codes(dna: Union[str, np.ndarray], k: int) -> np.ndarray:
+    """ result[i] is the code of the reverse complement of the i-th k-mer of the dna.
+    >>> reverse_complement_codes("AACG", 3).tolist()  # GTT, CGT
+    [47, 27]
+    """
+    codes = _to_codes(dna)
+    complement = np.where(codes == AMBIGUOUS_CODE, codes, 3 - codes).astype(np.uint8)
+    return kmer_codes(complement[::-1], k)[::-1]
+
+
+def canonical_kmer_codes(dna: Union[str, np.ndarray], k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """ Canonical code of the k-mer is the minimum of its code and the code of its reverse complement,
+        so the k-mer and its reverse complement are counted as the same k-mer.
+    :return: (uint64 array of canonical codes, bool array which is True if the reverse complement was chosen)
+    >>> codes, reverse = canonical_kmer_codes("AACTT", 3)  # AAC, ACT, AAG (reverse complement of CTT)
+    >>> codes.tolist(), reverse.tolist()
+    ([1, 7, 2], [False, False, True])
+    """
+    forward = kmer_codes(dna, k)
+    reverse = reverse_complement_codes(dna, k)
+    is_reverse = reverse < forward
+    return np.where(is_reverse, reverse, forward), is_reverse
+
+
+def reverse_complement_code(codes: np.ndarray, k: int) -> np.ndarray:
+    """ Codes of reverse complements of k-mers given by their codes.
+    >>> reverse_complement_code(np.array([1, 6], dtype=np.uint64), 3).tolist()  # AAC -> GTT, ACG -> CGT
+    [47, 27]
+    """
+    _check_k(k)
+    codes = np.asarray(codes, dtype=np.uint64)
+    complement = ~codes
+    result = np.zeros(len(codes), dtype=np.uint64)
+    for i in range(k):
+        result = (result << np.uint64(2)) | ((complement >> np.uint64(2 * i)) & np.uint64(3))
+    return result
+
+
+def _merge_counts(codes: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """ Sum counts of equal codes, codes are made of sorted runs, so the stable sort (timsort) just merges them """
+    if not len(codes):
+        return codes, counts
+    order = np.argsort(codes, kind="stable")
+    codes = codes[order]
+    starts = np.flatnonzero(np.concatenate(([True], codes[1:] != codes[:-1])))
+    return codes[starts], np.add.reduceat(counts[order], starts, dtype=counts.dtype)
+
+
+def count_kmer_codes(sequences: Iterable[str], k: int, canonical: bool = False,
+                     batch_size: int = 1 << 24) -> Tuple[np.ndarray, np.ndarray]:
+    """ Count k-mers of all sequences as integer codes, so k-mers are never stored as strings.
+        Sequences are joined into batches of about batch_size letters (separated by an ambiguous letter,
+        so no k-mer crosses the border of sequences), every batch is counted by sorting its codes and merged
+        with the counts of previous batches.
+    :param sequences: dna strings, e.g. reads
+    :param k: length of k-mers, up to MAX_K
+    :param canonical: if True a k-mer and its reverse complement are counted together as the canonical code
+    :param batch_size: approximate number of letters processed at once
+    :return: (sorted uint64 array of distinct codes, uint32 array of their counts),
+        k-mers with ambiguous letters are skipped
+    >>> codes, counts = count_kmer_codes(["ACGTA", "CGTT"], 3)
+    >>> [(decode_kmer(code, 3), count) for code, count in zip(codes.tolist(), counts.tolist())]
+    [('ACG', 1), ('CGT', 2), ('GTA', 1), ('GTT', 1)]
+    """
+    _check_k(k)
+    codes = np.zeros(0, dtype=np.uint64)
+    counts = np.zeros(0, dtype=np.uint32)
+    batch = []
+    length = 0
+
+    def add_batch():
+        nonlocal codes, counts
+        dna = "N".join(batch)
+        batch_codes = canonical_kmer_codes(dna, k)[0] if canonical else kmer_codes(dna, k)
+        batch_codes, batch_counts = np.unique(batch_codes[batch_codes != INVALID_KMER], return_counts=True)
+        codes, counts = _merge_counts(np.concatenate((codes, batch_codes)),
+                                      np.concatenate((counts, batch_counts.astype(np.uint32))))
+
+    for sequence in sequences:
+        batch.append(sequence)
+        length += len(sequence) + 1
+        if length >= batch_size:
+            add_batch()
+            batch = []
+            length = 0
+    if batch:
+        add_batch()
+    return codes, counts
+
+
+def decode_kmer(code: int, k: int) -> str:
+    """ Decode k-mer code made by kmer_codes.
+    >>> decode_kmer(27, 3)
+    'CGT'
+    """
+    code = int(code)
+    return "".join("ACGT"[(code >> (2 * (k - 1 - i))) & 3] for i in range(k))
+
+
+def neighbourhood_masks(k: int, d: int) -> np.ndarray:
+    """ XOR masks which substitute at most d letters of a k-mer code: a 2 bit digit 1, 2 or 3 XORed
+        with a letter of the code always gives another letter, so code ^ mask for all masks is the d-neighbourhood.
+    >>> [decode_kmer(mask, 2) for mask in neighbourhood_masks(2, 1).tolist()]  # the neighbourhood of AA
+    ['AA', 'AC', 'AG', 'AT', 'CA', 'GA', 'TA']
+    """
+    _check_k(k)
+    result = [0]
+    for n_substitutions in range(1, min(d, k) + 1):
+        for positions in itertools.combinations(range(k), n_substitutions):
+            for letters in itertools.product((1, 2, 3), repeat=n_substitutions):
+                result.append(sum(letter << (2 * position) for letter, position in zip(letters, positions)))
+    return np.sort(np.array(result, dtype=np.uint64))
+
+
+def approximate_kmer_counts(dna: Union[str, np.ndarray], k: int, d: int, reverse_complements: bool = False,
+                            max_dense_k: int = 12, batch_size: int = 1 << 24) -> Tuple[np.ndarray, np.ndarray]:
+    """ Count_d(pattern) is the number of k-mers of the dna which differ from the pattern in at most d letters.
+        Every distinct k-mer of the dna adds its count to all k-mers of its d-neighbourhood, which are generated
+        as integer codes by neighbourhood_masks. Counts are accumulated by numpy.bincount in a dense array
+        of 4 ** k counters for k up to max_dense_k, for longer k-mers (sparse counts) by merging sorted arrays
+        of codes like count_kmer_codes. Neighbours are generated in batches of about batch_size codes.
+    :param dna: dna string or its codes made by encode_dna
+    :param k: length of k-mers
+    :param d: maximal number of mismatches
+    :param reverse_complements: if True Count_d(pattern) + Count_d(reverse complement of pattern) is counted,
+        it's equal to Count_d(pattern) over k-mers of the dna and its reverse complement
+    :param max_dense_k: the largest k for dense counting
+    :param batch_size: approximate number of neighbour codes processed at once
+    :return: (sorted uint64 array of codes with non zero counts, int64 array of counts)
+    >>> codes, counts = approximate_kmer_counts("AAT", 2, 1)
+    >>> [(decode_kmer(code, 2), count) for code, count in zip(codes.tolist(), counts.tolist())][:5]
+    [('AA', 2), ('AC', 2), ('AG', 2), ('AT', 2), ('CA', 1)]
+    """
+    codes = kmer_codes(dna, k)
+    if reverse_complements:
+        codes = np.concatenate((codes, reverse_complement_codes(dna, k)))
+    codes, counts = np.unique(codes[codes != INVALID_KMER], return_counts=True)
+    masks = neighbourhood_masks(k, d)
+    dense = k <= max_dense_k
+    if dense:
+        total = np.zeros(4 ** k, dtype=np.int64)
+    else:
+        result_codes, result_counts = np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64)
+    step = max(batch_size // max(len(codes), 1), 1)
+    for start in range(0, len(masks) if len(codes) else 0, step):
+        batch = masks[start:start + step]
+        neighbours = (codes[np.newaxis, :] ^ batch[:, np.newaxis]).ravel()
+        weights = np.tile(counts, len(batch))
+        if dense:
+            total += np.bincount(neighbours.astype(np.int64), weights=weights, minlength=len(total)).astype(np.int64)
+        else:
+            result_codes, result_counts = _merge_counts(np.concatenate((result_codes, neighbours)),
+                                                        np.concatenate((result_counts, weights)))
+    if dense:
+        result_codes = np.flatnonzero(total).astype(np.uint64)
+        result_counts = total[result_codes.astype(np.int64)]
+    return result_codes, result_counts
+
+
+def frequent_kmers_with_mismatches(dna: str, k: int, d: int, reverse_complements: bool = False) -> List[str]:
+    """ The most frequent k-mers with at most d mismatches (and reverse complements), see approximate_kmer_counts.
+    :return: k-mers with the maximal count in the lexicographical order (like aug.seq.seq.enumerate_kmers("ACGT", k))
+    >>> frequent_kmers_with_mismatches("ACGTTGCATGTCGCATGATGCATGAGAGCT", 4, 1)
+    ['ATGC', 'ATGT', 'GATG']
+    >>> frequent_kmers_with_mismatches("ACGTTGCATGTCGCATGATGCATGAGAGCT", 4, 1, reverse_complements=True)
+    ['ACAT', 'ATGT']
+    """
+    codes, counts = approximate_kmer_counts(dna, k, d, reverse_complements)
+    if not len(codes):
+        return []
+    return [decode_kmer(code, k) for code in codes[counts == counts.max()].tolist()]
@@ -0,0 +1,277 @@
+import math
+from collections import namedtuple
+from typing import Iterable, Iterator, List, Tuple, Union
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from aug.data.fasta import fasta_file_iter
+from aug.helpers.parallel import parallel_map
+from aug.seq.encoding import FORWARD_STRAND, REVERSE_STRAND
+from aug.seq.kmers import INVALID_KMER, kmer_codes, reverse_complement_codes
+
+Mapping = namedtuple("Mapping", ["query_id", "query_start", "query_end", "strand",
+                                 "target_id", "target_start", "target_end", "n_anchors", "score"])
+Mapping.__doc__ = """ Chain of minimizer hits between the query and the target, coordinates are 0-based and half-open,
+    strand is "-" if the query is mapped as reverse complement. """
+
+
+def hash_kmers(codes: np.ndarray, k: int) -> np.ndarray:
+    """ Invertible integer hash of k-mer codes (Thomas Wang's 64 bit mix restricted to 2k bits).
+        Lexicographically smallest k-mers are poly-A like low complexity ones, hashing spreads the minimizers
+        uniformly over the sequence. INVALID_KMER codes stay invalid.
+    >>> hash_kmers(np.array([0, 1, INVALID_KMER], dtype=np.uint64), 3).tolist()[2] == int(INVALID_KMER)
+    True
+    """
+    mask = np.uint64((1 << (2 * k)) - 1)
+    with np.errstate(over="ignore"):
+        key = codes.astype(np.uint64)
+        key = (~key + (key << np.uint64(21))) & mask
+        key ^= key >> np.uint64(24)
+        key = (key + (key << np.uint64(3)) + (key << np.uint64(8))) & mask
+        key ^= key >> np.uint64(14)
+        key = (key + (key << np.uint64(2)) + (key << np.uint64(4))) & mask
+        key ^= key >> np.uint64(28)
+        key = (key + (key << np.uint64(31))) & mask
+    key[codes == INVALID_KMER] = INVALID_KMER
+    return key
+
+
+def minimizers(dna: Union[str, np.ndarray], k: int = 15, w: int = 10) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ Find (w, k)-minimizers of the dna: the k-mer with the smallest hash in every window of w consecutive k-mers.
+        K-mers are canonical (the smallest of the k-mer and its reverse complement), so the same minimizers
+        are selected on both strands. K-mers with ambiguous letters and k-mers equal to their reverse complement
+        are skipped, the leftmost k-mer is selected for equal hashes.
+        https://doi.org/10.1093/bioinformatics/bth408
+    :param dna: dna string or its codes made by encode_dna
+    :param k: length of k-mers
+    :param w: number of consecutive k-mers in the window
+    :return: (uint64 hashes, int64 0-based positions, bool array which is True if the minimizer is
+        the reverse complement of the k-mer), sorted by position
+    >>> hashes, positions, is_reverse = minimizers("ACGTTGCAATGCAGTTCAAGG", k=5, w=4)
+    >>> positions.tolist()
+    [3, 6, 9, 13]
+    """
+    forward = kmer_codes(dna, k)
+    reverse = reverse_complement_codes(dna, k)
+    is_reverse = reverse < forward
+    hashes = hash_kmers(np.where(is_reverse, reverse, forward), k)
+    hashes[forward == reverse] = INVALID_KMER
+    if not len(hashes):
+        positions = np.zeros(0, dtype=np.int64)
+    elif len(hashes) < w:
+        positions = np.array([np.argmin(hashes)], dtype=np.int64)
+    else:
+        windows = sliding_window_view(hashes, w)
+        positions = np.unique(np.argmin(windows, axis=1) + np.arange(len(windows)))
+    positions = positions[hashes[positions] != INVALID_KMER].astype(np.int64)
+    return hashes[positions], positions, is_reverse[positions]
+
+
+def _sketch(job: Tuple[str, str, int, int]) -> Tuple[str, int, np.ndarray, np.ndarray, np.ndarray]:
+    id, dna, k, w = job
+    return (id, len(dna)) + minimizers(dna, k, w)
+
+
+class MinimizerIndex:
+    """ Index of (w, k)-minimizers of many sequences (long reads or a reference) for overlapping and mapping.
+    Every minimizer is stored with (sequence index, position, strand), the arrays are sorted by the minimizer hash,
+        so hits of all minimizers of a query are found by one vectorized binary search.
+    Hits (anchors) of a query are grouped by target and relative strand and chained by dynamic programming
+        like in minimap2 (https://doi.org/10.1093/bioinformatics/bty191): anchors of a chain go in the same order
+        on both sequences and the distances between the neighbours are nearly equal.
+    Sequences are sketched in parallel processes.
+    >>> reference = "CATGCGTTAGCATTACGGACTGACTAGCCGATAGGCTAAGCTAGCTTAGGCATGCAGGACTTAGCAGGCTAAT"
+    >>> index = MinimizerIndex([("ref", reference)], k=7, w=3, n_jobs=1)
+    >>> mapping = index.map(reference[20:60], min_score=20)[0]
+    >>> mapping.strand, mapping.target_id, mapping.target_start - mapping.query_start
+    ('+', 'ref', 20)
+    """
+
+    def __init__(self, records: Union[str, Iterable[Tuple[str, str]]], k: int = 15, w: int = 10,
+                 n_jobs: Union[int, None] = None):
+        """
+        :param records: pairs of (id, dna) e.g. from fasta_file_iter, or one dna string (its id will be None)
+        :param k: length of k-mers
+        :param w: number of consecutive k-mers in the window, every window contains at least one minimizer
+        :param n_jobs: number of processes used for sketching, None for the number of processors
+        """
+        records = [(None, records)] if isinstance(records, str) else records
+        self.k = k
+        self.w = w
+        self.ids = []
+        self.lengths = []
+        hashes, sequences, positions, is_reverse = [], [], [], []
+        jobs = ((id, dna, k, w) for id, dna in records)
+        for i, (id, length, sequence_hashes, sequence_positions, sequence_is_reverse) in \
+                enumerate(parallel_map(_sketch, jobs, n_jobs=n_jobs)):
+            self.ids.append(id)
+            self.lengths.append(length)
+            hashes.append(sequence_hashes)
+            sequences.append(np.full(len(sequence_hashes), i, dtype=np.int32))
+            positions.append(sequence_positions)
+            is_reverse.append(sequence_is_reverse)
+        hashes = np.concatenate(hashes) if hashes else np.zeros(0, dtype=np.uint64)
+        order = np.argsort(hashes, kind="stable")
+        self.hashes = hashes[order]
+        self.sequences = np.concatenate(sequences)[order] if sequences else np.zeros(0, dtype=np.int32)
+        self.positions = np.concatenate(positions)[order] if positions else np.zeros(0, dtype=np.int64)
+        self.is_reverse = np.concatenate(is_reverse)[order] if is_reverse else np.zeros(0, dtype=bool)
+
+    @classmethod
+    def from_fasta(cls, fasta_file_path: str, **kwargs) -> "MinimizerIndex":
+        """ Build index for all records of fasta file, see MinimizerIndex.__init__ for the parameters. """
+        return cls(fasta_file_iter(fasta_file_path), **kwargs)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def lookup(self, hash: int) -> List[Tuple[str, int, str]]:
+        """ returns all occurrences of the minimizer as (sequence id, 0-based position, strand) """
+        hash = np.uint64(hash)
+        lo = int(np.searchsorted(self.hashes, hash, side="left"))
+        hi = int(np.searchsorted(self.hashes, hash, side="right"))
+        return [(self.ids[sequence], position, REVERSE_STRAND if is_reverse else FORWARD_STRAND)
+                for sequence, position, is_reverse in zip(self.sequences[lo:hi].tolist(),
+                                                          self.positions[lo:hi].tolist(),
+                                                          self.is_reverse[lo:hi].tolist())]
+
+    def _anchors(self, hashes: np.ndarray, positions: np.ndarray, is_reverse: np.ndarray,
+                 max_occurrences: Union[int, None]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """ All hits of query minimizers as arrays of (target, relative strand, target position, query position) """
+        lo = np.searchsorted(self.hashes, hashes, side="left")
+        hi = np.searchsorted(self.hashes, hashes, side="right")
+        counts = hi - lo
+        if max_occurrences is not None:
+            counts[counts > max_occurrences] = 0  # repetitive minimizers give only spurious anchors
+        total = int(counts.sum())
+        query = np.repeat(np.arange(len(hashes)), counts)
+        rows = np.repeat(lo, counts) + np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        return (self.sequences[rows], self.is_reverse[rows] != is_reverse[query],
+                self.positions[rows], positions[query])
+
+    def _chain(self, positions: np.ndarray, query_positions: np.ndarray,
+               max_gap: int, bandwidth: int, lookback: int = 50) -> List[List[int]]:
+        """ Chain anchors of one target and strand sorted by positions,
+            returns lists of anchor indexes of disjoint chains, the best chain first.
+        """
+        k = self.k
+        positions = positions.tolist()
+        query_positions = query_positions.tolist()
+        n = len(positions)
+        scores = [k] * n
+        previous = [-1] * n
+        for i in range(n):
+            for j in range(i - 1, max(i - lookback, 0) - 1, -1):
+                target_distance = positions[i] - positions[j]
+                if target_distance > max_gap:
+                    break
+                query_distance = query_positions[i] - query_positions[j]
+                if not target_distance or query_distance <= 0 or query_distance > max_gap:
+                    continue
+                gap = abs(target_distance - query_distance)
+                if gap > bandwidth:
+                    continue
+                score = scores[j] + min(target_distance, query_distance, k)
+                if gap:
+                    score -= 0.01 * k * gap + 0.5 * math.log2(gap)
+                if score > scores[i]:
+                    scores[i] = score
+                    previous[i] = j
+        used = [False] * n
+        chains = []
+        for i in sorted(range(n), key=scores.__getitem__, reverse=True):
+            chain = []
+            while i != -1 and not used[i]:
+                used[i] = True
+                chain.append(i)
+                i = previous[i]
+            if chain:
+                chains.append(chain[::-1])
+        return chains
+
+    def _map_sketch(self, hashes: np.ndarray, positions: np.ndarray, is_reverse: np.ndarray,
+                    query_id: str, query_length: int, min_anchors: int, min_score: int, max_gap: int,
+                    bandwidth: int, max_occurrences: Union[int, None], skip=lambda target: False) -> List[Mapping]:
+        targets, reverse_strand, target_positions, query_positions = \
+            self._anchors(hashes, positions, is_reverse, max_occurrences)
+        # on the reverse strand query positions are taken on the reverse complement of the query
+        query_positions = np.where(reverse_strand, query_length - self.k - query_positions, query_positions)
+        order = np.lexsort((query_positions, target_positions, reverse_strand, targets))
+        targets, reverse_strand = targets[order], reverse_strand[order]
+        target_positions, query_positions = target_positions[order], query_positions[order]
+        borders = np.flatnonzero((targets[1:] != targets[:-1]) | (reverse_strand[1:] != reverse_strand[:-1])) + 1
+        starts = np.concatenate(([0], borders)).tolist()
+        ends = np.concatenate((borders, [len(targets)])).tolist()
+        result = []
+        for start, end in zip(starts, ends):
+            target = int(targets[start])
+            if end - start < min_anchors or skip(target):
+                continue
+            group_positions = target_positions[start:end]
+            group_query_positions = query_positions[start:end]
+            kept = []  # query intervals of the better chains of the group
+            for chain in self._chain(group_positions, group_query_positions, max_gap, bandwidth):
+                if len(chain) < min_anchors:
+                    continue
+                query_start = int(group_query_positions[chain[0]])
+                query_end = int(group_query_positions[chain[-1]]) + self.k
+                score = self._chain_score(chain, group_query_positions)
+                if score < min_score:
+                    continue
+                if any(2 * (min(query_end, kept_end) - max(query_start, kept_start)) > query_end - query_start
+                       for kept_start, kept_end in kept):
+                    continue  # leftovers of a better chain
+                kept.append((query_start, query_end))
+                if reverse_strand[start]:
+                    query_start, query_end = query_length - query_end, query_length - query_start
+                result.append(Mapping(query_id, query_start, query_end,
+                                      REVERSE_STRAND if reverse_strand[start] else FORWARD_STRAND,
+                                      self.ids[target], int(group_positions[chain[0]]),
+                                      int(group_positions[chain[-1]]) + self.k, len(chain),
+                                      score))
+        result.sort(key=lambda mapping: -mapping.score)
+        return result
+
+    def _chain_score(self, chain: List[int], query_positions: np.ndarray) -> int:
+        """ Number of bases covered by the anchors of the chain on the query """
+        covered = 0
+        end = -1
+        for i in chain:
+            start = int(query_positions[i])
+            covered += start + self.k - max(start, end)
+            end = start + self.k
+        return covered
+
+    def map(self, dna: str, query_id: str = None, min_anchors: int = 3, min_score: int = 40, max_gap: int = 5000,
+            bandwidth: int = 500, max_occurrences: Union[int, None] = 1000) -> List[Mapping]:
+        """ Find candidate mapping positions of the query (e.g. a long read) in the indexed sequences.
+        :param dna: the query
+        :param query_id: id of the query, it's stored in the mappings
+        :param min_anchors: minimal number of minimizer hits in a chain
+        :param min_score: minimal number of query bases covered by the hits of a chain
+        :param max_gap: maximal distance between neighbour hits of a chain on any sequence
+        :param bandwidth: maximal difference between distances of neighbour hits on the query and the target
+            (indels between the hits)
+        :param max_occurrences: minimizers with more occurrences in the index are ignored, None to use all
+        :return: list of mappings, the best (with the largest number of bases covered by the chain) first
+        """
+        hashes, positions, is_reverse = minimizers(dna, self.k, self.w)
+        return self._map_sketch(hashes, positions, is_reverse, query_id, len(dna),
+                                min_anchors, min_score, max_gap, bandwidth, max_occurrences)
+
+    def overlaps(self, min_anchors: int = 3, min_score: int = 40, max_gap: int = 5000, bandwidth: int = 500,
+                 max_occurrences: Union[int, None] = 1000) -> Iterator[Mapping]:
+        """ Find candidate overlaps between all pairs of indexed sequences (all-vs-all read overlapping)
+            using the stored minimizers, every pair is reported once with the query before the target in the index.
+            See map for the parameters.
+        :return: generator of mappings
+        """
+        order = np.argsort(self.sequences, kind="stable")
+        borders = np.searchsorted(self.sequences[order], np.arange(len(self.ids) + 1))
+        for query in range(len(self.ids)):
+            rows = order[borders[query]:borders[query + 1]]
+            rows = rows[np.argsort(self.positions[rows], kind="stable")]
+            yield from self._map_sketch(self.hashes[rows], self.positions[rows], self.is_reverse[rows],
+                                        self.ids[query], self.lengths[query], min_anchors, min_score, max_gap,
+                                        bandwidth, max_occurrences, skip=lambda target: target <= query)
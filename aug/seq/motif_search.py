@@ -0,0 +1,235 @@
+from collections import namedtuple
+from functools import partial
+from typing import List, Tuple, Union
+
+import numpy as np
+
+from aug.helpers.parallel import chunks, parallel_map
+from aug.seq.encoding import AMBIGUOUS_CODE, decode_dna, encode_dna
+from aug.seq.seq import consensus, profile_counts
+
+MotifSearchResult = namedtuple("MotifSearchResult", ["consensus", "score", "motifs"])
+MotifSearchResult.__doc__ = """ The best motifs found: their consensus, score (number of letters which differ
+    from the consensus, ambiguous letters always differ, lower is better)
+    and the motifs (one k-mer from every sequence). """
+
+
+def encode_sequences(dnas: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """ Encode all sequences once as (len(dnas) x max length) uint8 matrix padded by AMBIGUOUS_CODE.
+    :return: (matrix, lengths)
+    >>> matrix, lengths = encode_sequences(["ACG", "T"])
+    >>> matrix.tolist(), lengths.tolist()
+    ([[0, 1, 2], [3, 4, 4]], [3, 1])
+    """
+    lengths = np.array([len(dna) for dna in dnas], dtype=np.int64)
+    matrix = np.full((len(dnas), int(lengths.max(initial=0))), AMBIGUOUS_CODE, dtype=np.uint8)
+    for i, dna in enumerate(dnas):
+        matrix[i, :len(dna)] = encode_dna(dna)
+    return matrix, lengths
+
+
+def _frequencies(counts: np.ndarray, axis: int) -> np.ndarray:
+    total = counts.sum(axis=axis, keepdims=True)
+    return np.divide(counts, total, out=np.full(counts.shape, 1 / AMBIGUOUS_CODE), where=total > 0)
+
+
+def log_profile(counts: np.ndarray, pseudocount: float = 1.0) -> np.ndarray:
+    """ Log probabilities of letters in every column of the profile with pseudocounts (Laplace's rule).
+    :param counts: (4 x k) profile made by aug.seq.seq.profile_counts
+    :param pseudocount: added to every count, so unseen letters have non zero probability
+    :return: (5 x k) float array, the last row is for ambiguous letters and it's -inf,
+        letters are equally probable in columns without counts (e.g. only ambiguous letters without pseudocounts)
+    """
+    counts = counts + pseudocount
+    with np.errstate(divide="ignore"):
+        result = np.log(_frequencies(counts, axis=0))
+    return np.vstack((result, np.full(result.shape[1], -np.inf)))
+
+
+def window_log_probabilities(matrix: np.ndarray, log_probabilities: np.ndarray) -> np.ndarray:
+    """ Log probability of every k-mer window of every sequence for the profile.
+        The windows are never copied: the score is summed over k strided views matrix[:, j:j + n_windows].
+    :param matrix: encoded sequences (e.g. made by encode_sequences) or one encoded sequence
+    :param log_probabilities: (5 x k) array made by log_profile
+    :return: (n_sequences x n_windows) array, windows with ambiguous letters (e.g. padding) are -inf
+    """
+    k = log_probabilities.shape[1]
+    n_windows = matrix.shape[-1] - k + 1
+    result = np.zeros(matrix.shape[:-1] + (max(n_windows, 0),))
+    for j in range(k):
+        result += log_probabilities[matrix[..., j:j + n_windows], j]
+    return result
+
+
+def _motifs(matrix: np.ndarray, starts: np.ndarray, k: int) -> np.ndarray:
+    return matrix[np.arange(len(matrix))[:, np.newaxis], starts[:, np.newaxis] + np.arange(k)]
+
+
+def _score(counts: np.ndarray, n_motifs: int) -> int:
+    """ Number of letters which differ from the consensus, ambiguous letters always differ """
+    return int((n_motifs - counts.max(axis=0)).sum())
+
+
+def _result(matrix: np.ndarray, starts: np.ndarray, k: int) -> MotifSearchResult:
+    motifs = _motifs(matrix, starts, k)
+    counts = profile_counts(motifs)
+    return MotifSearchResult(consensus(precalculated_profile=counts), _score(counts, len(matrix)),
+                             [decode_dna(motif) for motif in motifs])
+
+
+def _check(lengths: np.ndarray, k: int):
+    if not len(lengths) or lengths.min() < k:
+        raise ValueError("All sequences should be at least k letters long.")
+
+
+def _greedy(seeds: List[int], matrix: np.ndarray, lengths: np.ndarray, k: int,
+            pseudocount: float) -> Tuple[int, np.ndarray]:
+    """ Greedy search for all seeds (start positions in the first sequence) at once,
+        returns the best score and starts of motifs.
+    """
+    seeds = np.array(seeds)
+    n_seeds = len(seeds)
+    starts = np.zeros((n_seeds, len(matrix)), dtype=np.int64)
+    starts[:, 0] = seeds
+    counts = np.zeros((n_seeds, AMBIGUOUS_CODE + 1, k), dtype=np.int64)
+    columns = np.arange(k)
+    np.add.at(counts, (np.arange(n_seeds)[:, np.newaxis], matrix[0, seeds[:, np.newaxis] + columns], columns), 1)
+    for i in range(1, len(matrix)):
+        letters = counts[:, :AMBIGUOUS_CODE] + pseudocount
+        with np.errstate(divide="ignore"):
+            log_probabilities = np.log(_frequencies(letters, axis=1))
+        log_probabilities = np.concatenate((log_probabilities, np.full((n_seeds, 1, k), -np.inf)), axis=1)
+        n_windows = lengths[i] - k + 1
+        scores = np.zeros((n_seeds, n_windows))
+        for j in range(k):
+            scores += log_probabilities[:, matrix[i, j:j + n_windows], j]
+        starts[:, i] = np.argmax(scores, axis=1)  # the first window if all are equally (im)probable
+        motif = matrix[i, starts[:, i, np.newaxis] + columns]
+        np.add.at(counts, (np.arange(n_seeds)[:, np.newaxis], motif, columns), 1)
+    scores = (len(matrix) - counts[:, :AMBIGUOUS_CODE].max(axis=1)).sum(axis=1)
+    best = int(np.argmin(scores))
+    return int(scores[best]), starts[best]
+
+
+def greedy_motif_search(dnas: List[str], k: int, pseudocount: float = 1.0, n_jobs: Union[int, None] = 1,
+                        chunk_size: int = 256) -> MotifSearchResult:
+    """ Greedy profile-most-probable motif search: every k-mer of the first sequence is a seed,
+        the motif of the next sequence is its most probable k-mer for the profile of the motifs chosen before.
+        All seeds are processed together by numpy, chunks of seeds are processed in parallel.
+    :param dnas: sequences, e.g. upstream regions of genes
+    :param k: length of the motif
+    :param pseudocount: pseudocount for profiles, 0 for the original algorithm without pseudocounts
+    :param n_jobs: number of processes, None for the number of processors
+    :param chunk_size: number of seeds processed at once
+    :return: the best motifs
+    >>> greedy_motif_search(["GGCGTTCAGGCA", "AAGAATCAGTCA", "CAAGGAGTTCGC", "CACGTCAATCAC", "CAATAATATTCG"], 3).motifs
+    ['TTC', 'ATC', 'TTC', 'ATC', 'TTC']
+    """
+    matrix, lengths = encode_sequences(dnas)
+    _check(lengths, k)
+    greedy = partial(_greedy, matrix=matrix, lengths=lengths, k=k, pseudocount=pseudocount)
+    best_score, best_starts = None, None
+    for score, starts in parallel_map(greedy, chunks(range(lengths[0] - k + 1), chunk_size), n_jobs=n_jobs):
+        if best_score is None or score < best_score:
+            best_score, best_starts = score, starts
+    return _result(matrix, best_starts, k)
+
+
+def _random_starts(lengths: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    return rng.integers(0, lengths - k + 1)
+
+
+def _randomized_restart(seed: np.random.SeedSequence, matrix: np.ndarray, lengths: np.ndarray, k: int,
+                        pseudocount: float) -> Tuple[int, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    starts = _random_starts(lengths, k, rng)
+    counts = profile_counts(_motifs(matrix, starts, k))
+    best_score = _score(counts, len(matrix))
+    while True:
+        scores = window_log_probabilities(matrix, log_profile(counts, pseudocount))
+        new_starts = np.argmax(scores, axis=1)
+        counts = profile_counts(_motifs(matrix, new_starts, k))
+        score = _score(counts, len(matrix))
+        if score >= best_score:
+            return best_score, starts
+        best_score, starts = score, new_starts
+
+
+def _add_motif(counts: np.ndarray, motif: np.ndarray, value: int):
+    """ Add the motif to (4 x k) profile counts (or remove it if value is -1), ambiguous letters are not counted """
+    columns = np.flatnonzero(motif != AMBIGUOUS_CODE)
+    counts[motif[columns], columns] += value
+
+
+def _gibbs_restart(seed: np.random.SeedSequence, matrix: np.ndarray, lengths: np.ndarray, k: int,
+                   pseudocount: float, n_iterations: int) -> Tuple[int, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    starts = _random_starts(lengths, k, rng)
+    columns = np.arange(k)
+    counts = profile_counts(_motifs(matrix, starts, k))
+    best_score, best_starts = _score(counts, len(matrix)), starts.copy()
+    for _ in range(n_iterations):
+        i = rng.integers(len(matrix))
+        _add_motif(counts, matrix[i, starts[i] + columns], -1)
+        scores = window_log_probabilities(matrix[i, :lengths[i]], log_profile(counts, pseudocount))
+        if np.isneginf(scores.max()):
+            # all windows are impossible (e.g. all of them have ambiguous letters), so they are equally probable
+            probabilities = np.ones(len(scores))
+        else:
+            probabilities = np.exp(scores - scores.max())
+        starts[i] = rng.choice(len(probabilities), p=probabilities / probabilities.sum())
+        _add_motif(counts, matrix[i, starts[i] + columns], 1)
+        score = _score(counts, len(matrix))
+        if score < best_score:
+            best_score, best_starts = score, starts.copy()
+    return best_score, best_starts
+
+
+def _best_of_restarts(restart, matrix: np.ndarray, k: int, n_restarts: int, n_jobs: Union[int, None],
+                      seed: Union[int, None]) -> MotifSearchResult:
+    seeds = np.random.SeedSequence(seed).spawn(n_restarts)
+    best_score, best_starts = None, None
+    for score, starts in parallel_map(restart, seeds, n_jobs=n_jobs, chunksize=max(n_restarts // 64, 1)):
+        if best_score is None or score < best_score:
+            best_score, best_starts = score, starts
+    return _result(matrix, best_starts, k)
+
+
+def randomized_motif_search(dnas: List[str], k: int, n_restarts: int = 1000, pseudocount: float = 1.0,
+                            n_jobs: Union[int, None] = None, seed: Union[int, None] = None) -> MotifSearchResult:
+    """ Randomized motif search: start from random motifs, then choose the most probable k-mer of every sequence
+        for the profile of the motifs while the score improves. Restarts are run in parallel processes.
+    :param dnas: sequences, e.g. upstream regions of genes
+    :param k: length of the motif
+    :param n_restarts: number of random starts
+    :param pseudocount: pseudocount for profiles
+    :param n_jobs: number of processes, None for the number of processors
+    :param seed: seed for random generator, the result doesn't depend on n_jobs
+    :return: the best motifs of all restarts
+    """
+    matrix, lengths = encode_sequences(dnas)
+    _check(lengths, k)
+    restart = partial(_randomized_restart, matrix=matrix, lengths=lengths, k=k, pseudocount=pseudocount)
+    return _best_of_restarts(restart, matrix, k, n_restarts, n_jobs, seed)
+
+
+def gibbs_sampler(dnas: List[str], k: int, n_iterations: int = 1000, n_restarts: int = 20,
+                  pseudocount: float = 1.0, n_jobs: Union[int, None] = None,
+                  seed: Union[int, None] = None) -> MotifSearchResult:
+    """ Gibbs sampling motif search: on every iteration the motif of a random sequence is replaced by its k-mer
+        chosen randomly with probabilities given by the profile of all other motifs.
+        Restarts are run in parallel processes.
+    :param dnas: sequences, e.g. upstream regions of genes
+    :param k: length of the motif
+    :param n_iterations: number of iterations of every restart
+    :param n_restarts: number of random starts
+    :param pseudocount: pseudocount for profiles
+    :param n_jobs: number of processes, None for the number of processors
+    :param seed: seed for random generator, the result doesn't depend on n_jobs
+    :return: the best motifs of all restarts
+    """
+    matrix, lengths = encode_sequences(dnas)
+    _check(lengths, k)
+    restart = partial(_gibbs_restart, matrix=matrix, lengths=lengths, k=k, pseudocount=pseudocount,
+                      n_iterations=n_iterations)
+    return _best_of_restarts(restart, matrix, k, n_restarts, n_jobs, seed)
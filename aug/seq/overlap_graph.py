@@ -0,0 +1,87 @@
+from typing import Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from aug.data.fasta import fasta_file_iter
+
+
+def _letters_matrix(reads: List[bytes], lengths: np.ndarray, width: int, right_aligned: bool) -> np.ndarray:
+    """ uint8 matrix with a read in every row padded by zeros """
+    result = np.zeros((len(reads), width), dtype=np.uint8)
+    starts = np.cumsum(lengths) - lengths
+    rows = np.repeat(np.arange(len(reads)), lengths)
+    columns = np.arange(int(lengths.sum())) - np.repeat(starts, lengths)
+    if right_aligned:
+        columns += np.repeat(width - lengths, lengths)
+    result[rows, columns] = np.frombuffer(b"".join(reads), dtype=np.uint8)
+    return result
+
+
+def overlap_edges(reads: List[str], min_overlap: int = 3) -> Iterator[Tuple[np.ndarray, np.ndarray, int]]:
+    """ Find all suffix-prefix overlaps between the reads, i.e. pairs (source, target) where a suffix of the source
+        of length at least min_overlap is equal to a prefix of the target, every overlap length is reported.
+    Reads are sorted lexicographically once, so the reads starting with a suffix make a contiguous range,
+        which is found by binary search. Suffixes of one length of all reads are searched at once
+        by numpy.searchsorted over fixed width byte strings, so no pair is compared in Python.
+        Suffixes are kept sorted: the order of suffixes of length l + 1 is a stable sort of the order
+        for length l by one more letter.
+    Overlaps are proper: the overlap is shorter than both reads, so contained reads and loops are skipped.
+    :param reads: list of reads (ascii strings)
+    :param min_overlap: minimal length of overlaps
+    :return: generator of (source indexes, target indexes, overlap length) for every overlap length
+        from min_overlap to the longest, so the edges are never stored together
+    >>> [(sources.tolist(), targets.tolist(), length) for sources, targets, length
+    ...  in overlap_edges(["AAATTTT", "TTTTCCC", "TTTCCCA"], min_overlap=3)]
+    [([0, 0], [2, 1], 3), ([0], [1], 4), ([1], [2], 6)]
+    """
+    reads = [read.encode("ascii") for read in reads]
+    lengths = np.array([len(read) for read in reads], dtype=np.int64)
+    if not len(reads):
+        return
+    width = int(lengths.max())
+    prefixes = _letters_matrix(reads, lengths, width, right_aligned=False).view(f"S{width}").ravel()
+    order = np.argsort(prefixes, kind="stable")
+    prefixes = prefixes[order]
+    target_lengths = lengths[order]
+    suffixes = _letters_matrix(reads, lengths, width, right_aligned=True)
+    # reads sorted by their suffixes of the current length, sorted queries make binary search cache friendly
+    suffix_order = np.arange(len(reads))
+    for length in range(1, width):
+        suffix_order = suffix_order[np.argsort(suffixes[suffix_order, width - length], kind="stable")]
+        if length < min_overlap:
+            continue
+        sources = suffix_order[lengths[suffix_order] > length]
+        query = suffixes[sources, width - length:]
+        lo = np.searchsorted(prefixes, query.view(f"S{length}").ravel(), side="left")
+        query[:, -1] += 1  # the smallest string greater than all strings starting with the suffix
+        hi = np.searchsorted(prefixes, query.view(f"S{length}").ravel(), side="left")
+        counts = hi - lo
+        rows = np.repeat(lo, counts) + np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+        sources = np.repeat(sources, counts)
+        targets = order[rows]
+        proper = (target_lengths[rows] > length) & (sources != targets)
+        if proper.any():
+            yield sources[proper], targets[proper], length
+
+
+def overlaps(records: Iterable[Tuple[str, str]], min_overlap: int = 3) -> Iterator[Tuple[str, str, int]]:
+    """ Overlap graph of the records with all suffix-prefix overlaps of length at least min_overlap,
+        see overlap_edges for details.
+    :param records: pairs of (id, dna) e.g. from fasta_file_iter
+    :param min_overlap: minimal length of overlaps
+    :return: generator of edges (source id, target id, overlap length), shorter overlaps go first
+    >>> list(overlaps([("a", "AAATTTT"), ("b", "TTTTCCC"), ("c", "GGGAAAT")], min_overlap=3))
+    [('a', 'b', 3), ('c', 'a', 4), ('a', 'b', 4)]
+    """
+    ids, reads = [], []
+    for id, read in records:
+        ids.append(id)
+        reads.append(read)
+    for sources, targets, length in overlap_edges(reads, min_overlap):
+        for source, target in zip(sources.tolist(), targets.tolist()):
+            yield ids[source], ids[target], length
+
+
+def overlaps_fasta(fasta_file_path: str, min_overlap: int = 3) -> Iterator[Tuple[str, str, int]]:
+    """ Overlap graph of all records of fasta file, see overlaps. """
+    return overlaps(fasta_file_iter(fasta_file_path), min_overlap)
@@ -0,0 +1,170 @@
+import json
+import os
+from typing import Iterable, List, Tuple, Union
+
+import numpy as np
+
+from aug.data.fasta import fasta_file_iter
+from aug.seq.seq import monoisotopic_mass_table
+
+WATER_MASS = 18.01056  # monoisotopic mass of H2O, a peptide is residues plus a water molecule
+_ARRAYS = ("masses", "starts", "lengths", "proteins", "protein_starts", "text")
+
+
+def residue_masses() -> np.ndarray:
+    """ Lookup table from ascii code to the monoisotopic residue mass, NaN for unknown letters. """
+    result = np.full(256, np.nan)
+    for letter, mass in monoisotopic_mass_table.items():
+        result[ord(letter)] = mass
+    return result
+
+
+_RESIDUE_MASSES = residue_masses()
+
+
+def _cleavage_sites(text: np.ndarray, protein_starts: np.ndarray) -> np.ndarray:
+    """ Peptide boundaries of trypsin digestion: after K or R unless the next residue is P, and borders of proteins """
+    after = np.isin(text, np.frombuffer(b"KR", dtype=np.uint8))
+    after[:-1] &= text[1:] != ord("P")
+    return np.union1d(np.flatnonzero(after) + 1, np.append(protein_starts, len(text)))
+
+
+def _digest(text: np.ndarray, protein_starts: np.ndarray, missed_cleavages: int, min_length: int,
+            max_length: Union[int, None]) -> Tuple[np.ndarray, np.ndarray]:
+    """ Start and end positions of all peptides with up to missed_cleavages missed cleavage sites,
+        peptides never cross borders of proteins.
+    """
+    sites = _cleavage_sites(text, protein_starts)
+    protein_of_site = np.searchsorted(protein_starts, sites, side="right") - 1
+    starts, ends = [], []
+    for missed in range(missed_cleavages + 1):
+        first, last = sites[:-1 - missed], sites[1 + missed:]
+        same_protein = protein_of_site[:len(first)] == np.searchsorted(protein_starts, last - 1, side="right") - 1
+        length = last - first
+        keep = same_protein & (length >= min_length) & (length <= (max_length or len(text)))
+        starts.append(first[keep])
+        ends.append(last[keep])
+    return np.concatenate(starts), np.concatenate(ends)
+
+
+def digest(protein: str, missed_cleavages: int = 0, min_length: int = 1,
+           max_length: Union[int, None] = None) -> List[str]:
+    """ In silico trypsin digestion: the protein is cleaved after K or R unless they are followed by P.
+    :param protein: protein string
+    :param missed_cleavages: maximal number of cleavage sites inside a peptide
+    :param min_length: shorter peptides are skipped
+    :param max_length: longer peptides are skipped, no limit by default
+    :return: peptides ordered by number of missed cleavages and position
+    >>> digest("MKWVTRPFISLLKAR", missed_cleavages=1)
+    ['MK', 'WVTRPFISLLK', 'AR', 'MKWVTRPFISLLK', 'WVTRPFISLLKAR']
+    """
+    starts, ends = _digest(np.frombuffer(protein.encode("ascii"), dtype=np.uint8), np.zeros(1, dtype=np.int64),
+                           missed_cleavages, min_length, max_length)
+    return [protein[start:end] for start, end in zip(starts.tolist(), ends.tolist())]
+
+
+class PeptideIndex:
+    """ Index of peptide masses of a proteome digested by trypsin (see digest) for matching observed masses.
+    All proteins are concatenated into one byte buffer, masses of all peptides are differences of prefix sums
+        of residue masses, so the digestion takes a few vectorized operations for the whole proteome.
+        Masses are sorted, so all peptides within the tolerance of any number of observed masses are found
+        by two numpy.searchsorted calls. Peptides with unknown residues (e.g. X) are skipped.
+    The index can be saved to the folder and loaded with memory mapping, like aug.seq.fm_index.FMIndex.
+    >>> index = PeptideIndex([("p1", "MKWVTRPFISLLKAR"), ("p2", "GGKAR")], missed_cleavages=1, min_length=2)
+    >>> queries, peptides = index.search([1358.8, 245.14], tolerance=0.02)
+    >>> queries.tolist()
+    [0, 1, 1]
+    >>> [found[:3] for found in index.peptides(peptides)]
+    [('p1', 2, 'WVTRPFISLLK'), ('p1', 13, 'AR'), ('p2', 3, 'AR')]
+    """
+
+    def __init__(self, records: Iterable[Tuple[str, str]], missed_cleavages: int = 1, min_length: int = 6,
+                 max_length: Union[int, None] = 50):
+        """
+        :param records: pairs of (id, protein) e.g. from fasta_file_iter
+        :param missed_cleavages: maximal number of missed cleavage sites inside a peptide
+        :param min_length: shorter peptides are skipped
+        :param max_length: longer peptides are skipped, None for no limit
+        """
+        self.ids = []
+        proteins = []
+        for id, protein in records:
+            self.ids.append(id)
+            proteins.append(protein.encode("ascii"))
+        lengths = np.array([len(protein) for protein in proteins], dtype=np.int64)
+        self.protein_starts = np.cumsum(lengths) - lengths
+        self.text = np.frombuffer(b"".join(proteins), dtype=np.uint8)
+        starts, ends = _digest(self.text, self.protein_starts, missed_cleavages, min_length, max_length)
+        residues = _RESIDUE_MASSES[self.text]
+        # NaN would spoil all later prefix sums, so unknown residues are counted separately
+        unknown = np.concatenate(([0], np.cumsum(np.isnan(residues))))
+        known = unknown[ends] == unknown[starts]
+        prefix = np.concatenate(([0.0], np.cumsum(np.nan_to_num(residues))))
+        masses = prefix[ends] - prefix[starts] + WATER_MASS
+        order = np.argsort(masses[known], kind="stable")
+        self.masses = masses[known][order]
+        self.starts = starts[known][order]
+        self.lengths = (ends - starts)[known][order].astype(np.int32)
+        self.proteins = (np.searchsorted(self.protein_starts, self.starts, side="right") - 1).astype(np.int32)
+
+    @classmethod
+    def from_fasta(cls, fasta_file_path: str, **kwargs) -> "PeptideIndex":
+        """ Build index for all records of fasta file, see PeptideIndex.__init__ for the parameters. """
+        return cls(fasta_file_iter(fasta_file_path), **kwargs)
+
+    def __len__(self):
+        return len(self.masses)
+
+    def peptide(self, index: int) -> str:
+        """ The sequence of the peptide by its index in the mass index. """
+        start = int(self.starts[index])
+        return self.text[start:start + int(self.lengths[index])].tobytes().decode("ascii")
+
+    def peptides(self, indexes: Iterable[int]) -> List[Tuple[str, int, str, float]]:
+        """ Describe peptides found by search.
+        :return: list of (protein id, 0-based position in the protein, peptide, mass) for every index
+        """
+        result = []
+        for index in np.asarray(indexes, dtype=np.int64).tolist():
+            protein = int(self.proteins[index])
+            result.append((self.ids[protein], int(self.starts[index] - self.protein_starts[protein]),
+                           self.peptide(index), float(self.masses[index])))
+        return result
+
+    def search(self, masses: Union[float, Iterable[float]], tolerance: float = 0.02,
+               ppm: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """ Find all peptides with mass within the tolerance of the observed masses.
+        :param masses: observed (neutral) masses
+        :param tolerance: absolute tolerance in daltons or in parts per million if ppm
+        :param ppm: if True the tolerance is relative
+        :return: (indexes of queries, indexes of peptides) of all matches, ordered by query and peptide mass
+        """
+        masses = np.atleast_1d(np.asarray(masses, dtype=np.float64))
+        delta = masses * tolerance * 1e-6 if ppm else np.full(len(masses), tolerance)
+        lo = np.searchsorted(self.masses, masses - delta, side="left")
+        hi = np.searchsorted(self.masses, masses + delta, side="right")
+        counts = hi - lo
+        queries = np.repeat(np.arange(len(masses)), counts)
+        peptides = np.repeat(lo, counts) + np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+        return queries, peptides
+
+    def save(self, folder: str):
+        """ Save the index to the folder, arrays are saved in .npy format to be loaded with memory mapping. """
+        os.makedirs(folder, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(os.path.join(folder, name + ".npy"), getattr(self, name))
+        with open(os.path.join(folder, "index.json"), "w") as file:
+            json.dump({"ids": self.ids}, file)
+
+    @classmethod
+    def load(cls, folder: str, mmap_mode: Union[str, None] = "r") -> "PeptideIndex":
+        """ Load the index saved by save method.
+        :param folder: the folder with saved index
+        :param mmap_mode: see numpy.load, by default arrays are memory mapped and not read into memory
+        """
+        result = cls.__new__(cls)
+        for name in _ARRAYS:
+            setattr(result, name, np.load(os.path.join(folder, name + ".npy"), mmap_mode=mmap_mode))
+        with open(os.path.join(folder, "index.json")) as file:
+            result.ids = json.load(file)["ids"]
+        return result
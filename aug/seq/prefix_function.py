@@ -0,0 +1,129 @@
+from typing import Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from aug.data.fasta import fasta_file_chunk_iter
+
+
+def prefix_function(s: str) -> np.ndarray:
+    """ Prefix function (failure array) of the string computed by Knuth–Morris–Pratt algorithm in linear time.
+        result[k] is the length of the longest proper prefix of s[:k + 1] which is also its suffix.
+        https://en.wikipedia.org/wiki/Knuth%E2%80%93Morris%E2%80%93Pratt_algorithm
+    :param s: string to compute prefix function from
+    :return: numpy int32 array with the same length as s
+    >>> prefix_function("CAGCATGGTATCACAGCAGAG").tolist()
+    [0, 0, 0, 1, 2, 0, 0, 0, 0, 0, 0, 1, 2, 1, 2, 3, 4, 5, 3, 0, 0]
+    """
+    result = [0] * len(s)
+    for i in range(1, len(s)):
+        k = result[i - 1]
+        while k and s[i] != s[k]:
+            k = result[k - 1]
+        if s[i] == s[k]:
+            k += 1
+        result[i] = k
+    return np.array(result, dtype=np.int32)
+
+
+def z_function(s: str) -> np.ndarray:
+    """ Z-function of the string computed in linear time.
+        result[k] is the length of the longest common prefix of s and s[k:], by convention result[0] = len(s).
+    :param s: string to compute z-function from
+    :return: numpy int32 array with the same length as s
+    >>> z_function("AAACAAAA").tolist()
+    [8, 2, 1, 0, 3, 3, 2, 1]
+    """
+    n = len(s)
+    result = [0] * n
+    if n:
+        result[0] = n
+    left, right = 0, 0
+    for i in range(1, n):
+        k = min(right - i, result[i - left]) if i < right else 0
+        while i + k < n and s[k] == s[i + k]:
+            k += 1
+        if i + k > right:
+            left, right = i, i + k
+        result[i] = k
+    return np.array(result, dtype=np.int32)
+
+
+class StreamingSearcher:
+    """ Exact pattern search over a stream of chunks.
+    The state of Knuth–Morris–Pratt automaton is kept between calls of feed, so the matches crossing the boundaries
+        of chunks are found and the text is never loaded into memory at once.
+    >>> searcher = StreamingSearcher("ATAT")
+    >>> searcher.feed("GATA")
+    []
+    >>> searcher.feed("TATGCATATACTT")
+    [1, 3, 9]
+    """
+
+    def __init__(self, pattern: str):
+        if not pattern:
+            raise ValueError("Pattern should be non empty string.")
+        self.pattern = pattern
+        self._failure = prefix_function(pattern).tolist()
+        self.reset()
+
+    def reset(self):
+        """ Start a new stream. """
+        self._state = 0
+        self.position = 0  # number of letters processed in the current stream
+
+    def feed(self, chunk: str) -> List[int]:
+        """ Process the next part of the stream.
+        :param chunk: the next part of the text
+        :return: 0-based positions (from the beginning of the stream) of all matches ending in this chunk
+        """
+        pattern = self.pattern
+        failure = self._failure
+        length = len(pattern)
+        state = self._state
+        result = []
+        for index, letter in enumerate(chunk, self.position - length + 1):
+            while state and pattern[state] != letter:
+                state = failure[state - 1]
+            if pattern[state] == letter:
+                state += 1
+                if state == length:
+                    result.append(index)
+                    state = failure[state - 1]
+        self._state = state
+        self.position += len(chunk)
+        return result
+
+
+def search_stream(chunks: Iterable[str], pattern: str, zero_based: bool = True) -> Iterator[int]:
+    """ returns indexes of all occurrences of pattern in the text given by its parts.
+    :param chunks: consecutive parts of the text
+    :param pattern: the substring to search
+    :param zero_based: if False will return indexes starting with 1 instead of 0.
+    :return: generator of indexes of all occurrences of pattern
+    >>> list(search_stream(["GATATA", "TGCATATACTT"], "ATAT", zero_based=False))
+    [2, 4, 10]
+    """
+    shift = 0 if zero_based else 1
+    searcher = StreamingSearcher(pattern)
+    for chunk in chunks:
+        for index in searcher.feed(chunk):
+            yield index + shift
+
+
+def search_fasta(fasta_file_path: str, pattern: str, zero_based: bool = True,
+                 chunk_size: int = 1 << 16) -> Iterator[Tuple[str, int]]:
+    """ returns indexes of all occurrences of pattern in every record of fasta file,
+        records are read by chunks, so they can be of any size.
+    :param fasta_file_path: path to file with sequences in fasta format
+    :param pattern: the substring to search
+    :param zero_based: if False will return indexes starting with 1 instead of 0.
+    :param chunk_size: approximate number of letters read at once
+    :return: generator of (record_id, index)
+    """
+    shift = 0 if zero_based else 1
+    searcher = StreamingSearcher(pattern)
+    for id, chunk, is_first in fasta_file_chunk_iter(fasta_file_path, chunk_size):
+        if is_first:
+            searcher.reset()
+        for index in searcher.feed(chunk):
+            yield id, index + shift
@@ -0,0 +1,102 @@
+import math
+from typing import Iterable, List, Tuple, Union
+
+import numpy as np
+
+from aug.seq.seq import monoisotopic_mass_table, protein_n_codons_table, STOP_CODON
+
+AMINO_ACIDS = "".join(sorted(monoisotopic_mass_table))
+_UNKNOWN = len(AMINO_ACIDS)
+_CODES = np.full(256, _UNKNOWN, dtype=np.int64)
+_CODES[np.frombuffer(AMINO_ACIDS.encode("ascii"), dtype=np.uint8)] = np.arange(len(AMINO_ACIDS))
+_MASSES = np.array([monoisotopic_mass_table[letter] for letter in AMINO_ACIDS])
+_N_CODONS = np.array([protein_n_codons_table[letter] for letter in AMINO_ACIDS], dtype=np.int64)
+
+
+def pack_proteins(proteins: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """ Concatenate proteins into one byte buffer.
+    :return: (uint8 buffer, int64 offsets), the i-th protein is buffer[offsets[i]:offsets[i + 1]]
+    >>> buffer, offsets = pack_proteins(["MA", "", "GW"])
+    >>> buffer.tobytes(), offsets.tolist()
+    (b'MAGW', [0, 2, 2, 4])
+    """
+    proteins = [protein.encode("ascii") for protein in proteins]
+    lengths = np.array([len(protein) for protein in proteins], dtype=np.int64)
+    return np.frombuffer(b"".join(proteins), dtype=np.uint8), np.concatenate(([0], np.cumsum(lengths)))
+
+
+def _residue_codes(buffer: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    codes = _CODES[buffer[:offsets[-1]]]
+    if (codes == _UNKNOWN).any():
+        raise ValueError(f"Proteins should contain only {AMINO_ACIDS}.")
+    return codes
+
+
+def protein_masses(buffer: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """ Monoisotopic masses of all proteins like aug.seq.seq.calculate_protein_mass.
+        Residue masses are looked up for the whole buffer and summed by one np.add.reduceat over the proteins.
+    :param buffer: concatenated proteins, see pack_proteins
+    :param offsets: start of every protein and the end of the last one
+    :return: float64 array of masses
+    >>> protein_masses(*pack_proteins(["SKADYEK", "", "G"])).round(3).tolist()
+    [821.392, 0.0, 57.021]
+    """
+    masses = _MASSES[_residue_codes(buffer, offsets)]
+    starts = np.asarray(offsets[:-1])
+    # reduceat returns an element instead of 0 for empty ranges, so they are skipped
+    non_empty = starts < offsets[1:]
+    result = np.zeros(len(starts))
+    if len(masses):
+        result[non_empty] = np.add.reduceat(masses, starts[non_empty])
+    return result
+
+
+def protein_compositions(buffer: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """ Amino acid composition of all proteins.
+    :param buffer: concatenated proteins, see pack_proteins
+    :param offsets: start of every protein and the end of the last one
+    :return: (number of proteins x 20) int64 array, columns are ordered as AMINO_ACIDS
+    >>> protein_compositions(*pack_proteins(["AAC", "Y"])).sum(axis=1).tolist()
+    [3, 1]
+    """
+    n = len(offsets) - 1
+    codes = _residue_codes(buffer, offsets)
+    proteins = np.repeat(np.arange(n), np.diff(offsets))
+    return np.bincount(proteins * len(AMINO_ACIDS) + codes, minlength=n * len(AMINO_ACIDS)).reshape(n, -1)
+
+
+def _power_modulo(bases: np.ndarray, exponents: np.ndarray, modulo: int) -> np.ndarray:
+    """ bases ** exponents % modulo elementwise by repeated squaring, modulo should be less than 2 ** 31 """
+    result = np.ones(exponents.shape, dtype=np.int64)
+    bases = np.broadcast_to(bases % modulo, exponents.shape).astype(np.int64)
+    exponents = exponents.copy()
+    while exponents.any():
+        odd = (exponents & 1).astype(bool)
+        result[odd] = result[odd] * bases[odd] % modulo
+        bases = bases * bases % modulo
+        exponents >>= 1
+    return result
+
+
+def n_reverse_translations(buffer: np.ndarray, offsets: np.ndarray,
+                           modulo: Union[int, None] = 10 ** 6) -> Union[np.ndarray, List[int]]:
+    """ Number of RNA strings (with the stop codon) which could be translated into every protein,
+        like aug.seq.seq.n_reverse_translation. It's the product of numbers of codons of all residues, so it's
+        computed from the composition: the product of n_codons[a] ** count[a] over amino acids a.
+    :param buffer: concatenated proteins, see pack_proteins
+    :param offsets: start of every protein and the end of the last one
+    :param modulo: the result is taken by this modulo (less than 2 ** 31), None for exact values
+    :return: int64 array of numbers modulo, or list of Python integers if modulo is None
+    >>> n_reverse_translations(*pack_proteins(["MA", "W"])).tolist()
+    [12, 3]
+    """
+    compositions = protein_compositions(buffer, offsets)
+    stop = protein_n_codons_table[STOP_CODON]
+    if modulo is None:
+        return [stop * math.prod(n ** count for n, count in zip(_N_CODONS.tolist(), row))
+                for row in compositions.tolist()]
+    factors = _power_modulo(_N_CODONS, compositions, modulo)
+    result = np.full(len(compositions), stop % modulo, dtype=np.int64)
+    for column in factors.T:
+        result = result * column % modulo
+    return result
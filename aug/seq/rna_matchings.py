@@ -0,0 +1,95 @@
+import math
+from typing import Union
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from aug.seq.encoding import encode_dna, WATSON_CRICK_PAIRS
+
+MODULO = 10 ** 6
+
+
+def perfect_matchings(rna: str, modulo: Union[int, None] = MODULO) -> int:
+    """ Number of perfect matchings of Watson-Crick base pairs (pairs can cross), every base should be paired.
+        Every A is matched with some U and every C with some G, so it's |A|! * |C|! if |A| = |U| and |C| = |G|.
+    :param rna: rna string
+    :param modulo: the result is taken by this modulo, None for the exact value
+    >>> perfect_matchings("AGCUAGUCAU")
+    12
+    """
+    if rna.count("A") != rna.count("U") or rna.count("C") != rna.count("G"):
+        return 0
+    result = math.factorial(rna.count("A")) * math.factorial(rna.count("C"))
+    return result if modulo is None else result % modulo
+
+
+def noncrossing_perfect_matchings(rna: str, pairs: np.ndarray = WATSON_CRICK_PAIRS, min_size: int = 0,
+                                  modulo: Union[int, None] = MODULO) -> int:
+    """ Number of noncrossing perfect matchings of base pairs (RNA secondary structures where every base is paired).
+        count[i, j] for rna[i:j] is the sum over bases k paired with i of count[i + 1, k] * count[k + 1, j].
+    :param rna: rna string
+    :param pairs: base pairing lookup by codes of aug.seq.encoding.encode_dna, e.g. WATSON_CRICK_PAIRS or WOBBLE_PAIRS
+    :param min_size: minimal number of bases between the paired ones
+    :param modulo: the result is taken by this modulo, None for the exact value (slower)
+    >>> noncrossing_perfect_matchings("AUAU")
+    2
+    """
+    return _count_matchings(rna, pairs, min_size, modulo, perfect=True)
+
+
+def motzkin_matchings(rna: str, pairs: np.ndarray = WATSON_CRICK_PAIRS, min_size: int = 0,
+                      modulo: Union[int, None] = MODULO) -> int:
+    """ Number of noncrossing matchings of base pairs (not necessary perfect, the empty matching is counted too).
+        count[i, j] for rna[i:j] is count[i + 1, j] (i is unpaired)
+        plus the sum over bases k paired with i of count[i + 1, k] * count[k + 1, j].
+        https://en.wikipedia.org/wiki/Motzkin_number
+    :param rna: rna string
+    :param pairs: base pairing lookup by codes of aug.seq.encoding.encode_dna, e.g. WATSON_CRICK_PAIRS or WOBBLE_PAIRS
+    :param min_size: minimal number of bases between the paired ones
+    :param modulo: the result is taken by this modulo, None for the exact value (slower)
+    >>> motzkin_matchings("AUAU")
+    7
+    >>> from aug.seq.encoding import WOBBLE_PAIRS
+    >>> motzkin_matchings("AUGCUAGUACGGAGCGAGUCUAGCGAGCGAUGUCGUGAGUACUAUAUAUGCGCAUAAGCCACGU",
+    ...                   pairs=WOBBLE_PAIRS, min_size=3, modulo=None)
+    284850219977421
+    """
+    return _count_matchings(rna, pairs, min_size, modulo, perfect=False)
+
+
+def _count_matchings(rna: str, pairs: np.ndarray, min_size: int, modulo: Union[int, None], perfect: bool) -> int:
+    """ Interval dynamic programming over all substrings rna[i:i + length] by increasing length.
+        Tables are stored in two skewed layouts: by_start[i, length] = count[i, i + length] and
+        by_end[j, length] = count[j - length, j], so the sum over all k for all intervals of one length
+        is one vectorized reduction over two array slices.
+        int64 tables are used with modulo (products of two values less than modulo should fit into int64),
+        Python integers in object arrays otherwise.
+    """
+    codes = encode_dna(rna)
+    n = len(codes)
+    dtype = object if modulo is None else np.int64
+    by_start = np.zeros((n + 1, n + 1), dtype=dtype)
+    by_end = np.zeros((n + 1, n + 1), dtype=dtype)
+    by_start[:, 0] = 1  # empty substrings
+    by_end[:, 0] = 1
+    first = min_size + 1  # the smallest distance between paired bases
+    if perfect and not first % 2:
+        first += 1  # there should be even number of bases between paired ones
+    for length in range(1, n + 1):
+        m = n - length + 1  # number of intervals
+        counts = by_start[1:m + 1, length - 1].copy() if not perfect else np.zeros(m, dtype=dtype)
+        if length > first and not (perfect and length % 2):
+            # k = i + distance is paired with i
+            distances = np.arange(first, length, 2 if perfect else 1)
+            paired = pairs[codes[:m, np.newaxis], sliding_window_view(codes, length)[:m, distances]]
+            inside = by_start[1:m + 1, distances - 1]
+            outside = by_end[length:, length - 1 - distances]
+            products = inside * outside
+            if modulo is not None:
+                products %= modulo
+            counts += np.where(paired, products, 0).sum(axis=1)
+        if modulo is not None:
+            counts %= modulo
+        by_start[:m, length] = counts
+        by_end[length:, length] = counts
+    return int(by_start[0, n])
@@ -1,10 +1,8 @@
 import itertools
-import math
-import bisect
 import re
-from collections import Counter, defaultdict
+from collections import Counter, defaultdict, deque
 from functools import lru_cache
-from typing import List, Union, Dict, Tuple, Collection, Callable
+from typing import List, Union, Dict, Tuple, Collection, Callable, Iterable, Iterator
 
 import numpy as np
 from graphviz import Digraph, Graph
@@ -12,6 +10,10 @@ from scipy.special import comb
 
 from aug.data.fasta import fasta_file_iter
 from aug.seq import alignments
+from aug.helpers.parallel import chunks, parallel_map
+from aug.seq.encoding import encode_dna, AMBIGUOUS_CODE, WATSON_CRICK_PAIRS
+from aug.seq.prefix_function import prefix_function
+from aug.seq.suffix_array import SuffixArray
 
 complement_map = {"A": "T", "C": "G", "G": "C", "T": "A"}
 rna_complement_map = {"A": "U", "C": "G", "G": "C", "U": "A"}
@@ -80,6 +82,9 @@ monoisotopic_mass_table = {
 }
 
 inverted_monoisotopic_mass = sorted(((value, key) for key, value in monoisotopic_mass_table.items()))
+_RESIDUE_MASSES = np.array([mass for mass, _ in inverted_monoisotopic_mass])
+_RESIDUE_LETTERS = np.frombuffer("".join(letter for _, letter in inverted_monoisotopic_mass).encode("ascii"),
+                                 dtype=np.uint8)
 
 #  https://web.archive.org/web/19991011081928/http://www.embl-heidelberg.de/%7Evogt/matrices/blosum62.cmp
 blosum62 = \
@@ -393,7 +398,8 @@ def profile(dna: Union[list, tuple, str], update: Union[list, None]=None) -> dic
     """
     Function takes a list of strings DNA as input and returns the profile matrix (as a dictionary of lists).
     :param dna: a list of strings (or just one string) which represent a genome part
-    :param update: a dict to update values (e.g. for separated calculations), None to generate new dict
+    :param update: a dict to update values (e.g. for separated calculations), None to generate new dict.
+        Counts are added into its lists in place and the same dict is returned.
     :return: dictionary where keys are A, C, G, T and values are list with their occurrences in patterns
         on that index.
     :example:
@@ -401,37 +407,88 @@ def profile(dna: Union[list, tuple, str], update: Union[list, None]=None) -> dic
     {'A': [1, 2, 1, 0, 0, 2], 'C': [2, 1, 4, 2, 0, 0], 'G': [1, 1, 0, 2, 1, 1], 'T': [1, 1, 0, 1, 4, 2]}
     """
     dnas = dna if isinstance(dna, list) or isinstance(dna, tuple) else (dna,)
-    k = len(dnas[0])
-    update = update if update else {letter: [0] * k for letter in "ACGT"}
-    for i in range(k):
-        for motif in dnas:
-            update[motif[i]][i] += 1
+    counts = profile_counts(dna_matrix(dnas))
+    if not update:
+        return profile_to_dict(counts)
+    counts += np.array([update[letter] for letter in "ACGT"], dtype=np.int64)
+    for letter, row in zip("ACGT", counts.tolist()):
+        update[letter][:] = row
     return update
 
 
-def consensus(dnas: Union[list, None]=None, precalculated_profile: Union[Dict[str, list], None]=None) -> str:
+def dna_matrix(dnas: Collection[str]) -> np.ndarray:
+    """ Encode strings of the same length k (e.g. aligned motifs or reads) as (len(dnas) x k) uint8 matrix
+        by aug.seq.encoding.encode_dna.
+    >>> dna_matrix(["ACG", "TTN"]).tolist()
+    [[0, 1, 2], [3, 3, 4]]
+    """
+    dnas = list(dnas)
+    k = len(dnas[0]) if dnas else 0
+    if any(len(dna) != k for dna in dnas):
+        raise ValueError("All strings should have the same length.")
+    return encode_dna("".join(dnas)).reshape(len(dnas), k)
+
+
+def profile_counts(matrix: np.ndarray) -> np.ndarray:
+    """ Profile of (n x k) matrix made by dna_matrix as (4 x k) int64 array of occurrences of A, C, G, T
+        in every column, ambiguous letters are not counted. All cells are counted by one np.bincount.
+        Profiles of parts of the strings (e.g. calculated by parallel workers) are merged by summation.
+    >>> profile_counts(dna_matrix(["ACG", "TTN"])).tolist()
+    [[1, 0, 0], [0, 1, 0], [0, 0, 1], [1, 1, 0]]
+    """
+    n, k = matrix.shape
+    cells = matrix.astype(np.int64) * k + np.arange(k)
+    return np.bincount(cells.ravel(), minlength=(AMBIGUOUS_CODE + 1) * k).reshape(-1, k)[:AMBIGUOUS_CODE]
+
+
+def _fasta_chunk_profile(dnas: List[str]) -> np.ndarray:
+    return profile_counts(dna_matrix(dnas))
+
+
+def profile_fasta(fasta_file_path: str, chunk_size: int = 1 << 14, n_jobs: Union[int, None] = 1) -> np.ndarray:
+    """ Profile of all records of fasta file (all records should have the same length).
+        Records are read by chunks of chunk_size records, profiles of the chunks are calculated
+        in n_jobs processes and merged. Chunks are read as workers need them (see parallel_map),
+        so only about 2 * n_jobs chunks are in memory at once.
+    :param fasta_file_path: path to file with dna in fasta format
+    :param chunk_size: number of records processed at once
+    :param n_jobs: number of processes, None for the number of processors
+    :return: (4 x k) array of occurrences of A, C, G, T, see profile_counts
+    """
+    records = chunks((dna for _, dna in fasta_file_iter(fasta_file_path)), chunk_size)
+    result = None
+    for counts in parallel_map(_fasta_chunk_profile, records, n_jobs=n_jobs):
+        if result is not None and result.shape != counts.shape:
+            raise ValueError("All records should have the same length.")
+        result = counts if result is None else result + counts
+    return result if result is not None else np.zeros((AMBIGUOUS_CODE, 0), dtype=np.int64)
+
+
+def profile_to_dict(counts: np.ndarray) -> Dict[str, list]:
+    """ Convert (4 x k) profile array to the dictionary returned by profile. """
+    return {letter: row for letter, row in zip("ACGT", counts.tolist())}
+
+
+def consensus(dnas: Union[list, None]=None, precalculated_profile: Union[Dict[str, list], np.ndarray, None]=None) -> str:
     """
     Form a consensus string, from the most popular nucleotides in each column of the motif matrix
         (ties are broken arbitrarily). If we select Motifs correctly from the collection of upstream regions,
         then Consensus(Motifs) provides a candidate regulatory motif for these regions.
     :param dnas: A set of kmers.
+    :param precalculated_profile: profile dictionary returned by profile or (4 x k) array returned by profile_counts
     :return: A consensus string of dnas.
     :example:
     >>> consensus(("AACGTA","CCCGTT","CACCTT","GGATTA","TTCCGG"))
     'CACCTA'
     """
-    k = len(dnas[0]) if dnas else len(precalculated_profile["A"])
-    count = precalculated_profile if precalculated_profile else profile(dnas)
-    consensus = ""
-    for j in range(k):
-        m = 0
-        frequentSymbol = ""
-        for symbol in "ACGT":
-            if count[symbol][j] > m:
-                m = count[symbol][j]
-                frequentSymbol = symbol
-        consensus += frequentSymbol
-    return consensus
+    if precalculated_profile is None:
+        counts = profile_counts(dna_matrix(dnas))
+    elif isinstance(precalculated_profile, dict):
+        counts = np.array([precalculated_profile[letter] for letter in "ACGT"])
+    else:
+        counts = np.asarray(precalculated_profile)
+    letters = np.frombuffer(b"ACGT", dtype=np.uint8)[np.argmax(counts, axis=0)]
+    return letters[counts.max(axis=0, initial=0) > 0].tobytes().decode("ascii")
 
 
 def n_reverse_translation(protein: str, modulo: Union[int, None]=None):
@@ -455,23 +512,85 @@ def find_reverse_palindromes(dna: str, min_len: int=4, max_len: int=12, zero_bas
     :param zero_based: if true return indexes starting with 0, or starting with 1, if false
     :return: The position and length of every reverse palindrome in the string having length between min_len and
         max_len.
+    >>> find_reverse_palindromes("TCAATGCATGCGGGTCTATATGCAT", zero_based=False)
+    [(4, 6), (5, 4), (6, 6), (7, 4), (17, 4), (18, 4), (20, 6), (21, 4)]
     """
-    def helper_for_non_zero_based(indexes: List[Tuple[int, int]]):
-        if not zero_based:
-            return [(i + 1, l) for i, l in indexes]
-        else:
-            return indexes
+    shift = 0 if zero_based else 1
+    return [(i + shift, l) for i, l in reverse_palindromes_iter(dna, min_len, max_len)]
 
-    length = len(dna)
-    result = []
-    for i in range(length):
-        for l in range(min(min_len, length - i), min(max_len + 1, length - i + 1)):
-            if l > max_len or l < min_len:
-                continue
-            sub_dna = dna[i: i + l]
-            if sub_dna == reverse_complement(sub_dna):
-                result.append((i, l))
-    return helper_for_non_zero_based(result)
+
+def reverse_palindromes_iter(dna: Union[str, Iterable[str]], min_len: int=4, max_len: int=12):
+    """ Generator of the position (0-based) and length of every reverse palindrome in dna having length between
+        min_len and max_len, ordered by position and then by length.
+        Radii of maximal reverse palindromes around every even center (reverse palindrome can't have odd length)
+        are found in linear time by Manacher's algorithm, so only O(max_len) letters are kept in memory and dna
+        can be passed as an iterable of chunks, e.g. lines of a genome file.
+    :param dna: A DNA string or an iterable of its parts
+    :param min_len: minimal length of reversed palindrome to search
+    :param max_len: maximal length of reversed palindrome to search
+    :return: generator of (position, length)
+    >>> list(reverse_palindromes_iter(["TCAATGCA", "TGCGG"], max_len=6))
+    [(3, 6), (4, 4), (5, 6), (6, 4)]
+    """
+    min_radius = max(1, (min_len + 1) // 2)
+    max_radius = max_len // 2
+    if max_radius < min_radius:
+        return
+    start = 0
+    radii = deque()  # radii[i] is the radius around center start + i + 1
+    for _, radius in _reverse_palindrome_radii(dna, max_radius):
+        radii.append(radius)
+        if len(radii) == max_radius:
+            yield from _reverse_palindromes_from(start, radii, min_radius)
+            radii.popleft()
+            start += 1
+    while radii:
+        yield from _reverse_palindromes_from(start, radii, min_radius)
+        radii.popleft()
+        start += 1
+
+
+def _reverse_palindromes_from(start: int, radii: deque, min_radius: int):
+    for radius in range(min_radius, len(radii) + 1):
+        if radii[radius - 1] >= radius:
+            yield start, 2 * radius
+
+
+def _reverse_palindrome_radii(dna: Union[str, Iterable[str]], max_radius: int):
+    """ Manacher's algorithm for reverse palindromes.
+    :return: generator of (center, radius) where dna[center - radius:center + radius] is the longest reverse
+        palindrome around center (but not longer than 2 * max_radius)
+    """
+    parts = iter((dna, )) if isinstance(dna, str) else iter(dna)
+    buffer = ""
+    offset = 0  # position of buffer[0] in dna
+    exhausted = False
+    radii = deque(maxlen=2 * max_radius + 1)  # radii of previous centers, enough to get the mirrored one
+    center, right = 0, 0  # the palindrome reaching the furthest to the right
+    for current in itertools.count(1):
+        while not exhausted and offset + len(buffer) < current + max_radius:
+            chunk = next(parts, None)
+            if chunk is None:
+                exhausted = True
+            else:
+                buffer += chunk.strip()
+        end = offset + len(buffer)
+        if current >= end:
+            break
+        radius = 0
+        if current < right:
+            mirror = 2 * center - current
+            radius = min(radii[mirror - current + len(radii)], right - current)
+        while radius < max_radius and radius < current and current + radius < end \
+                and complement_map.get(buffer[current - radius - 1 - offset]) == buffer[current + radius - offset]:
+            radius += 1
+        if current + radius > right:
+            center, right = current, current + radius
+        radii.append(radius)
+        yield current, radius
+        if current - offset > 2 * max_radius + 4096:  # drop letters which can't be a part of next palindromes
+            buffer = buffer[current - max_radius - offset:]
+            offset = current - max_radius
 
 
 def bernul(n, k, p):
@@ -527,6 +646,7 @@ def adjacency_list(fasta_file_path:str, k:int=3, prefixes:Union[str, None]=None,
         by a node, and string s is connected to string t with a directed edge when there is a length k suffix of s
         that matches a length k prefix of t, as long as s !=t;
         we demand s != t to prevent directed loops in the overlap graph (although directed cycles may be present).
+    For all overlaps of length at least k see aug.seq.overlap_graph.overlaps.
     :param fasta_file_path: path to file with dna in fasta format
     :param k: length of prefixes and suffixes
     :param prefixes: precalculated prefixes or None
@@ -547,41 +667,43 @@ def adjacency_list(fasta_file_path:str, k:int=3, prefixes:Union[str, None]=None,
     return result
 
 
-def dna_probability(dna:str, gc:float, return_log=False) -> float:
+def dna_probability(dna: str, gc: Union[float, List[float], np.ndarray],
+                    return_log=False) -> Union[float, np.ndarray]:
     """ For giving dna string and probability of g or c nucleotide return probability of that string or log base 10
     of that probability if return_log is set to True.
+        Letters are counted once by np.bincount, the probability is |GC| * log10(gc / 2) + |AT| * log10((1 - gc) / 2) in log space,
+        so it's evaluated for all gc values at once and never underflows for long sequences (with return_log).
     :param dna: dna string
-    :param gc: probability of g or c nucleotide (gc-rate)
+    :param gc: probability of g or c nucleotide (gc-rate) or array of gc-rates
     :param return_log: set true if you want to get log base 10 of probability
-    :return: probability of giving dna string or log base 10 of probability
+    :return: probability of giving dna string or log base 10 of probability, array if gc is array
     >>> result = dna_probability("ACGATACAA", 0.287)
     >>> round(result, 9)
     6.066e-06
     >>> result = dna_probability("ACGATACAA", 0.287, return_log=True)
     >>> round(result, 3)
     -5.217
+    >>> dna_probability("AGCATT" * 1000, [0.25, 0.5], return_log=True).round(1).tolist()
+    [-3510.1, -3612.4]
     """
-    at = (1 - gc) / 2.0
-    gc /= 2.0
-
-    p = 1
-    for l in dna:
-        if l in "AT":
-            p *= at
-        elif l in "CG":
-            p *= gc
-        else:
-            raise ValueError("You should use dna string.")
-    if return_log:
-        return math.log(p, 10)
-    else:
-        return p
+    counts = np.bincount(np.frombuffer(dna.encode("ascii", "replace"), dtype=np.uint8), minlength=256)
+    n_gc = int(counts[ord("C")] + counts[ord("G")])
+    n_at = int(counts[ord("A")] + counts[ord("T")])
+    if n_gc + n_at != len(dna):
+        raise ValueError("You should use dna string.")
+    gc = np.asarray(gc, dtype=np.float64)
+    with np.errstate(divide="ignore"):
+        # 0 * log(0) is nan, letters which are absent don't change the probability
+        result = (n_gc * np.log10(gc / 2) if n_gc else 0.0) + (n_at * np.log10((1 - gc) / 2) if n_at else 0.0)
+    result = result if return_log else 10 ** result
+    return float(result) if np.ndim(result) == 0 else result
 
 
 def find_spliced_motif(dna: str, motif: str, zero_based=True) -> Union[List[int], int]:
     """ Returns the the positions of a subsequence(motif) in the string dna at which the symbols of the subsequence
         appear.
         E.g. the indices of ACG in TATGCTAAGATC can be represented by (2, 5, 9).
+        For many motifs in the same sequence use aug.seq.subsequence.SubsequenceIndex.
     :param dna: dna string
     :param motif: subsequence to search
     :param zero_based: if false will return indexes starting with 1 instead of 0.
@@ -729,22 +851,16 @@ def failure_array(dna: str) -> List[int]:
         of the longest substring s[j:k] that is equal to some prefix s[0:k−j], where j cannot equal 1
         (otherwise, P[k] would always equal k). By convention, P[0]=0.
     :param dna: string to compute failure array from
-    :return: computed failure array
+    :return: computed failure array, see prefix_function for the linear time numpy version
     >>> failure_array("CAGCATGGTATCACAGCAGAG")
     [0, 0, 0, 1, 2, 0, 0, 0, 0, 0, 0, 1, 2, 1, 2, 3, 4, 5, 3, 0, 0]
     >>> failure_array("AAAAA")
     [0, 1, 2, 3, 4]
     """
-    result = [0] * len(dna)
-    for i in range(1, len(dna)):
-        for prev in range(result[i - 1], -1, -1):
-            if dna[:prev + 1] == dna[i - prev:i + 1]:
-                result[i] = prev + 1
-                break
-    return result
+    return prefix_function(dna).tolist()
 
 
-def prefix_spectrum(spectrum: List[float]):
+def prefix_spectrum(spectrum: Union[List[float], np.ndarray]) -> str:
     """ The prefix spectrum of a weighted string is the collection of all its prefix weights.
     :param spectrum: prefix spectrum
     :return: protein sequence, with the same prefix sequence.
@@ -752,32 +868,129 @@ def prefix_spectrum(spectrum: List[float]):
     >>> prefix_spectrum([3524.8542, 3710.9335, 3841.974, 3970.0326, 4057.0646])
     'WMQS'
     """
-    result = []
-    it = iter(spectrum)
-    next(it)
-    m = inverted_monoisotopic_mass
-    for pair in zip(spectrum, it):
-        mass = pair[1] - pair[0]
-        index = bisect.bisect_left(m, (mass, "dummy"))
-        index = index - 1 if index == len(m) or\
-                             index - 1 > 0 and abs(mass - m[index - 1][0]) < abs(mass - m[index][0]) else index
-        result.append(m[index][1])
-    return "".join(result)
+    return prefix_spectra([spectrum])[0]
 
 
-def find_protein_motif_by_shorthand(protein: str, shorthand: str):
-    shorthand = _convert_protein_shorthand_into_regex(shorthand)
-    shorthand = re.compile(shorthand)
-    result = []
-    match = shorthand.finditer(protein)
-    try:
-        while True:
-            pos = next(match).start()
-            result.append(pos)
-            match = shorthand.finditer(protein, pos + 1)
-    except StopIteration:
-        pass
-    return result
+def prefix_spectra(spectra: Iterable[Union[List[float], np.ndarray]]) -> List[str]:
+    """ Decode many prefix spectra at once: differences of consecutive masses of all spectra are decoded
+        by one vectorized call of decode_residue_masses.
+    :param spectra: prefix spectra
+    :return: protein sequence for every spectrum, see prefix_spectrum
+    >>> prefix_spectra([[3524.8542, 3710.9335, 3841.974], [57.02146, 128.05857]])
+    ['WM', 'A']
+    """
+    spectra = [np.asarray(spectrum, dtype=np.float64) for spectrum in spectra]
+    lengths = np.array([max(len(spectrum) - 1, 0) for spectrum in spectra], dtype=np.int64)
+    differences = np.concatenate([np.diff(spectrum) for spectrum in spectra] + [np.zeros(0)])
+    letters = _RESIDUE_LETTERS[decode_residue_masses(differences)].tobytes().decode("ascii")
+    ends = np.cumsum(lengths).tolist()
+    return [letters[end - length:end] for end, length in zip(ends, lengths.tolist())]
+
+
+def decode_residue_masses(masses: Union[List[float], np.ndarray]) -> np.ndarray:
+    """ Find the amino acid with the nearest monoisotopic mass for every mass by binary search in the sorted array
+        of residue masses, the heavier one is chosen for equally near masses.
+    :param masses: masses of single residues
+    :return: indexes in inverted_monoisotopic_mass
+    >>> [inverted_monoisotopic_mass[i][1] for i in decode_residue_masses([57.02, 186.1, 113.08406]).tolist()]
+    ['G', 'W', 'L']
+    """
+    masses = np.asarray(masses, dtype=np.float64)
+    upper = np.clip(np.searchsorted(_RESIDUE_MASSES, masses, side="right"), 1, len(_RESIDUE_MASSES) - 1)
+    lower = upper - 1
+    closer_upper = np.abs(_RESIDUE_MASSES[upper] - masses) <= np.abs(masses - _RESIDUE_MASSES[lower])
+    return np.where(closer_upper, upper, lower)
+
+
+def spectral_convolution(spectrum1: Union[List[float], np.ndarray], spectrum2: Union[List[float], np.ndarray],
+                         tolerance: float = 1e-5, block_size: int = 1 << 22) -> Tuple[np.ndarray, np.ndarray]:
+    """ Spectral convolution: the multiset of all differences spectrum1[i] - spectrum2[j].
+        Differences are computed by broadcasting blocks of rows of about block_size values, so the memory doesn't
+        grow with the number of pairs. Equal masses (within the tolerance) are grouped into bins of width tolerance.
+    :param spectrum1: the first spectrum (multiset of masses)
+    :param spectrum2: the second spectrum, for the self convolution pass the same spectrum
+    :param tolerance: width of bins of differences
+    :param block_size: approximate number of differences computed at once
+    :return: (mean difference of every bin in increasing order, multiplicity of the bin)
+    >>> values, counts = spectral_convolution([186.07931, 287.12699, 548.20532], [101.04768, 202.09536])
+    >>> [round(value, 5) for value in values.tolist()], counts.tolist()
+    ([-16.01605, 85.03163, 186.07931, 346.10996, 447.15764], [1, 2, 1, 1, 1])
+    """
+    spectrum1 = np.asarray(spectrum1, dtype=np.float64)
+    spectrum2 = np.asarray(spectrum2, dtype=np.float64)
+    keys, counts, sums = [np.zeros(0, dtype=np.int64)], [np.zeros(0)], [np.zeros(0)]
+    rows = max(block_size // max(len(spectrum2), 1), 1)
+    for start in range(0, len(spectrum1), rows):
+        differences = (spectrum1[start:start + rows, np.newaxis] - spectrum2[np.newaxis, :]).ravel()
+        block_keys, inverse, block_counts = np.unique(np.rint(differences / tolerance).astype(np.int64),
+                                                      return_inverse=True, return_counts=True)
+        keys.append(block_keys)
+        counts.append(block_counts)
+        sums.append(np.bincount(inverse.ravel(), weights=differences))
+    keys, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+    inverse = inverse.ravel()
+    counts = np.bincount(inverse, weights=np.concatenate(counts), minlength=len(keys)).astype(np.int64)
+    sums = np.bincount(inverse, weights=np.concatenate(sums), minlength=len(keys))
+    return sums / np.maximum(counts, 1), counts
+
+
+def max_convolution_multiplicity(spectrum1: Union[List[float], np.ndarray], spectrum2: Union[List[float], np.ndarray],
+                                 tolerance: float = 1e-5) -> Tuple[int, float]:
+    """ The largest multiplicity of the spectral convolution and the absolute value of its mass difference,
+        i.e. the shift which makes the most masses of the spectra coincide, see spectral_convolution.
+    >>> multiplicity, mass = max_convolution_multiplicity([186.07931, 287.12699, 548.20532, 580.18077, 681.22845, 706.27446, 782.27613,
+    ...     968.35544, 968.35544], [101.04768, 158.06914, 202.09536, 318.09979, 419.14747, 463.17369])
+    >>> multiplicity, round(mass, 5)
+    (3, 85.03163)
+    """
+    values, counts = spectral_convolution(spectrum1, spectrum2, tolerance)
+    if not len(counts):
+        return 0, 0.0
+    best = int(np.argmax(counts))
+    return int(counts[best]), abs(float(values[best]))
+
+
+def find_protein_motif_by_shorthand(protein: str, shorthand: str) -> List[int]:
+    """ Find all (overlapping) occurrences of the motif given by the shorthand, e.g. N{P}[ST]{P}.
+        The motif is wrapped into a lookahead, so all overlapping matches are found by one pass of finditer.
+    :param protein: protein string
+    :param shorthand: motif shorthand: [XY] is X or Y, {X} is any letter except X
+    :return: 0-based positions of all occurrences
+    >>> find_protein_motif_by_shorthand("NNTSNKTSNPS", "N{P}[ST]{P}")
+    [0, 1, 4]
+    """
+    return [match.start() for match in _compile_protein_shorthand(shorthand).finditer(protein)]
+
+
+@lru_cache(maxsize=256)
+def _compile_protein_shorthand(shorthand: str) -> re.Pattern:
+    """ Compiled lookahead regex of the shorthand, the least recently used patterns are evicted from the cache. """
+    return re.compile(f"(?={_convert_protein_shorthand_into_regex(shorthand)})")
+
+
+def _find_protein_motif_chunk(job: Tuple[List[Tuple[str, str]], str]) -> List[Tuple[str, List[int]]]:
+    records, shorthand = job
+    return [(protein_id, find_protein_motif_by_shorthand(protein, shorthand)) for protein_id, protein in records]
+
+
+def find_protein_motif_in_fasta(fasta_file_path: str, shorthand: str, chunk_size: int = 1024,
+                                n_jobs: Union[int, None] = 1,
+                                skip_empty: bool = True) -> Iterator[Tuple[str, List[int]]]:
+    """ Search the motif in all proteins of the proteome, chunks of chunk_size records are searched
+        in n_jobs processes. Chunks are read as workers need them (see parallel_map), so only about
+        2 * n_jobs chunks are in memory at once.
+    :param fasta_file_path: path to file with proteins in fasta format
+    :param shorthand: motif shorthand, see find_protein_motif_by_shorthand
+    :param chunk_size: number of records processed at once
+    :param n_jobs: number of processes, None for the number of processors
+    :param skip_empty: if True proteins without the motif are skipped
+    :return: generator of (protein id, 0-based positions) in the order of the file
+    """
+    jobs = ((records, shorthand) for records in chunks(fasta_file_iter(fasta_file_path), chunk_size))
+    for found in parallel_map(_find_protein_motif_chunk, jobs, n_jobs=n_jobs):
+        for protein_id, positions in found:
+            if positions or not skip_empty:
+                yield protein_id, positions
 
 
 def _convert_protein_shorthand_into_regex(shorthand: str):
@@ -825,50 +1038,72 @@ def transition_transversion_ratio(dna1: str, dna2: str):
     return transition / transversion
 
 
-def rna_structure_prediction(rna: str, min_size=3):
-    """
-    https://en.wikipedia.org/wiki/Nucleic_acid_structure_prediction
-    :param rna:
-    :param min_size:
-    :return:
+def rna_structure_prediction(rna: str, min_size: int = 3, score_only: bool = False):
+    """ Predict secondary structure of rna with maximal number of Watson-Crick base pairs by Nussinov algorithm.
+        https://en.wikipedia.org/wiki/Nussinov_algorithm
+    score[i, j] is the maximal number of pairs in rna[i:j + 1], it is either the pair (i, j) with score[i + 1, j - 1]
+        or the best split into rna[i:k + 1] and rna[k + 1:j + 1]. Scores are filled by diagonals (j - i = d)
+        and are stored in int32 arrays in two skewed layouts: by_start[i, d] = score[i, i + d] and
+        by_end[j, d] = score[j - d, j], so the maximum over all splits of all cells of the diagonal is one vectorized
+        reduction over two array slices.
+    :param rna: rna string
+    :param min_size: minimal number of unpaired bases in a hairpin loop
+    :param score_only: if True only the number of pairs is computed, split points are not stored
+    :return: (list of base pairs (i, j) sorted by i, number of pairs) or number of pairs if score_only is True
 
     >>> rna_structure_prediction("ACCCU")
     ([(0, 4)], 1)
     >>> rna_structure_prediction("CCCAAAGGGAAAGGGAAACCC")
-    ([(0, 8), (1, 7), (2, 6), (12, 20), (13, 19), (14, 18)], 0)
-    """
-    matrix = [[(0, 0, 0)] * len(rna) for _ in rna]
-    rna_to_int_map = dict(A=1, C=2, G=3, U=4)  # sum == 5 if complementary
-    rna_int = [rna_to_int_map[letter] for letter in rna]  # use sum instead of dictionary lookup
-    min_size += 1
-    for n in range(len(rna_int) - min_size):
-        for i in range(len(rna_int) - min_size - n):
-            j = i + min_size + n
-            m1 = max((matrix[i + 1][j][0], i + 1, j),
-                     (matrix[i][j - 1][0], i, j - 1))
-            complement_score = matrix[i + 1][j - 1][0] + 1 if rna_int[i] + rna_int[j] == 5 else 0
-            m1 = m1 if m1[0] >= complement_score else (complement_score, i + 1, j - 1)
-            m2 = max((matrix[i][k][0] + matrix[k][j][0], i, k, k, j) for k in range(i + 1, j + 1))
-            matrix[i][j] = m1 if m1[0] >= m2[0] else m2
-    return _rna_structure_reconstruct_answer(matrix, i=0, j=len(rna) - 1), matrix[0][-1][1]
-
-
-def _rna_structure_reconstruct_answer(matrix, i, j):
-    score = matrix[i][j]
+    ([(0, 8), (1, 7), (2, 6), (12, 20), (13, 19), (14, 18)], 6)
+    >>> rna_structure_prediction("CCCAAAGGGAAAGGGAAACCC", score_only=True)
+    6
+    """
+    codes = encode_dna(rna)
+    n = len(codes)
+    by_start = np.zeros((n, n), dtype=np.int32)
+    by_end = np.zeros((n, n), dtype=np.int32)
+    splits = None if score_only else np.zeros((n, n), dtype=np.int32)  # split offset k - i or _RNA_PAIR
+    for d in range(1, n):
+        m = n - d  # number of cells on the diagonal
+        # the split at k = i is the same as unpaired i, at k = j - 1 it's unpaired j
+        bifurcations = by_start[:m, :d] + by_end[d:, d - 1::-1]
+        offsets = np.argmax(bifurcations, axis=1)
+        scores = bifurcations[np.arange(m), offsets]
+        if d > min_size:
+            pairs = WATSON_CRICK_PAIRS[codes[:m], codes[d:]]
+            paired = by_start[1:m + 1, d - 2] + 1 if d > 1 else np.ones(m, dtype=np.int32)
+            paired = np.where(pairs & (paired > scores), paired, -1)
+            offsets = np.where(paired >= 0, _RNA_PAIR, offsets)
+            scores = np.maximum(scores, paired)
+        by_start[:m, d] = scores
+        by_end[d:, d] = scores
+        if splits is not None:
+            splits[:m, d] = offsets
+    score = int(by_start[0, n - 1]) if n else 0
+    if score_only:
+        return score
+    return _rna_structure_reconstruct_answer(by_start, splits), score
+
+
+_RNA_PAIR = -1
+
+
+def _rna_structure_reconstruct_answer(by_start: np.ndarray, splits: np.ndarray) -> List[Tuple[int, int]]:
+    """ Iterative traceback of the skewed score and split matrices made by rna_structure_prediction """
     structure = []
-    while score[0]:
-        if len(score) == 3:
-            _, next_i, next_j = score
-            if next_i - 1 == i and next_j + 1 == j:
-                structure.append((i, j))
-            i = next_i
-            j = next_j
-            score = matrix[next_i][next_j]
+    stack = [(0, len(by_start) - 1)]
+    while stack:
+        i, j = stack.pop()
+        if j <= i or not by_start[i, j - i]:
+            continue
+        split = int(splits[i, j - i])
+        if split == _RNA_PAIR:
+            structure.append((i, j))
+            stack.append((i + 1, j - 1))
         else:
-            _, i1, j1, i2, j2 = score
-            return structure + _rna_structure_reconstruct_answer(matrix, i1, j1)\
-                   + _rna_structure_reconstruct_answer(matrix, i2, j2)
-    return structure
+            stack.append((i, i + split))
+            stack.append((i + split + 1, j))
+    return sorted(structure)
 
 
 def rna_structure_to_graphviz(rna, structure):
@@ -902,30 +1137,12 @@ def codon_iter(seq):
     return string_to_kmers(seq, 3)
     
 
-def longest_common_substring(strings):
-    #tree = SuffixTree(strings[0])
-    #result = strings
-    #for index in range(1, len(strings)):
-    #    tree.add(strings[index])
-    #    result = tree.make_common_tree()
-    #return result
-
-    first = strings[0]
-
-    for current in range(1, len(strings)):
-        max_idx = 0
-        max_len = 0
-        second = strings[current]
-        array = [[0] * len(second) for _ in range(len(first))]
-        for i in range(len(first)):
-            array[i][0] = first[i] == second[0]
-        for j in range(len(second)):
-            array[0][j] = first[0] == second[j]
-        for i in range(1, len(first)):
-            for j in range(1, len(second)):
-                array[i][j] = array[i - 1][j - 1] + 1 if first[i] == second[j] else 0
-                if array[i][j] > max_len:
-                    max_len = array[i][j]
-                    max_idx = i
-        first = first[max_idx - max_len + 1:max_idx + 1]
-    return first
+def longest_common_substring(strings: List[str]) -> str:
+    """ Find the longest substring which is common for all strings with the suffix array.
+    :param strings: list of strings
+    :return: one of the longest common substrings, empty string if there are no common letters
+    >>> longest_common_substring(["GATTACA", "TAGACCA", "ATACA"])
+    'AC'
+    """
+    result = SuffixArray(strings).longest_common_substring()
+    return result[0] if result else ""
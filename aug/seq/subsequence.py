@@ -0,0 +1,189 @@
+from typing import Iterable, List, Union
+
+import numpy as np
+
+from aug.seq.seq import _helper_for_non_zero_based
+
+
+class SubsequenceIndex:
+    """ Next occurrence table of the sequence for subsequence (spliced motif) queries.
+    next[i, c] is the smallest position j >= i with sequence[j] == c (or len(sequence) if there is no such position),
+        so the leftmost occurrence of the subsequence is found by |motif| lookups instead of a scan of the sequence.
+        The table takes (len(sequence) + 1) x (alphabet size + 1) int32 values, the last column is for letters
+        absent in the sequence.
+    >>> index = SubsequenceIndex("TATGCTAAGATC")
+    >>> index.find("ACG")
+    [1, 4, 8]
+    >>> index.find_all(["ACG", "GGG", "TT"], zero_based=False)
+    [[2, 5, 9], -1, [1, 3]]
+    """
+
+    def __init__(self, sequence: str):
+        """
+        :param sequence: the string to search in
+        """
+        self.sequence = sequence
+        text = np.frombuffer(sequence.encode("ascii"), dtype=np.uint8)
+        n = len(text)
+        alphabet = np.unique(text)
+        self._letter_codes = np.full(256, len(alphabet), dtype=np.int64)
+        self._letter_codes[alphabet] = np.arange(len(alphabet))
+        dtype = np.int32 if n < np.iinfo(np.int32).max else np.int64
+        self._next = np.full((n + 1, len(alphabet) + 1), n, dtype=dtype)
+        for code, letter in enumerate(alphabet.tolist()):
+            positions = np.append(np.flatnonzero(text == letter), n)
+            self._next[:, code] = positions[np.searchsorted(positions, np.arange(n + 1))]
+
+    def __len__(self):
+        return len(self.sequence)
+
+    def _encode(self, motif: str) -> np.ndarray:
+        return self._letter_codes[np.frombuffer(motif.encode("ascii"), dtype=np.uint8)]
+
+    def find(self, motif: str, zero_based: bool = True) -> Union[List[int], int]:
+        """ The leftmost positions of the subsequence like aug.seq.seq.find_spliced_motif, O(|motif|).
+        :param motif: subsequence to search
+        :param zero_based: if False will return indexes starting with 1 instead of 0.
+        :return: list of indices or -1 if the motif is not a subsequence
+        """
+        n = len(self.sequence)
+        result = []
+        position = 0
+        for code in self._encode(motif).tolist():
+            position = int(self._next[position, code])
+            if position == n:
+                return -1
+            result.append(position)
+            position += 1
+        return _helper_for_non_zero_based(result, zero_based)
+
+    def find_all(self, motifs: Iterable[str], zero_based: bool = True) -> List[Union[List[int], int]]:
+        """ Find many subsequences at once: the i-th letters of all motifs are looked up by one vectorized step,
+            so the number of numpy operations depends only on the length of the longest motif.
+        :param motifs: subsequences to search
+        :param zero_based: if False will return indexes starting with 1 instead of 0.
+        :return: list of results of find for every motif
+        """
+        motifs = list(motifs)
+        n = len(self.sequence)
+        lengths = np.array([len(motif) for motif in motifs], dtype=np.int64)
+        width = int(lengths.max(initial=0))
+        codes = np.zeros((len(motifs), width), dtype=np.int64)
+        for i, motif in enumerate(motifs):
+            codes[i, :len(motif)] = self._encode(motif)
+        positions = np.zeros((len(motifs), width), dtype=np.int64)
+        current = np.zeros(len(motifs), dtype=np.int64)
+        found = np.ones(len(motifs), dtype=bool)
+        for column in range(width):
+            active = np.flatnonzero(found & (lengths > column))
+            next_positions = self._next[current[active], codes[active, column]]
+            found[active[next_positions == n]] = False
+            positions[active, column] = next_positions
+            current[active] = np.minimum(next_positions + 1, n)
+        shift = 0 if zero_based else 1
+        return [(row[:length] + shift).tolist() if is_found else -1
+                for row, length, is_found in zip(positions, lengths.tolist(), found.tolist())]
+
+
+def _to_bytes(sequence: str) -> np.ndarray:
+    return np.frombuffer(sequence.encode("ascii"), dtype=np.uint8)
+
+
+def _lcs_last_row(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """ row[j] is the length of the LCS of a and b[:j], computed with two rows.
+        The LCS table is non decreasing along the row, so the dependency on the left cell is a running maximum:
+        row[j] = max over j' <= j of max(previous[j'], previous[j' - 1] + (a[i] == b[j' - 1])).
+    """
+    row = np.zeros(len(b) + 1, dtype=np.int64)
+    for letter in a.tolist():
+        candidates = row.copy()
+        candidates[1:] = np.maximum(row[1:], row[:-1] + (b == letter))
+        row = np.maximum.accumulate(candidates)
+    return row
+
+
+def _lcs_table(a: np.ndarray, b: np.ndarray) -> str:
+    """ LCS with the full table for small inputs """
+    table = np.zeros((len(a) + 1, len(b) + 1), dtype=np.int64)
+    for i, letter in enumerate(a.tolist()):
+        row = table[i]
+        candidates = row.copy()
+        candidates[1:] = np.maximum(row[1:], row[:-1] + (b == letter))
+        table[i + 1] = np.maximum.accumulate(candidates)
+    result = []
+    i, j = len(a), len(b)
+    while i and j:
+        if a[i - 1] == b[j - 1] and table[i, j] == table[i - 1, j - 1] + 1:
+            result.append(chr(a[i - 1]))
+            i, j = i - 1, j - 1
+        elif table[i - 1, j] == table[i, j]:
+            i -= 1
+        else:
+            j -= 1
+    return "".join(reversed(result))
+
+
+def _hirschberg(a: np.ndarray, b: np.ndarray, table_size: int) -> str:
+    if len(a) * len(b) <= table_size or len(a) <= 1:
+        return _lcs_table(a, b)
+    middle = len(a) // 2
+    forward = _lcs_last_row(a[:middle], b)
+    backward = _lcs_last_row(a[middle:][::-1], b[::-1])[::-1]
+    split = int(np.argmax(forward + backward))
+    return _hirschberg(a[:middle], b[:split], table_size) + _hirschberg(a[middle:], b[split:], table_size)
+
+
+def lcs_length(a: str, b: str) -> int:
+    """ Length of the longest common subsequence with the bit-parallel algorithm: the row of the LCS table
+        is stored as differences in bits of one Python integer and updated by a few integer operations per letter,
+        so it takes O(len(a) * len(b) / word size) time.
+        (Allison and Dix, 1986; Hyyro, Bit-parallel LCS-length computation revisited, 2004)
+    >>> lcs_length("AACCTTGG", "ACACTGTGA")
+    6
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    masks = {}
+    for i, letter in enumerate(b):
+        masks[letter] = masks.get(letter, 0) | (1 << i)
+    all_ones = (1 << len(b)) - 1
+    row = all_ones  # zero bits are the positions where the LCS length increases
+    for letter in a:
+        matches = row & masks.get(letter, 0)
+        row = ((row + matches) | (row - matches)) & all_ones
+    return len(b) - bin(row).count("1")
+
+
+def longest_common_subsequence(a: str, b: str, table_size: int = 1 << 16) -> str:
+    """ One of the longest common subsequences by Hirschberg's algorithm: the middle row of a is matched
+        with the split of b maximizing the sum of forward and backward LCS lengths and the halves are solved
+        recursively, so the memory is O(len(a) + len(b)).
+        https://en.wikipedia.org/wiki/Hirschberg%27s_algorithm
+    :param a: the first string
+    :param b: the second string
+    :param table_size: subproblems with len(a) * len(b) up to this size are solved with the full table
+    :return: the longest common subsequence
+    >>> longest_common_subsequence("AACCTTGG", "ACACTGTGA")
+    'AACTTG'
+    """
+    return _hirschberg(_to_bytes(a), _to_bytes(b), table_size)
+
+
+def shortest_common_supersequence(a: str, b: str) -> str:
+    """ One of the shortest strings which have both a and b as subsequences,
+        letters of the longest common subsequence are taken once.
+    >>> shortest_common_supersequence("ATCTGAT", "TGCATA")
+    'ATGCATGAT'
+    """
+    result = []
+    i = j = 0
+    for letter in longest_common_subsequence(a, b):
+        while a[i] != letter:
+            result.append(a[i])
+            i += 1
+        while b[j] != letter:
+            result.append(b[j])
+            j += 1
+        result.append(letter)
+        i, j = i + 1, j + 1
+    return "".join(result) + a[i:] + b[j:]
@@ -0,0 +1,226 @@
+from collections import deque
+from typing import List, Tuple, Union
+
+import numpy as np
+
+
+def suffix_array(text: np.ndarray) -> np.ndarray:
+    """ Build suffix array by prefix doubling, every step sorts suffixes by the first 2^k symbols using ranks
+        for the first 2^(k-1) ones, so there are O(log n) vectorized sorts.
+        https://en.wikipedia.org/wiki/Suffix_array
+    :param text: integer array, all suffixes should be different (e.g. the text ends with a unique symbol)
+    :return: int32 array of suffixes start positions in lexicographical order
+    >>> suffix_array(np.array([2, 1, 3, 1, 3, 1, 0])).tolist()
+    [6, 5, 3, 1, 0, 4, 2]
+    """
+    n = len(text)
+    if not n:
+        return np.zeros(0, dtype=np.int32)
+    _, rank = np.unique(text, return_inverse=True)
+    rank = rank.astype(np.int64)
+    order = np.argsort(rank, kind="stable")
+    shift = 1
+    while rank.max() < n - 1:
+        second = np.zeros(n, dtype=np.int64)  # 0 for the suffixes shorter than shift
+        second[:n - shift] = rank[shift:] + 1
+        order = np.argsort(rank * (n + 1) + second, kind="stable")
+        key_rank = rank[order]
+        key_second = second[order]
+        new_group = np.empty(n, dtype=bool)
+        new_group[0] = True
+        new_group[1:] = (key_rank[1:] != key_rank[:-1]) | (key_second[1:] != key_second[:-1])
+        rank[order] = np.cumsum(new_group) - 1
+        shift *= 2
+    return order.astype(np.int32)
+
+
+def lcp_array(text: np.ndarray, sa: np.ndarray) -> np.ndarray:
+    """ Build longest common prefix array by Kasai algorithm in linear time.
+    :param text: integer array
+    :param sa: suffix array of the text
+    :return: int32 array where result[i] is the length of the longest common prefix of suffixes sa[i - 1] and sa[i],
+        result[0] = 0
+    >>> text = np.array([2, 1, 3, 1, 3, 1, 0])
+    >>> lcp_array(text, suffix_array(text)).tolist()
+    [0, 0, 1, 3, 0, 0, 2]
+    """
+    n = len(text)
+    text = text.tolist()
+    sa = sa.tolist()
+    rank = [0] * n
+    for i, position in enumerate(sa):
+        rank[position] = i
+    result = [0] * n
+    common = 0
+    for position in range(n):
+        i = rank[position]
+        if i:
+            previous = sa[i - 1]
+            while position + common < n and previous + common < n \
+                    and text[position + common] == text[previous + common]:
+                common += 1
+            result[i] = common
+            common = max(common - 1, 0)
+        else:
+            common = 0
+    return np.array(result, dtype=np.int32)
+
+
+class SuffixArray:
+    """ Suffix array with longest common prefix array over one or many strings.
+    Strings are concatenated and separated by unique symbols which are less than any letter, so no common prefix
+        can cross the border of a string.
+    The index can be saved to the file and loaded later, so it can be built only once for a reference.
+    >>> index = SuffixArray(["banana", "ananas"])
+    >>> index.longest_common_substring()
+    ['anana']
+    >>> index.longest_repeat()
+    'anana'
+    >>> index.count("ana")
+    4
+    >>> index.locate("nas")
+    [(1, 3)]
+    """
+
+    def __init__(self, strings: Union[str, List[str]]):
+        """
+        :param strings: a string or a list of strings to index
+        """
+        strings = [strings] if isinstance(strings, str) else list(strings)
+        self.n_strings = len(strings)
+        self.starts = np.zeros(self.n_strings, dtype=np.int64)
+        parts = []
+        position = 0
+        for i, string in enumerate(strings):
+            self.starts[i] = position
+            parts.append(self._encode(string))
+            parts.append(np.array([i], dtype=np.int32))  # unique separator
+            position += len(string) + 1
+        self.text = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int32)
+        self.sa = suffix_array(self.text)
+        self.lcp = lcp_array(self.text, self.sa)
+
+    def _encode(self, string: str) -> np.ndarray:
+        return np.frombuffer(string.encode("utf-32-le"), dtype="<u4").astype(np.int32) + self.n_strings
+
+    def _decode(self, position: int, length: int) -> str:
+        return "".join(map(chr, (self.text[position:position + length] - self.n_strings).tolist()))
+
+    def _owners(self, positions: np.ndarray) -> np.ndarray:
+        return np.searchsorted(self.starts, positions, side="right") - 1
+
+    def longest_repeat(self) -> str:
+        """ returns the longest substring which occurs at least twice in the strings (empty if there is no repeat).
+        """
+        if len(self.lcp) < 2:
+            return ""
+        i = int(np.argmax(self.lcp))
+        return self._decode(int(self.sa[i]), int(self.lcp[i]))
+
+    def longest_common_substring(self, min_strings: Union[int, None] = None) -> List[str]:
+        """ Find the longest substrings which are common for the strings.
+            Rows of the suffix array are scanned by a sliding window, which contains suffixes of at least min_strings
+            different strings, the minimum of lcp array in the window is maintained by monotonic deque.
+        :param min_strings: the substring should be presented in at least min_strings strings, all by default
+        :return: all longest common substrings in lexicographical order, empty list if there are no common letters
+        """
+        min_strings = self.n_strings if min_strings is None else min_strings
+        if not self.n_strings or min_strings > self.n_strings:
+            return []
+        if min_strings <= 1:
+            lengths = np.diff(np.append(self.starts, len(self.text))) - 1
+            return sorted({self._decode(int(self.starts[i]), int(lengths.max()))
+                           for i in np.flatnonzero(lengths == lengths.max())} - {""})
+        sa = self.sa[self.n_strings:]  # skip suffixes starting with separators
+        lcp = self.lcp[self.n_strings:].tolist()
+        owners = self._owners(sa).tolist()
+        counts = [0] * self.n_strings
+        n_presented = 0
+        minimums = deque()  # rows of the window (lo, hi] with increasing lcp values
+        best_length = 0
+        best = []
+        lo = 0
+        for hi, owner in enumerate(owners):
+            if not counts[owner]:
+                n_presented += 1
+            counts[owner] += 1
+            if hi:
+                while minimums and lcp[minimums[-1]] >= lcp[hi]:
+                    minimums.pop()
+                minimums.append(hi)
+            while n_presented - (counts[owners[lo]] == 1) >= min_strings:
+                counts[owners[lo]] -= 1
+                if not counts[owners[lo]]:
+                    n_presented -= 1
+                lo += 1
+                while minimums and minimums[0] <= lo:
+                    minimums.popleft()
+            if n_presented >= min_strings:
+                length = lcp[minimums[0]]
+                if length > best_length:
+                    best_length = length
+                    best = [hi]
+                elif length == best_length and length:
+                    best.append(hi)
+        return sorted({self._decode(int(sa[hi]), best_length) for hi in best})
+
+    def _bound(self, pattern: np.ndarray, upper: bool) -> int:
+        lo, hi = 0, len(self.sa)
+        while lo < hi:
+            middle = (lo + hi) // 2
+            compared = self._compare(int(self.sa[middle]), pattern)
+            if compared < 0 or upper and compared == 0:
+                lo = middle + 1
+            else:
+                hi = middle
+        return lo
+
+    def _compare(self, position: int, pattern: np.ndarray) -> int:
+        """ returns 0 if the pattern is a prefix of the suffix, -1 if the suffix is less or 1 if it's greater """
+        part = self.text[position:position + len(pattern)]
+        different = np.flatnonzero(part != pattern[:len(part)])
+        if len(different):
+            return -1 if part[different[0]] < pattern[different[0]] else 1
+        return 0 if len(part) == len(pattern) else -1
+
+    def _rows(self, pattern: str) -> Tuple[int, int]:
+        pattern = self._encode(pattern)
+        return self._bound(pattern, upper=False), self._bound(pattern, upper=True)
+
+    def count(self, pattern: str) -> int:
+        """ returns the number of occurrences of the pattern in all strings in O(|pattern| log n). """
+        if not pattern:
+            return 0
+        lo, hi = self._rows(pattern)
+        return hi - lo
+
+    def locate(self, pattern: str, zero_based: bool = True) -> List[Tuple[int, int]]:
+        """ returns all occurrences of the pattern.
+        :param pattern: the substring to search
+        :param zero_based: if False will return indexes starting with 1 instead of 0.
+        :return: sorted list of (string index, position in the string)
+        """
+        if not pattern:
+            return []
+        lo, hi = self._rows(pattern)
+        positions = np.sort(self.sa[lo:hi]).astype(np.int64)
+        owners = self._owners(positions)
+        shift = 0 if zero_based else 1
+        return list(zip(owners.tolist(), (positions - self.starts[owners] + shift).tolist()))
+
+    def save(self, path: str):
+        """ Save the index to the file in numpy .npz format, the path is used as is (.npz is not appended). """
+        with open(path, "wb") as file:
+            np.savez(file, text=self.text, sa=self.sa, lcp=self.lcp, starts=self.starts)
+
+    @classmethod
+    def load(cls, path: str) -> "SuffixArray":
+        """ Load the index saved by save method. """
+        result = cls.__new__(cls)
+        with open(path, "rb") as file, np.load(file) as data:
+            result.text = data["text"]
+            result.sa = data["sa"]
+            result.lcp = data["lcp"]
+            result.starts = data["starts"]
+        result.n_strings = len(result.starts)
+        return result
@@ -0,0 +1,29 @@
+import pytest
+
+from aug.helpers.parallel import chunks, parallel_map
+
+
+@pytest.mark.parametrize("n_jobs, chunksize", [[1, 1], [2, 1], [2, 3], [None, 2]])
+def test_parallel_map(n_jobs, chunksize):
+    items = list(range(-50, 50))
+    assert list(map(abs, items)) == list(parallel_map(abs, iter(items), n_jobs=n_jobs, chunksize=chunksize))
+
+
+def test_parallel_map_is_lazy():
+    consumed = []
+
+    def items():
+        for i in range(1000):
+            consumed.append(i)
+            yield -i
+
+    results = parallel_map(abs, items(), n_jobs=2)
+    assert next(results) == 0
+    assert len(consumed) <= 2 * 2 + 1
+    results.close()
+    assert len(consumed) < 1000
+
+
+def test_chunks():
+    assert [[0, 1, 2], [3, 4]] == list(chunks(iter(range(5)), 3))
+    assert [] == list(chunks([], 3))
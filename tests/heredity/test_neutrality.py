@@ -1,6 +1,12 @@
+import random
+
+import numpy as np
 import pytest
 
-from aug.heredity.heredity import selection_balance
+from aug.heredity.heredity import NONSYNONYMOUS_SITES, SYNONYMOUS_SITES, dn_ds_pairs, selection_balance
+from aug.seq.codon_usage import CODONS
+from aug.seq.seq import dna_codon_table, hamming_distance, protein_dna_codon_table
+from tests.utils import random_string
 
 
 class TestDNDS:
@@ -9,3 +15,55 @@ class TestDNDS:
     @pytest.mark.parametrize("expected", [pytest.approx(0.318)])
     def test_simple(self, seq1, seq2, expected):
         assert expected == selection_balance(seq1, seq2)
+
+
+def naive_dn_ds(seq1, seq2):
+    missense_expected = sym_expected = missense_actual = sym_actual = 0
+    for i in range(0, min(len(seq1), len(seq2)), 3):
+        codon1, codon2 = seq1[i:i + 3], seq2[i:i + 3]
+        protein1, protein2 = dna_codon_table[codon1], dna_codon_table[codon2]
+        n = 3 - sum(hamming_distance(codon, codon1) == 1 for codon in protein_dna_codon_table[protein1]) / 3
+        missense_expected += n
+        sym_expected += 3 - n
+        if codon1 != codon2:
+            if protein1 != protein2:
+                missense_actual += 1
+            else:
+                sym_actual += 1
+    d = - 3 / 4 * np.log(1 - 4 / 3 * np.array((missense_actual / missense_expected, sym_actual / sym_expected)))
+    return d[0] / d[1]
+
+
+def mutate(dna, n_mutations):
+    dna = list(dna)
+    for _ in range(n_mutations):
+        dna[random.randrange(len(dna))] = random.choice("ACGT")
+    return "".join(dna)
+
+
+def test_site_tables():
+    assert np.allclose(NONSYNONYMOUS_SITES + SYNONYMOUS_SITES, 3)
+    assert SYNONYMOUS_SITES[CODONS.index("ATG")] == 0
+    assert SYNONYMOUS_SITES[CODONS.index("GCT")] == pytest.approx(1)
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_dn_ds_pairs(random_seed, n_jobs):
+    pairs = []
+    for _ in range(50):
+        dna = random_string(min_len=90, max_len=300, alphabet="ACGT")
+        dna = dna[:len(dna) - len(dna) % 3]
+        pairs.append((dna, mutate(dna, len(dna) // 10)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expected = [naive_dn_ds(seq1, seq2) for seq1, seq2 in pairs]
+    result = dn_ds_pairs(pairs, chunk_size=7, n_jobs=n_jobs)
+    assert result == pytest.approx(expected, nan_ok=True)
+    assert selection_balance(*pairs[0]) == pytest.approx(result[0], nan_ok=True)
+
+
+def test_dn_ds_invalid():
+    with pytest.raises(ValueError):
+        selection_balance("ATGA", "ATGA")
+    with pytest.raises(ValueError):
+        selection_balance("ATGNAA", "ATGAAA")
+    assert len(dn_ds_pairs([])) == 0
@@ -0,0 +1,49 @@
+import pickle
+
+import pytest
+
+from aug.seq.aho_corasick import AhoCorasick
+from aug.seq.seq import find_motif, reverse_complement
+from tests.utils import random_string
+
+
+def test_search_as_find_motif(random_seed):
+    dna = random_string(min_len=50, max_len=500, alphabet="ACGT")
+    motifs = list({random_string(min_len=1, max_len=5, alphabet="ACGT") for _ in range(20)})
+    automaton = AhoCorasick(motifs)
+    actual = sorted((motif_id, position) for position, motif_id, _ in automaton.search(dna, zero_based=False))
+    expected = sorted((motif_id, position) for motif_id, motif in enumerate(motifs)
+                      for position in find_motif(dna, motif, zero_based=False))
+    assert expected == actual
+
+
+def test_search_both_strands(random_seed):
+    dna = random_string(min_len=50, max_len=500, alphabet="ACGT")
+    motif = random_string(min_len=2, max_len=4, alphabet="ACGT")
+    automaton = AhoCorasick([motif], both_strands=True)
+    actual = {(position, strand) for position, _, strand in automaton.search(dna)}
+    expected = {(position, "+") for position in find_motif(dna, motif)}
+    if reverse_complement(motif) != motif:
+        expected |= {(position, "-") for position in find_motif(dna, reverse_complement(motif))}
+    assert expected == actual
+
+
+def test_search_overlapped():
+    automaton = AhoCorasick(["AA", "AAA"])
+    assert [(0, 0, "+"), (0, 1, "+"), (1, 0, "+")] == list(automaton.search("AAA"))
+
+
+def test_empty_motif():
+    with pytest.raises(ValueError):
+        AhoCorasick(["ACG", ""])
+
+
+def test_pickle():
+    automaton = pickle.loads(pickle.dumps(AhoCorasick(["GAATTC", "GGATCC"], both_strands=True)))
+    assert [(2, 0, "+"), (10, 1, "+")] == list(automaton.search("TTGAATTCAAGGATCC"))
+
+
+def test_search_fasta(base_data_path):
+    automaton = AhoCorasick(["CCTGCG", "GGTAGC"])
+    actual = list(automaton.search_fasta(base_data_path + "test_fasta.txt", zero_based=False))
+    assert [("Rosalind_6404", 1, 0, "+"), ("Rosalind_5959", 6, 1, "+"), ("Rosalind_0808", 67, 0, "+")] == actual
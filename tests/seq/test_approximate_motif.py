@@ -0,0 +1,34 @@
+import pytest
+
+from aug.seq.approximate_motif import find_approximate_motif, sliding_hamming_distances
+from aug.seq.seq import find_motif, hamming_distance, reverse_complement
+from tests.utils import random_string
+
+
+@pytest.mark.parametrize("max_mismatches", [0, 1, 2])
+def test_find_approximate_motif(random_seed, max_mismatches):
+    dna = random_string(min_len=0, max_len=300, alphabet="ACGT")
+    motif = random_string(min_len=1, max_len=6, alphabet="ACGT")
+    expected = [i for i in range(len(dna) - len(motif) + 1)
+                if hamming_distance(dna[i:i + len(motif)], motif) <= max_mismatches]
+    assert find_approximate_motif(dna, motif, max_mismatches, block_size=7) == expected
+    assert find_approximate_motif(dna, motif, max_mismatches, zero_based=False) == [i + 1 for i in expected]
+
+
+def test_exact_like_find_motif(random_seed):
+    dna = random_string(min_len=0, max_len=300, alphabet="ACGT")
+    assert find_approximate_motif(dna, "ACG", 0, zero_based=False) == find_motif(dna, "ACG", zero_based=False)
+
+
+def test_both_strands(random_seed):
+    dna = random_string(min_len=0, max_len=300, alphabet="ACGT")
+    motif = random_string(min_len=1, max_len=6, alphabet="ACGT")
+    complement = reverse_complement(motif)
+    expected = [(i, "+") for i in find_approximate_motif(dna, motif, 1)]
+    if complement != motif:
+        expected += [(i, "-") for i in find_approximate_motif(dna, complement, 1)]
+    assert find_approximate_motif(dna, motif, 1, both_strands=True) == sorted(expected)
+
+
+def test_long_motif():
+    assert sliding_hamming_distances("A" * 600, "A" * 299 + "C").tolist() == [1] * 301
@@ -0,0 +1,49 @@
+import math
+from collections import Counter
+
+import pytest
+
+from aug.data.fasta import fasta
+from aug.seq.codon_usage import CODONS, codon_adaptation_index, codon_counts, codon_usage_fasta, \
+    relative_adaptiveness, rscu
+from aug.seq.seq import dna_codon_table, protein_dna_codon_table
+from tests.utils import random_string
+
+
+@pytest.fixture
+def genes(random_seed):
+    return [random_string(min_len=0, max_len=300, alphabet="ACGT") for _ in range(7)]
+
+
+def _naive_counts(dna):
+    return Counter(dna[i:i + 3] for i in range(0, len(dna) - 2, 3))
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_codon_usage_fasta(tmp_path, genes, n_jobs):
+    path = str(tmp_path / "cds.fasta")
+    with open(path, "w") as file:
+        file.write("".join(fasta(f"gene{i}", gene) for i, gene in enumerate(genes)))
+    ids, counts = codon_usage_fasta(path, chunk_size=3, n_jobs=n_jobs)
+    assert ids == [f"gene{i}" for i in range(len(genes))]
+    assert [dict(zip(CODONS, row)) for row in counts.tolist()] == \
+           [{codon: _naive_counts(gene)[codon] for codon in CODONS} for gene in genes]
+
+
+def test_rscu_and_cai(genes):
+    reference = sum(codon_counts(gene) for gene in genes)
+    naive = sum((_naive_counts(gene) for gene in genes), Counter())
+    values = dict(zip(CODONS, rscu(reference).tolist()))
+    for codon, amino_acid in dna_codon_table.items():
+        family = protein_dna_codon_table[amino_acid]
+        total = sum(naive[c] for c in family)
+        assert values[codon] == pytest.approx(naive[codon] * len(family) / total if total else 0)
+    weights = relative_adaptiveness(reference)
+    gene = genes[0]
+    informative = [c for c in (gene[i:i + 3] for i in range(0, len(gene) - 2, 3))
+                   if len(protein_dna_codon_table[dna_codon_table[c]]) > 1 and c not in ("TAA", "TAG", "TGA")]
+    cai = codon_adaptation_index(codon_counts(gene), weights)
+    if informative:
+        expected = math.exp(sum(math.log(weights[CODONS.index(c)]) for c in informative) / len(informative))
+        assert cai == pytest.approx(expected)
+    assert codon_adaptation_index(reference, weights) <= 1
@@ -0,0 +1,98 @@
+import random
+
+import numpy as np
+import pytest
+
+from aug.data.fasta import read_fasta
+from aug.seq.de_bruijn import DeBruijnGraph
+from aug.seq.kmers import count_kmer_codes, decode_kmer
+from aug.seq.seq import reverse_complement
+from tests.utils import random_string
+
+
+def _naive_unitigs(kmers):
+    kmers = set(kmers)
+    successors = {kmer: [kmer[1:] + letter for letter in "ACGT" if kmer[1:] + letter in kmers] for kmer in kmers}
+    predecessors = {kmer: [letter + kmer[:-1] for letter in "ACGT" if letter + kmer[:-1] in kmers] for kmer in kmers}
+
+    def next(kmer):
+        if len(successors[kmer]) == 1 and successors[kmer][0] != kmer \
+                and len(predecessors[successors[kmer][0]]) == 1:
+            return successors[kmer][0]
+
+    def previous(kmer):
+        if len(predecessors[kmer]) == 1 and next(predecessors[kmer][0]) == kmer:
+            return predecessors[kmer][0]
+
+    result = []
+    used = set()
+    starts = [kmer for kmer in sorted(kmers) if previous(kmer) is None]
+    cycles = sorted(kmers)  # the rest are cycles, they start from the smallest k-mer
+    for kmer in starts + cycles:
+        if kmer in used:
+            continue
+        unitig = kmer
+        used.add(kmer)
+        while next(kmer) is not None and next(kmer) not in used:
+            kmer = next(kmer)
+            used.add(kmer)
+            unitig += kmer[-1]
+        result.append(unitig)
+    return sorted(result)
+
+
+@pytest.mark.parametrize("k", [2, 3, 5])
+def test_unitigs(random_seed, k):
+    genome = random_string(min_len=10, max_len=300, alphabet="ACGT")
+    reads = [genome[start:start + 20] for start in range(0, len(genome), 7)]
+    graph = DeBruijnGraph.from_sequences(reads, k)
+    kmers = {read[i:i + k] for read in reads for i in range(len(read) - k + 1)}
+    assert len(kmers) == len(graph)
+    assert _naive_unitigs(kmers) == sorted(graph.unitigs())
+
+
+def test_cycle():
+    genome = "ACGGTCATTGACCA"
+    graph = DeBruijnGraph.from_sequences([genome + genome[:5]], k=6)
+    assert ["AACGGTCATTGACCAACGG"] == list(graph.unitigs())  # starts from the smallest k-mer
+    graph = DeBruijnGraph.from_sequences(["AAAAAA"], k=3)
+    assert ["AAA"] == list(graph.unitigs())
+
+
+def test_both_strands(random_seed):
+    k = 7
+    genome = random_string(min_len=100, max_len=500, alphabet="ACGT")
+    reads = [genome[start:start + 30] for start in range(0, len(genome), 10)]
+    reads = [reverse_complement(read) if random.random() < 0.5 else read for read in reads]
+    graph = DeBruijnGraph.from_sequences(reads, k, both_strands=True)
+    kmers = {read[i:i + k] for read in reads for i in range(len(read) - k + 1)}
+    kmers |= {reverse_complement(kmer) for kmer in kmers}
+    found = []
+    for unitig in graph.unitigs():
+        unitig_kmers = {unitig[i:i + k] for i in range(len(unitig) - k + 1)}
+        found.extend(unitig_kmers | {reverse_complement(kmer) for kmer in unitig_kmers})
+    assert len(found) == len(set(found))
+    assert kmers == set(found)
+
+
+def test_min_count():
+    reads = ["ACGTACGGT"] * 3 + ["ACGTACGCT"]
+    graph = DeBruijnGraph.from_sequences(reads, 5, min_count=2)
+    assert ["ACGTACGGT"] == list(graph.unitigs())
+    codes, counts = count_kmer_codes(reads, 5)
+    counts = {decode_kmer(code, 5): count for code, count in zip(codes.tolist(), counts.tolist())}
+    assert 4 == counts["ACGTA"] and 3 == counts["ACGGT"] and 1 == counts["ACGCT"]
+
+
+def test_to_fasta(tmp_path, random_seed):
+    genome = random_string(min_len=50, max_len=200, alphabet="ACGT")
+    graph = DeBruijnGraph.from_sequences([genome, genome], k=11)
+    graph.to_fasta(str(tmp_path / "unitigs.fasta"))
+    records = read_fasta(str(tmp_path / "unitigs.fasta"))
+    assert sorted(graph.unitigs()) == sorted(unitig for _, unitig in records)
+    assert all(id.endswith("mean_count=2.0") for id, _ in records)
+
+
+def test_empty():
+    graph = DeBruijnGraph(np.zeros(0, dtype=np.uint64), 5)
+    assert [] == list(graph.unitigs())
@@ -0,0 +1,41 @@
+import random
+
+import pytest
+
+from aug.seq.distances import hamming_distances, pairwise_hamming_distances, pairwise_transitions_transversions, \
+    transitions_transversions
+from aug.seq.seq import dna_matrix, hamming_distance, transition_transversion
+from tests.utils import random_string
+
+
+@pytest.fixture
+def dnas(random_seed):
+    k = random.randint(0, 30)
+    return [random_string(min_len=k, max_len=k, alphabet="ACGTN") for _ in range(random.randint(1, 20))]
+
+
+@pytest.mark.parametrize("block_size", [1, 50, 1 << 24])
+def test_one_vs_many(dnas, block_size):
+    matrix = dna_matrix(dnas)
+    query = dnas[0].replace("N", "A")
+    assert hamming_distances(query, matrix, block_size).tolist() == [hamming_distance(query, dna) for dna in dnas]
+    transitions, transversions = transitions_transversions(query, matrix, block_size)
+    assert list(zip(transitions.tolist(), transversions.tolist())) == \
+           [transition_transversion(query, dna) for dna in dnas]
+
+
+@pytest.mark.parametrize("block_size", [1, 50, 1 << 24])
+def test_many_vs_many(dnas, block_size):
+    dnas = [dna.replace("N", "T") for dna in dnas]
+    matrix = dna_matrix(dnas)
+    other = dna_matrix(dnas[::-1])
+    assert pairwise_hamming_distances(matrix, other, block_size).tolist() == \
+           [[hamming_distance(a, b) for b in dnas[::-1]] for a in dnas]
+    transitions, transversions = pairwise_transitions_transversions(matrix, block_size=block_size)
+    assert [list(zip(*row)) for row in zip(transitions.tolist(), transversions.tolist())] == \
+           [[transition_transversion(a, b) for b in dnas] for a in dnas]
+
+
+def test_different_lengths():
+    with pytest.raises(ValueError):
+        hamming_distances("ACG", dna_matrix(["ACGT"]))
@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+from aug.data.fasta import read_fasta
+from aug.seq.fm_index import FMIndex
+from aug.seq.seq import find_motif, hamming_distance
+from tests.utils import random_string
+
+
+@pytest.fixture
+def records(random_seed):
+    return [(f"seq{i}", random_string(min_len=1, max_len=300, alphabet="ACGT")) for i in range(3)]
+
+
+@pytest.mark.parametrize("sa_sample, occ_sample", [[1, 1], [4, 16], [32, 128]])
+def test_locate(records, sa_sample, occ_sample):
+    index = FMIndex(records, sa_sample=sa_sample, occ_sample=occ_sample)
+    pattern = random_string(min_len=1, max_len=4, alphabet="ACGT")
+    expected = sorted((id, position) for id, dna in records for position in find_motif(dna, pattern))
+    assert len(expected) == index.count(pattern)
+    assert sorted(expected) == sorted(index.locate(pattern))
+
+
+def test_search_with_mismatches(records):
+    index = FMIndex(records, sa_sample=8, occ_sample=16)
+    pattern = random_string(min_len=3, max_len=8, alphabet="ACGT")
+    expected = sorted((id, position, hamming_distance(dna[position:position + len(pattern)], pattern))
+                      for id, dna in records for position in range(len(dna) - len(pattern) + 1)
+                      if hamming_distance(dna[position:position + len(pattern)], pattern) <= 2)
+    assert expected == sorted(index.search(pattern, mismatches=2))
+
+
+def test_ambiguous_letters():
+    index = FMIndex("ACGNNACG")
+    assert [(None, 0), (None, 5)] == index.locate("ACG")
+    assert 0 == index.count("GN")
+    assert [(None, 0, 1), (None, 5, 1)] == index.search("ACN", mismatches=1)
+
+
+def test_save_load_fasta(base_data_path, tmp_path):
+    index = FMIndex.from_fasta(base_data_path + "test_fasta.txt")
+    index.save(str(tmp_path / "index"))
+    loaded = FMIndex.load(str(tmp_path / "index"))
+    for id, dna in read_fasta(base_data_path + "test_fasta.txt"):
+        start = random.randrange(len(dna) - 10)
+        pattern = dna[start:start + 10]
+        assert index.locate(pattern, zero_based=False) == loaded.locate(pattern, zero_based=False)
+        assert (id, start) in loaded.locate(pattern)
@@ -0,0 +1,64 @@
+import pytest
+
+from aug.seq.kmers import INVALID_KMER, MAX_K, kmer_codes, reverse_complement_codes, canonical_kmer_codes, \
+    count_kmer_codes, decode_kmer, approximate_kmer_counts
+from aug.seq.seq import enumerate_kmers, hamming_distance, reverse_complement
+from tests.utils import random_string
+
+
+@pytest.mark.parametrize("k", [1, 2, 5, MAX_K])
+def test_kmer_codes(random_seed, k):
+    dna = random_string(min_len=0, max_len=200, alphabet="ACGTN")
+    kmers = [dna[i:i + k] for i in range(len(dna) - k + 1)]
+    expected = [None if "N" in kmer else kmer for kmer in kmers]
+    assert expected == [None if code == int(INVALID_KMER) else decode_kmer(code, k)
+                        for code in kmer_codes(dna, k).tolist()]
+    reverse = [None if code == int(INVALID_KMER) else decode_kmer(code, k)
+               for code in reverse_complement_codes(dna, k).tolist()]
+    assert [None if "N" in kmer else reverse_complement(kmer) for kmer in kmers] == reverse
+
+
+def test_canonical_codes(random_seed):
+    dna = random_string(min_len=10, max_len=200, alphabet="ACGT")
+    forward, _ = canonical_kmer_codes(dna, 7)
+    reverse, _ = canonical_kmer_codes(reverse_complement(dna), 7)
+    assert forward.tolist() == reverse[::-1].tolist()
+
+
+@pytest.mark.parametrize("k", [0, MAX_K + 1])
+def test_wrong_k(k):
+    with pytest.raises(ValueError):
+        kmer_codes("ACGT", k)
+
+
+@pytest.mark.parametrize("canonical", [False, True])
+def test_count_kmer_codes(random_seed, canonical):
+    k = 4
+    sequences = [random_string(min_len=0, max_len=50, alphabet="ACGTN") for _ in range(20)]
+    expected = {}
+    for dna in sequences:
+        for kmer in (dna[i:i + k] for i in range(len(dna) - k + 1)):
+            if "N" not in kmer:
+                kmer = min(kmer, reverse_complement(kmer)) if canonical else kmer
+                expected[kmer] = expected.get(kmer, 0) + 1
+    codes, counts = count_kmer_codes(sequences, k, canonical=canonical, batch_size=40)
+    assert sorted(codes.tolist()) == codes.tolist()
+    assert expected == {decode_kmer(code, k): count for code, count in zip(codes.tolist(), counts.tolist())}
+
+
+@pytest.mark.parametrize("d", [0, 1, 2])
+@pytest.mark.parametrize("reverse_complements", [False, True])
+@pytest.mark.parametrize("max_dense_k", [0, 12])
+def test_approximate_kmer_counts(random_seed, d, reverse_complements, max_dense_k):
+    k = 4
+    dna = random_string(min_len=0, max_len=60, alphabet="ACGTN")
+    windows = [dna[i:i + k] for i in range(len(dna) - k + 1) if "N" not in dna[i:i + k]]
+    expected = {}
+    for pattern in enumerate_kmers("ACGT", k):
+        patterns = [pattern, reverse_complement(pattern)] if reverse_complements else [pattern]
+        count = sum(hamming_distance(window, p) <= d for window in windows for p in patterns)
+        if count:
+            expected[pattern] = count
+    codes, counts = approximate_kmer_counts(dna, k, d, reverse_complements, max_dense_k=max_dense_k, batch_size=50)
+    assert sorted(codes.tolist()) == codes.tolist()
+    assert expected == {decode_kmer(code, k): count for code, count in zip(codes.tolist(), counts.tolist())}
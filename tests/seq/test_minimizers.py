@@ -0,0 +1,89 @@
+import random
+
+import numpy as np
+import pytest
+
+from aug.seq.kmers import INVALID_KMER, canonical_kmer_codes
+from aug.seq.minimizers import MinimizerIndex, hash_kmers, minimizers
+from aug.seq.seq import reverse_complement
+from tests.utils import random_string
+
+
+def _mutate(dna: str, rate: float) -> str:
+    return "".join(random.choice("ACGT") if random.random() < rate else letter for letter in dna)
+
+
+@pytest.fixture
+def genome(random_seed):
+    return random_string(min_len=20000, max_len=20000, alphabet="ACGT")
+
+
+@pytest.mark.parametrize("k, w", [[3, 1], [5, 4], [15, 10]])
+def test_minimizers(random_seed, k, w):
+    dna = random_string(min_len=k + w, max_len=300, alphabet="ACGTN")
+    codes, _ = canonical_kmer_codes(dna, k)
+    hashes = hash_kmers(codes, k).tolist()
+    symmetric = ["N" not in dna[i:i + k] and dna[i:i + k] == reverse_complement(dna[i:i + k])
+                 for i in range(len(hashes))]
+    hashes = [int(INVALID_KMER) if is_symmetric else value for value, is_symmetric in zip(hashes, symmetric)]
+    expected = set()
+    for start in range(len(hashes) - w + 1):
+        window = hashes[start:start + w]
+        position = start + window.index(min(window))
+        if hashes[position] != int(INVALID_KMER):
+            expected.add(position)
+    _, positions, _ = minimizers(dna, k, w)
+    assert sorted(expected) == positions.tolist()
+
+
+def test_minimizers_of_reverse_complement(random_seed):
+    dna = random_string(min_len=100, max_len=300, alphabet="ACGT")
+    hashes, positions, is_reverse = minimizers(dna, 11, 5)
+    reverse_hashes, reverse_positions, reverse_is_reverse = minimizers(reverse_complement(dna), 11, 5)
+    assert set(hashes.tolist()) == set(reverse_hashes.tolist())
+    all_hashes, all_positions, _ = minimizers(dna, 11, 1)
+    assert all_positions.tolist() == list(range(len(dna) - 10))  # odd k, so there are no symmetric k-mers
+    mirrored_positions = len(dna) - 11 - reverse_positions
+    assert (all_hashes[positions] == hashes).all()
+    assert (all_hashes[mirrored_positions] == reverse_hashes).all()
+    # the leftmost of equal hashes depends on the strand, so positions are the same only for unique hashes
+    values, counts = np.unique(all_hashes, return_counts=True)
+    unique = values[counts == 1]
+    assert np.sort(mirrored_positions[np.isin(reverse_hashes, unique)]).tolist() == \
+           np.sort(positions[np.isin(hashes, unique)]).tolist()
+
+
+def test_map(genome):
+    index = MinimizerIndex([("chr", genome)], n_jobs=1)
+    for strand in "+-":
+        start = random.randrange(len(genome) - 3000)
+        read = _mutate(genome[start:start + 3000], 0.03)
+        read = reverse_complement(read) if strand == "-" else read
+        best = index.map(read, "read")[0]
+        assert (best.query_id, best.strand, best.target_id) == ("read", strand, "chr")
+        assert abs(best.target_start - start) < 100
+        assert abs(best.target_end - start - 3000) < 100
+        assert best.query_end - best.query_start > 2800
+
+
+def test_overlaps(genome):
+    reads = [("read1", genome[:6000]), ("read2", reverse_complement(genome[4000:10000])),
+             ("read3", genome[8500:14000]), ("read4", genome[15000:])]
+    index = MinimizerIndex(reads, k=15, w=5, n_jobs=2)
+    overlaps = {(overlap.query_id, overlap.target_id): overlap for overlap in index.overlaps()}
+    assert {("read1", "read2"), ("read2", "read3")} == set(overlaps)
+    overlap = overlaps["read1", "read2"]
+    assert "-" == overlap.strand
+    assert 5950 < overlap.query_end <= 6000 and overlap.query_start < 4050
+    assert 4000 <= overlap.target_start < 4050 and 5950 < overlap.target_end <= 6000
+
+
+def test_parallel_index(genome):
+    reads = [(str(i), genome[i * 1000:i * 1000 + 3000]) for i in range(10)]
+    serial = MinimizerIndex(reads, n_jobs=1)
+    parallel = MinimizerIndex(reads, n_jobs=3)
+    assert serial.ids == parallel.ids and serial.lengths == parallel.lengths
+    for name in ("hashes", "sequences", "positions", "is_reverse"):
+        assert (getattr(serial, name) == getattr(parallel, name)).all()
+    hash = int(serial.hashes[len(serial) // 2])
+    assert serial.lookup(hash) == parallel.lookup(hash)
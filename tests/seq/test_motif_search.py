@@ -0,0 +1,66 @@
+import pytest
+
+from aug.seq.motif_search import gibbs_sampler, greedy_motif_search, randomized_motif_search
+from tests.utils import random_string
+
+DNAS = ["CGCCCCTCTCGGGGGTGTTCAGTAAACGGCCA",
+        "GGGCGAGGTATGTGTAAGTGCCAAGGTGCCAG",
+        "TAGTACCGAGACCGAAAGAAGTATACAGGCGT",
+        "TAGATCAAGTTTCAGGTGCACGTCGGTGAACC",
+        "AATCCACCAGCTCCACGTGCAATGTTGGCCTA"]
+
+
+def _score(motifs):
+    return sum(len(column) - max(column.count(letter) for letter in "ACGT") for column in zip(*motifs))
+
+
+def test_greedy_without_pseudocounts():
+    dnas = ["GGCGTTCAGGCA", "AAGAATCAGTCA", "CAAGGAGTTCGC", "CACGTCAATCAC", "CAATAATATTCG"]
+    assert greedy_motif_search(dnas, 3, pseudocount=0).motifs == ["CAG", "CAG", "CAA", "CAA", "CAA"]
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_greedy_chunks(random_seed, n_jobs):
+    dnas = [random_string(min_len=20, max_len=40, alphabet="ACGT") for _ in range(6)]
+    expected = greedy_motif_search(dnas, 5, chunk_size=1000)
+    assert greedy_motif_search(dnas, 5, n_jobs=n_jobs, chunk_size=3) == expected
+    assert expected.score == _score(expected.motifs)
+
+
+def test_randomized():
+    result = randomized_motif_search(DNAS, 8, n_restarts=1000, n_jobs=1, seed=0)
+    assert result.score <= _score(["TCTCGGGG", "CCAAGGTG", "TACAGGCG", "TTCAGGTG", "TCCACGTG"])
+    assert result.score == _score(result.motifs)
+    assert all(motif in dna for motif, dna in zip(result.motifs, DNAS))
+
+
+def test_gibbs():
+    result = gibbs_sampler(DNAS, 8, n_iterations=100, n_restarts=20, n_jobs=1, seed=0)
+    assert result.score <= _score(["TCTCGGGG", "CCAAGGTG", "TACAGCAA", "TTCAGGTG", "TCCACGTG"])
+    assert result.score == _score(result.motifs)
+    assert all(motif in dna for motif, dna in zip(result.motifs, DNAS))
+
+
+def test_seed_independent_of_processes():
+    assert randomized_motif_search(DNAS, 6, n_restarts=20, n_jobs=1, seed=1) == \
+           randomized_motif_search(DNAS, 6, n_restarts=20, n_jobs=2, seed=1)
+
+
+def test_short_sequence():
+    with pytest.raises(ValueError):
+        gibbs_sampler(["ACGT", "AC"], 3)
+
+
+@pytest.mark.parametrize("pseudocount", [1, 0])
+def test_ambiguous_letters(pseudocount):
+    dnas = ["ACGTNNACGTAC", "ACGTTTACGNAC", "NNNNACGTACGT"]
+    for result in (greedy_motif_search(dnas, 4, pseudocount=pseudocount),
+                   randomized_motif_search(dnas, 4, n_restarts=20, pseudocount=pseudocount, n_jobs=1, seed=0),
+                   gibbs_sampler(dnas, 4, n_iterations=100, pseudocount=pseudocount, n_jobs=1, seed=0)):
+        assert result.consensus == "ACGT"
+        assert result.score == 0
+
+
+def test_gibbs_all_windows_ambiguous():
+    result = gibbs_sampler(["ACGTACGT", "NNNNN", "ACGTAC"], 4, n_iterations=50, n_restarts=2, n_jobs=1, seed=0)
+    assert result.motifs[1] == "NNNN"
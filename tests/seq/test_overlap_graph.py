@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from aug.seq.overlap_graph import overlap_edges, overlaps, overlaps_fasta
+from aug.seq.seq import adjacency_list
+from tests.utils import random_string
+
+
+def _naive_overlaps(reads, min_overlap):
+    return sorted((source, target, length)
+                  for source, a in enumerate(reads) for target, b in enumerate(reads) if source != target
+                  for length in range(min_overlap, min(len(a), len(b))) if a[-length:] == b[:length])
+
+
+@pytest.mark.parametrize("min_overlap", [1, 3, 5])
+def test_overlap_edges(random_seed, min_overlap):
+    genome = random_string(min_len=50, max_len=100, alphabet="ACGT")
+    reads = []
+    for _ in range(30):
+        start = random.randrange(len(genome) - 5)
+        reads.append(genome[start:start + random.randint(5, 20)])
+    actual = sorted((source, target, length) for sources, targets, length in overlap_edges(reads, min_overlap)
+                    for source, target in zip(sources.tolist(), targets.tolist()))
+    assert _naive_overlaps(reads, min_overlap) == actual
+
+
+def test_shortest_overlaps_first(random_seed):
+    reads = [random_string(min_len=1, max_len=10, alphabet="AC") for _ in range(20)]
+    lengths = [length for _, _, length in overlaps(enumerate(reads), min_overlap=1)]
+    assert sorted(lengths) == lengths
+
+
+def test_empty():
+    assert [] == list(overlap_edges([]))
+    assert [] == list(overlaps([("a", "ACGT"), ("b", "ACGT")]))
+
+
+def test_overlaps_fasta(base_data_path):
+    expected = adjacency_list(base_data_path + "test_adjacency_list.txt", k=3)
+    actual = [(source, target) for source, target, length in overlaps_fasta(base_data_path + "test_adjacency_list.txt")
+              if length == 3]
+    assert sorted(expected) == sorted(actual)
+
+
+def test_the_only_longest_read():
+    reads = ["ACCA", "CCCA", "ACCAC", "ACAA"]
+    actual = sorted((source, target, length) for sources, targets, length in overlap_edges(reads, 1)
+                    for source, target in zip(sources.tolist(), targets.tolist()))
+    assert _naive_overlaps(reads, 1) == actual
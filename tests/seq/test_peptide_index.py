@@ -0,0 +1,58 @@
+import re
+
+import pytest
+
+from aug.seq.peptide_index import PeptideIndex, WATER_MASS, digest
+from aug.seq.seq import calculate_protein_mass
+from tests.utils import random_string
+
+
+def _naive_digest(protein, missed_cleavages):
+    parts = re.sub(r"([KR])(?!P)", r"\1 ", protein).split()
+    return [("".join(parts[i:i + missed + 1]), len("".join(parts[:i])))
+            for missed in range(missed_cleavages + 1) for i in range(len(parts) - missed)]
+
+
+@pytest.fixture
+def records(random_seed):
+    return [(f"p{i}", random_string(min_len=0, max_len=200, alphabet="ACDEFGHIKLMNPQRSTVWYX")) for i in range(5)]
+
+
+@pytest.mark.parametrize("missed_cleavages", [0, 2])
+def test_digest(random_seed, missed_cleavages):
+    protein = random_string(min_len=0, max_len=100, alphabet="AKRP")
+    assert digest(protein, missed_cleavages) == [peptide for peptide, _ in _naive_digest(protein, missed_cleavages)]
+
+
+def test_search(records):
+    index = PeptideIndex(records, missed_cleavages=1, min_length=3, max_length=30)
+    expected = {(id, position, peptide) for id, protein in records for peptide, position in _naive_digest(protein, 1)
+                if 3 <= len(peptide) <= 30 and "X" not in peptide}
+    assert len(index) == len(expected)
+    found = index.peptides(range(len(index)))
+    assert expected == {peptide[:3] for peptide in found}
+    for _, _, peptide, mass in found:
+        assert mass == pytest.approx(calculate_protein_mass(peptide) + WATER_MASS)
+    masses = [mass + 0.005 for *_, mass in found[::7]]
+    queries, peptides = index.search(masses, tolerance=0.01)
+    for query, mass in enumerate(masses):
+        assert {i for q, i in zip(queries.tolist(), peptides.tolist()) if q == query} == \
+               {i for i, peptide in enumerate(found) if abs(peptide[3] - mass) <= 0.01}
+
+
+def test_ppm(records):
+    index = PeptideIndex(records, min_length=2)
+    observed = index.masses * (1 + 5e-6)
+    queries, peptides = index.search(observed, tolerance=10, ppm=True)
+    assert set(zip(range(len(index)), range(len(index)))) <= set(zip(queries.tolist(), peptides.tolist()))
+    queries, peptides = index.search(observed, tolerance=1, ppm=True)
+    assert not len(peptides) or (abs(index.masses[peptides] / observed[queries] - 1) <= 1e-6).all()
+
+
+def test_save_load(records, tmp_path):
+    index = PeptideIndex(records, min_length=2)
+    index.save(str(tmp_path / "index"))
+    loaded = PeptideIndex.load(str(tmp_path / "index"))
+    masses = index.masses[::3] + 0.001
+    assert [array.tolist() for array in index.search(masses)] == [array.tolist() for array in loaded.search(masses)]
+    assert index.peptides(range(len(index))) == loaded.peptides(range(len(loaded)))
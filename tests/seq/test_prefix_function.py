@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from aug.seq.prefix_function import prefix_function, z_function, search_stream, search_fasta, StreamingSearcher
+from aug.seq.seq import find_motif
+from tests.utils import random_string
+
+
+def _naive_prefix_function(s):
+    return [max((k for k in range(i + 1) if s[:k] == s[i + 1 - k:i + 1]), default=0) for i in range(len(s))]
+
+
+def test_prefix_function(random_seed):
+    s = random_string(max_len=200, alphabet="AC")
+    actual = prefix_function(s)
+    assert np.int32 == actual.dtype
+    assert _naive_prefix_function(s) == actual.tolist()
+
+
+def test_z_function(random_seed):
+    s = random_string(max_len=200, alphabet="AC")
+    expected = [len(s)] + [next(k for k in range(len(s) - i + 1) if k == len(s) - i or s[k] != s[i + k])
+                           for i in range(1, len(s))]
+    actual = z_function(s)
+    assert np.int32 == actual.dtype
+    assert expected == actual.tolist()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 50])
+def test_search_stream_as_find_motif(random_seed, chunk_size):
+    dna = random_string(min_len=1, max_len=500, alphabet="ACG")
+    pattern = random_string(min_len=1, max_len=4, alphabet="ACG")
+    chunks = (dna[i:i + chunk_size] for i in range(0, len(dna), chunk_size))
+    assert find_motif(dna, pattern, zero_based=False) == list(search_stream(chunks, pattern, zero_based=False))
+
+
+def test_streaming_searcher_reset():
+    searcher = StreamingSearcher("AA")
+    assert [0] == searcher.feed("AA")
+    searcher.reset()
+    assert [] == searcher.feed("A")
+
+
+def test_search_fasta(base_data_path):
+    actual = list(search_fasta(base_data_path + "test_fasta.txt", "CCCTC", chunk_size=1))
+    assert [("Rosalind_6404", 57), ("Rosalind_0808", 3)] == actual
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4, 100])
+def test_search_fasta_same_ids(tmp_path, chunk_size):
+    path = tmp_path / "same_ids.fasta"
+    path.write_text(">read\nACGTA\nCC\n>read\nCGTAC\n>read\n\n>read\nGTACG\n")
+    assert [("read", 3), ("read", 2), ("read", 1)] == list(search_fasta(str(path), "TAC", chunk_size=chunk_size))
+    assert [] == list(search_fasta(str(path), "CCCG", chunk_size=chunk_size))
@@ -0,0 +1,30 @@
+import pytest
+
+from aug.seq.proteins import AMINO_ACIDS, n_reverse_translations, pack_proteins, protein_compositions, \
+    protein_masses
+from aug.seq.seq import calculate_protein_mass, n_reverse_translation
+from tests.utils import random_string
+
+
+@pytest.fixture
+def proteins(random_seed):
+    return [random_string(min_len=0, max_len=100, alphabet=AMINO_ACIDS) for _ in range(20)]
+
+
+def test_masses_and_compositions(proteins):
+    buffer, offsets = pack_proteins(proteins)
+    assert protein_masses(buffer, offsets).tolist() == pytest.approx([calculate_protein_mass(p) for p in proteins])
+    assert protein_compositions(buffer, offsets).tolist() == [[p.count(a) for a in AMINO_ACIDS] for p in proteins]
+
+
+@pytest.mark.parametrize("modulo", [None, 10 ** 6, 7])
+def test_n_reverse_translations(proteins, modulo):
+    expected = [n_reverse_translation(p) % modulo if modulo else n_reverse_translation(p) for p in proteins]
+    result = n_reverse_translations(*pack_proteins(proteins), modulo=modulo)
+    assert expected == (result if modulo is None else result.tolist())
+
+
+def test_unknown_residue():
+    with pytest.raises(ValueError):
+        protein_masses(*pack_proteins(["AXA"]))
+    assert protein_masses(*pack_proteins([])).tolist() == []
@@ -0,0 +1,41 @@
+from functools import lru_cache
+
+import pytest
+
+from aug.seq.encoding import WATSON_CRICK_PAIRS, WOBBLE_PAIRS
+from aug.seq.rna_matchings import motzkin_matchings, noncrossing_perfect_matchings, perfect_matchings
+from tests.utils import random_string
+
+
+def _naive_count(rna, pairs, min_size, perfect):
+    complementary = {"AU", "UA", "CG", "GC"} | ({"GU", "UG"} if pairs is WOBBLE_PAIRS else set())
+
+    @lru_cache(None)
+    def count(i, j):
+        if i >= j:
+            return 1
+        result = 0 if perfect else count(i + 1, j)
+        for k in range(i + min_size + 1, j):
+            if rna[i] + rna[k] in complementary:
+                result += count(i + 1, k) * count(k + 1, j)
+        return result
+
+    return count(0, len(rna))
+
+
+@pytest.mark.parametrize("pairs", [WATSON_CRICK_PAIRS, WOBBLE_PAIRS])
+@pytest.mark.parametrize("min_size", [0, 1, 3])
+def test_counts(random_seed, pairs, min_size):
+    rna = random_string(min_len=0, max_len=40, alphabet="ACGU")
+    assert _naive_count(rna, pairs, min_size, perfect=False) == motzkin_matchings(rna, pairs, min_size, modulo=None)
+    assert _naive_count(rna, pairs, min_size, perfect=False) % 1000 == motzkin_matchings(rna, pairs, min_size, 1000)
+    assert _naive_count(rna, pairs, min_size, perfect=True) == \
+        noncrossing_perfect_matchings(rna, pairs, min_size, modulo=None)
+    assert _naive_count(rna, pairs, min_size, perfect=True) % 10 ** 6 == \
+        noncrossing_perfect_matchings(rna, pairs, min_size)
+
+
+def test_perfect_matchings():
+    assert 0 == perfect_matchings("AUCGA")
+    assert 2 * 6 == perfect_matchings("AAUUCCCGGG")
+    assert 1 == perfect_matchings("")
@@ -1,9 +1,15 @@
+import itertools
+import math
 import random
+import re
 import textwrap
+from collections import Counter
 
+import numpy as np
 import pytest
 
 from aug.comb.comb import gen_substrings
+from aug.data.fasta import fasta, read_fasta
 from aug.heredity.Phenotype import *
 from aug.heredity.heredity import n_expected_dominant_phenotype
 from aug.seq.seq import *
@@ -134,6 +140,21 @@ def test_dna_probability():
     assert -5.737 == pytest.approx(dna_probability("ACGATACAA", 0.129, return_log=True))
 
 
+def test_dna_probability_array(random_seed):
+    dna = random_string(min_len=1, max_len=50, alphabet="ACGT")
+    gc = np.linspace(0, 1, 11)
+    expected = [math.prod(g / 2 if letter in "CG" else (1 - g) / 2 for letter in dna) for g in gc.tolist()]
+    assert expected == pytest.approx(dna_probability(dna, gc).tolist())
+    assert dna_probability(dna * 10000, 0.3, return_log=True) == pytest.approx(
+        10000 * dna_probability(dna, 0.3, return_log=True))
+
+
+@pytest.mark.parametrize("dna", ["ACGU", "ACGu", "acgt", "ACGN", "ACG-", "ACGÜ"])
+def test_dna_probability_wrong_letters(dna):
+    with pytest.raises(ValueError):
+        dna_probability(dna, 0.5)
+
+
 def test_find_spliced_motif():
     dna = "ACGTACGTGACG"
     motif = "GTA"
@@ -420,6 +441,23 @@ def test_find_protein_motif_by_shorthand():
     assert [46, 114, 115, 381, 408] == find_protein_motif_by_shorthand(protein, "N{P}[ST]{P}")
 
 
+def test_find_protein_motif_overlapping(random_seed):
+    protein = random_string(min_len=0, max_len=300, alphabet="NPST")
+    expected = [i for i in range(len(protein)) if re.match("N[^P][ST][^P]", protein[i:])]
+    assert expected == find_protein_motif_by_shorthand(protein, "N{P}[ST]{P}")
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_find_protein_motif_in_fasta(tmp_path, n_jobs):
+    records = [("a", "NNTSNKTSNPS"), ("b", "PPPP"), ("c", "NASANTSP")]
+    path = str(tmp_path / "proteome.fasta")
+    with open(path, "w") as file:
+        file.write("".join(fasta(protein_id, protein) for protein_id, protein in records))
+    assert list(find_protein_motif_in_fasta(path, "N{P}[ST]{P}", chunk_size=2, n_jobs=n_jobs)) == \
+           [("a", [0, 1, 4]), ("c", [0])]
+    assert len(list(find_protein_motif_in_fasta(path, "N{P}[ST]{P}", n_jobs=n_jobs, skip_empty=False))) == 3
+
+
 def test_transition_transversion_ratio():
     dna1 = "GCAACGCACAACGAAAACCCTTAGGGACTGGATTATTTCGTGATCGTTGTAGTTATTGGAAGTACGGGCATCAACCCAGTT"
     dna2 = "TTATCTGACAAAGAAAGCCGTCAACGGCTGGATAATTTCGCGATCGTGCTGGTTACTGGCGGTACGAGTGTTCCTTTGGGT"
@@ -437,3 +475,109 @@ def test_transition_transversion_ratio():
 #    assert ['an'] == longest_common_substring(["ananas", "ban", "banana"])\
 #           == longest_common_substring(["banana", "ananas", "ban"])
 #    assert 'AC' in longest_common_substring(["GATTACA", "TAGACCA", "ATACA"])
+
+
+def _naive_reverse_palindromes(dna, min_len, max_len):
+    return [(i, l) for i in range(len(dna)) for l in range(max(min_len, 1), max_len + 1)
+            if i + l <= len(dna) and dna[i:i + l] == reverse_complement(dna[i:i + l])]
+
+
+@pytest.mark.parametrize("min_len, max_len", [[4, 12], [1, 3], [5, 9], [2, 40]])
+def test_find_reverse_palindromes_random(random_seed, min_len, max_len):
+    dna = random_string(min_len=0, max_len=300, alphabet="AT") + random_string(max_len=300, alphabet="ACGT")
+    assert _naive_reverse_palindromes(dna, min_len, max_len) == find_reverse_palindromes(dna, min_len, max_len)
+
+
+def test_reverse_palindromes_iter_chunks(random_seed):
+    dna = random_string(min_len=100, max_len=1000, alphabet="ACGT")
+    chunks = [dna[i:i + 7] + "\n" for i in range(0, len(dna), 7)]
+    assert find_reverse_palindromes(dna) == list(reverse_palindromes_iter(chunks))
+
+
+def _naive_nussinov_score(rna, min_size):
+    n = len(rna)
+    score = [[0] * n for _ in range(n)]
+    for d in range(1, n):
+        for i in range(n - d):
+            j = i + d
+            best = max(score[i][k] + (score[k + 1][j] if k + 1 <= j else 0) for k in range(i, j))
+            if d > min_size and {rna[i], rna[j]} in ({"A", "U"}, {"C", "G"}):
+                best = max(best, (score[i + 1][j - 1] if i + 1 <= j - 1 else 0) + 1)
+            score[i][j] = best
+    return score[0][n - 1] if n else 0
+
+
+@pytest.mark.parametrize("min_size", [0, 3])
+def test_rna_structure_prediction(random_seed, min_size):
+    rna = random_string(min_len=0, max_len=60, alphabet="ACGU")
+    structure, score = rna_structure_prediction(rna, min_size)
+    assert _naive_nussinov_score(rna, min_size) == score == len(structure)
+    assert score == rna_structure_prediction(rna, min_size, score_only=True)
+    paired = [position for pair in structure for position in pair]
+    assert len(paired) == len(set(paired))
+    for i, j in structure:
+        assert j - i > min_size
+        assert {rna[i], rna[j]} in ({"A", "U"}, {"C", "G"})
+        for k, l in structure:
+            assert not i < k < j < l  # no pseudoknots
+
+
+def _naive_profile(dnas):
+    result = {letter: [0] * len(dnas[0]) for letter in "ACGT"}
+    for dna in dnas:
+        for i, letter in enumerate(dna):
+            result[letter][i] += 1
+    return result
+
+
+def test_profile_matrix(random_seed):
+    k = random.randint(1, 20)
+    dnas = [random_string(min_len=k, max_len=k, alphabet="ACGT") for _ in range(random.randint(1, 50))]
+    assert _naive_profile(dnas) == profile(dnas)
+    first = profile(dnas[:len(dnas) // 2]) if len(dnas) > 1 else None
+    assert _naive_profile(dnas) == profile(dnas[len(dnas) // 2:], first)
+    assert consensus(dnas) == consensus(precalculated_profile=profile_counts(dna_matrix(dnas)))
+    with pytest.raises(ValueError):
+        dna_matrix(["ACG", "AC"])
+
+
+def test_profile_accumulation(random_seed):
+    k = random.randint(1, 20)
+    dnas = [random_string(min_len=k, max_len=k, alphabet="ACGT") for _ in range(random.randint(2, 50))]
+    accumulated = profile(dnas[0])
+    rows = [accumulated[letter] for letter in "ACGT"]
+    for dna in dnas[1:]:
+        assert profile(dna, accumulated) is accumulated
+    assert _naive_profile(dnas) == accumulated
+    assert all(accumulated[letter] is row for letter, row in zip("ACGT", rows))
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_profile_fasta(base_data_path, n_jobs):
+    dnas = read_fasta(base_data_path + "test_profile_fasta.txt", without_id=True)
+    counts = profile_fasta(base_data_path + "test_profile_fasta.txt", chunk_size=2, n_jobs=n_jobs)
+    assert _naive_profile(dnas) == profile_to_dict(counts)
+    assert consensus(dnas) == consensus(precalculated_profile=counts)
+
+
+def test_prefix_spectra(random_seed):
+    proteins = [random_string(min_len=0, max_len=30, alphabet="ACDEFGHKMNPQRSTVWY") for _ in range(10)]
+    spectra = [list(itertools.accumulate([100.0] + [monoisotopic_mass_table[p] for p in protein]))
+               for protein in proteins]
+    assert proteins == prefix_spectra(spectra)
+    assert proteins[0] == prefix_spectrum(spectra[0])
+
+
+@pytest.mark.parametrize("mass, expected", [[40.0, "G"], [58.5, "G"], [64.0, "G"], [64.03, "A"], [70.0, "A"],
+                                            [113.08406, "L"], [300.0, "W"]])
+def test_nearest_residue_mass(mass, expected):
+    # G (57.02146) is chosen for masses between G and A when it's the nearest one
+    assert expected == prefix_spectrum([100.0, 100.0 + mass])
+
+
+def test_spectral_convolution(random_seed):
+    spectrum1 = [round(random.uniform(0, 1000), 3) for _ in range(random.randint(0, 40))]
+    spectrum2 = [round(random.uniform(0, 1000), 3) for _ in range(random.randint(0, 40))] + spectrum1[:5]
+    expected = Counter(round(x - y, 3) for x in spectrum1 for y in spectrum2)
+    values, counts = spectral_convolution(spectrum1, spectrum2, tolerance=1e-3, block_size=17)
+    assert expected == {round(value, 3): count for value, count in zip(values.tolist(), counts.tolist())}
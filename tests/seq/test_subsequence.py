@@ -0,0 +1,50 @@
+import pytest
+
+from aug.seq.seq import find_spliced_motif
+from aug.seq.subsequence import SubsequenceIndex, lcs_length, longest_common_subsequence, \
+    shortest_common_supersequence
+from tests.utils import random_string
+
+
+def test_find(random_seed):
+    dna = random_string(min_len=0, max_len=200, alphabet="ACGT")
+    motifs = [random_string(min_len=1, max_len=12, alphabet="ACGTN") for _ in range(50)]
+    index = SubsequenceIndex(dna)
+    expected = [find_spliced_motif(dna, motif, zero_based=False) for motif in motifs]
+    assert [index.find(motif, zero_based=False) for motif in motifs] == expected
+    assert index.find_all(motifs, zero_based=False) == expected
+
+
+def test_empty():
+    index = SubsequenceIndex("")
+    assert index.find("A") == -1
+    assert index.find_all(["A", ""]) == [-1, []]
+    assert SubsequenceIndex("ACGT").find_all([]) == []
+
+
+def _naive_lcs_length(a, b):
+    row = [0] * (len(b) + 1)
+    for x in a:
+        previous = row[:]
+        for j, y in enumerate(b, 1):
+            row[j] = max(previous[j], row[j - 1], previous[j - 1] + (x == y))
+    return row[-1]
+
+
+def _is_subsequence(motif, dna):
+    letters = iter(dna)
+    return all(letter in letters for letter in motif)
+
+
+@pytest.mark.parametrize("table_size", [0, 1 << 16])
+def test_lcs(random_seed, table_size):
+    a = random_string(min_len=0, max_len=100, alphabet="ACGT")
+    b = random_string(min_len=0, max_len=100, alphabet="ACGT")
+    expected = _naive_lcs_length(a, b)
+    assert lcs_length(a, b) == expected
+    lcs = longest_common_subsequence(a, b, table_size=table_size)
+    assert len(lcs) == expected
+    assert _is_subsequence(lcs, a) and _is_subsequence(lcs, b)
+    scs = shortest_common_supersequence(a, b)
+    assert len(scs) == len(a) + len(b) - expected
+    assert _is_subsequence(a, scs) and _is_subsequence(b, scs)
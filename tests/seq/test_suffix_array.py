@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from aug.seq.seq import find_motif, longest_common_substring
+from aug.seq.suffix_array import SuffixArray, suffix_array, lcp_array
+from tests.utils import random_string
+
+
+def _naive_common_substrings(strings):
+    first = strings[0]
+    substrings = {first[i:j] for i in range(len(first)) for j in range(i + 1, len(first) + 1)}
+    common = [s for s in substrings if all(s in string for string in strings)]
+    length = max(map(len, common), default=0)
+    return sorted(s for s in common if len(s) == length)
+
+
+def test_suffix_array_and_lcp(random_seed):
+    string = random_string(min_len=1, max_len=300, alphabet="AC") + "$"
+    text = np.array([ord(letter) for letter in string])
+    sa = suffix_array(text)
+    assert sorted(range(len(string)), key=lambda i: string[i:]) == sa.tolist()
+    lcp = lcp_array(text, sa)
+    for i in range(1, len(sa)):
+        a, b = string[sa[i - 1]:], string[sa[i]:]
+        assert lcp[i] == next(k for k in range(len(b) + 1) if k == len(b) or a[k] != b[k])
+
+
+@pytest.mark.parametrize("strings, expected", [
+    [["abba", "baba"], ["ab", "ba"]],
+    [["banana", "ananas"], ["anana"]],
+    [["banana", "ban"], ["ban"]],
+    [["baobab", "bamboo", "banana"], ["ba"]],
+    [["GATTACA", "TAGACCA", "ATACA"], ["AC", "CA", "TA"]],
+    [["abc", "xyz"], []],
+])
+def test_longest_common_substring(strings, expected):
+    assert expected == SuffixArray(strings).longest_common_substring()
+
+
+def test_longest_common_substring_random(random_seed):
+    strings = [random_string(min_len=1, max_len=30, alphabet="ACGT") for _ in range(4)]
+    assert _naive_common_substrings(strings) == SuffixArray(strings).longest_common_substring()
+    assert longest_common_substring(strings) in _naive_common_substrings(strings) + [""]
+
+
+def test_longest_common_substring_of_some_strings():
+    assert ["GATTA"] == SuffixArray(["GATTA", "CCC", "AGATTAC"]).longest_common_substring(min_strings=2)
+
+
+def test_longest_repeat():
+    assert "" == SuffixArray("ACGT").longest_repeat()
+    assert "ACGA" == SuffixArray("TTACGACGATT").longest_repeat()
+
+
+def test_count_and_locate(random_seed):
+    strings = [random_string(min_len=1, max_len=200, alphabet="ACG") for _ in range(3)]
+    pattern = random_string(min_len=1, max_len=3, alphabet="ACG")
+    index = SuffixArray(strings)
+    expected = [(i, position) for i, string in enumerate(strings) for position in find_motif(string, pattern)]
+    assert len(expected) == index.count(pattern)
+    assert expected == index.locate(pattern)
+    assert 0 == index.count("T")
+
+
+@pytest.mark.parametrize("file_name", ["index.npz", "index", "index.sa"])
+def test_save_load(tmp_path, file_name):
+    index = SuffixArray(["GATTACA", "TAGACCA"])
+    index.save(str(tmp_path / file_name))
+    assert [file_name] == [path.name for path in tmp_path.iterdir()]
+    loaded = SuffixArray.load(str(tmp_path / file_name))
+    assert [(0, 5), (1, 5)] == loaded.locate("CA")
+    assert index.longest_common_substring() == loaded.longest_common_substring()